@@ -1,126 +1,133 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
-import os
-import json
-import requests
-from bs4 import BeautifulSoup
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
 from dotenv import load_dotenv
 import time
 import threading
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from functools import partial
+from extractor import BASIC_HANDLERS, PageExtractor
+from browser_pool import browser_pool
+from readiness import resolve_strategy, resolve_timeout, wait_for_page
+from http_pool import shared_pool
+from http_cache import http_cache
+from parsers import DEFAULT_PARSER, content_type_charset, extract_page, get_parser
+from textnorm import normalize_blocks
+from near_duplicates import near_duplicate_index
+from result_store import parse_results_query, result_store
+from jobs import JobManager, QueueFull
+from serialization import api_response
+from metrics import registry, requests_tracker, stage
+from inference import InferenceServer
+from llm_cache import LLMCache
+from summarize import summarize_document
+from models import MODEL_PRELOAD, SUMMARIZER_BACKEND, SUMMARIZER_MODEL, LazyModel, load_pipeline, model_key
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
-# Global variables for LLM model
-llm_model = None
-tokenizer = None
-summarizer = None
+# Hugging Face models, loaded on first use (transformers and torch are only
+# imported then)
+summarizer = LazyModel('summarizer', partial(load_pipeline, "summarization", SUMMARIZER_MODEL, SUMMARIZER_BACKEND))
+
+# Micro-batches summarization requests off the request threads, with a
+# content-hash cache in front
+inference = InferenceServer(cache=LLMCache())
+inference.register('summarizer', summarizer, model_id=model_key(SUMMARIZER_MODEL, SUMMARIZER_BACKEND))
+
+# Title, text, links and images only
+basic_extractor = PageExtractor(BASIC_HANDLERS)
+
+# Bounded worker pool for /api/jobs
+job_manager = JobManager()
 
 def initialize_models():
-    """Initialize Hugging Face models"""
-    global llm_model, tokenizer, summarizer
-    
+    """Load the Hugging Face models now instead of on first use; returns {model name: error} for failed loads"""
     print("Loading Hugging Face models...")
     
-    # Load a text classification model for content categorization
-    model_name = "distilbert-base-uncased"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    llm_model = AutoModelForSequenceClassification.from_pretrained(model_name)
-    
     # Load a summarization model
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+    try:
+        summarizer.get()
+    except Exception as e:
+        print(f"Error loading {summarizer.name} model: {e}")
+        return {summarizer.name: str(e)}
     
     print("Models loaded successfully!")
+    return {}
 
-def scrape_with_selenium(url):
+def scrape_with_selenium(url, parser=None, wait=None, wait_selector=None, wait_timeout=None):
     """Scrape website using Selenium for dynamic content"""
     try:
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        driver = webdriver.Chrome(ChromeDriverManager().install(), options=chrome_options)
-        
-        driver.get(url)
-        
-        # Wait for page to load
-        time.sleep(3)
-        
-        # Get page source
-        page_source = driver.page_source
-        
-        # Extract text content
-        soup = BeautifulSoup(page_source, 'html.parser')
+        # Lease a warm browser (fresh tab) instead of launching Chrome per request
+        with browser_pool().lease() as driver:
+            with stage('navigate'):
+                driver.get(url)
+            
+            # Wait until the page is ready (readyState, network idle, selector
+            # or DOM quiescence), up to a hard ceiling
+            with stage('wait'):
+                wait_info = wait_for_page(driver, wait, wait_selector, wait_timeout)
+            
+            # Get page source
+            with stage('page_source'):
+                page_source = driver.page_source
         
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
+        # Extract text content (script, style and noscript are skipped)
+        page = extract_page(page_source, url, basic_extractor, parser)
         
-        # Get text content
-        text = soup.get_text()
+        # Clean up text, and the main content (article body) picked out during the parse
+        with stage('clean_text'):
+            text = normalize_blocks(page['text_blocks'])['text']
+            main_text = normalize_blocks(page['main_content']['text_blocks'])['text'] if 'main_content' in page else None
         
-        # Clean up text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        driver.quit()
-        
-        return {
+        result = {
             'url': url,
-            'title': soup.title.string if soup.title else 'No title',
+            'title': page['metadata']['title'] or 'No title',
             'text': text,
-            'links': [a.get('href') for a in soup.find_all('a', href=True)],
-            'images': [img.get('src') for img in soup.find_all('img', src=True)]
+            'links': page['hrefs'],
+            'images': page['image_srcs'],
+            'wait': wait_info
         }
+        if main_text is not None:
+            result['main_text'] = main_text
+        return result
         
     except Exception as e:
         return {'error': str(e)}
 
-def scrape_with_requests(url):
+def scrape_with_requests(url, parser=None):
     """Scrape website using requests for static content"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
+        # Shared keep-alive pool, so repeat scrapes of a host skip the TCP/TLS handshakes,
+        # behind the on-disk response cache (ETag / Last-Modified revalidation)
+        cache = http_cache()
+        response, cache_status = cache.fetch(shared_pool(), url, timeout=10)
         
-        # Get text content
-        text = soup.get_text()
+        # Unchanged page (fresh or 304): reuse the result parsed last time
+        variant = f'basic:{parser or DEFAULT_PARSER}'
+        result = cache.reuse_parsed(response, cache_status, variant)
+        if result is None:
+            # Extract text content (script, style and noscript are skipped)
+            page = extract_page(response.content, url, basic_extractor, parser,
+                                content_type_charset(response.headers.get('content-type')))
+            
+            # Clean up text, and the main content (article body) picked out during the parse
+            with stage('clean_text'):
+                text = normalize_blocks(page['text_blocks'])['text']
+                main_text = normalize_blocks(page['main_content']['text_blocks'])['text'] if 'main_content' in page else None
+            
+            result = {
+                'url': url,
+                'title': page['metadata']['title'] or 'No title',
+                'text': text,
+                'links': page['hrefs'],
+                'images': page['image_srcs']
+            }
+            if main_text is not None:
+                result['main_text'] = main_text
+            cache.remember_parsed(response, variant, result)
         
-        # Clean up text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return {
-            'url': url,
-            'title': soup.title.string if soup.title else 'No title',
-            'text': text,
-            'links': [a.get('href') for a in soup.find_all('a', href=True)],
-            'images': [img.get('src') for img in soup.find_all('img', src=True)]
-        }
+        return dict(result, cache=cache_status)
         
     except Exception as e:
         return {'error': str(e)}
@@ -131,20 +138,41 @@ def structure_content_with_llm(content):
         if not content or 'text' not in content:
             return {'error': 'No content to process'}
         
-        text = content['text']
+        # The model gets the article body when one was found, not the
+        # navigation, banners and footers around it
+        text = content.get('main_text') or content['text']
         
-        # Truncate text if too long for model
-        if len(text) > 1000:
-            text = text[:1000] + "..."
+        # Near-duplicate of a page summarized before: reuse its summary, or skip the model
+        index = near_duplicate_index()
+        with stage('fingerprint'):
+            fingerprint, duplicate = index.check(text)
         
-        # Generate summary
-        summary = summarizer(text, max_length=130, min_length=30, do_sample=False)
+        # Only set when the earlier page's result stands in for this one
+        near_duplicate_of = None
+        if duplicate is not None and duplicate['result'] is not None and index.mode == 'reuse':
+            index.count('reused')
+            summary = duplicate['result']['summary']
+            near_duplicate_of = {'url': duplicate['url'], 'distance': duplicate['distance']}
+        elif duplicate is not None and index.mode == 'skip':
+            index.count('skipped')
+            near_duplicate_of = {'url': duplicate['url'], 'distance': duplicate['distance']}
+            summary = {'summary': ''}
+        else:
+            # Summarize the whole text: token-budgeted chunks, summarized as one
+            # batch on the inference worker, then reduced to a single summary
+            with stage('summarize'):
+                tokenizer = getattr(summarizer.get(), 'tokenizer', None)
+                summary = summarize_document(inference, text, tokenizer=tokenizer, max_length=130, min_length=30, do_sample=False)
+            
+            if fingerprint is not None:
+                index.add(fingerprint, content.get('url', ''), {'summary': summary})
         
         # Structure the content
         structured_data = {
             'url': content.get('url', ''),
             'title': content.get('title', ''),
-            'summary': summary[0]['summary_text'],
+            'summary': summary['summary'],
+            'summary_stats': {key: value for key, value in summary.items() if key != 'summary'},
             'main_content': text[:500] + "..." if len(text) > 500 else text,
             'links_count': len(content.get('links', [])),
             'images_count': len(content.get('images', [])),
@@ -152,6 +180,8 @@ def structure_content_with_llm(content):
             'extracted_images': content.get('images', [])[:5],  # First 5 images
             'processing_timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         }
+        if near_duplicate_of is not None:
+            structured_data['near_duplicate_of'] = near_duplicate_of
         
         return structured_data
         
@@ -162,44 +192,184 @@ def structure_content_with_llm(content):
 def index():
     return render_template('index.html')
 
+def parse_scrape_request(data):
+    """Validate a scrape request body; raises ValueError with a message for the client"""
+    data = data or {}
+    params = {
+        'url': data.get('url'),
+        'method': data.get('method', 'requests'),  # 'requests' or 'selenium'
+        'parser': data.get('parser'),  # 'html.parser', 'lxml' or 'selectolax'
+        # The full scraped page next to structured_data; left out by default to keep responses small
+        'include_raw': bool(data.get('include_raw')),
+        # Add a per-stage timings breakdown (milliseconds) to the response
+        'debug': bool(data.get('debug')),
+        # Selenium only: 'load', 'network_idle', 'selector' or 'mutation'
+        'wait': data.get('wait'),
+        'wait_selector': data.get('wait_selector'),
+        'wait_timeout': data.get('wait_timeout')
+    }
+    
+    if not params['url']:
+        raise ValueError('URL is required')
+    
+    get_parser(params['parser'])
+    resolve_strategy(params['wait'], params['wait_selector'])
+    # Seconds, capped at SELENIUM_MAX_WAIT_TIME
+    params['wait_timeout'] = resolve_timeout(params['wait_timeout'])
+    return params
+
+def run_scrape(params):
+    """Scrape and analyze one page, timing every stage; returns (response body, HTTP status)"""
+    with requests_tracker.track(params['method']) as timings:
+        body, status = scrape_page(params)
+        if status < 400:
+            timings.status = 'ok'
+    if params['debug']:
+        body['timings'] = timings.as_dict()
+    return body, status
+
+def scrape_page(params):
+    """Scrape and analyze one page; returns (response body, HTTP status)"""
+    # Scrape the website
+    if params['method'] == 'selenium':
+        scraped_data = scrape_with_selenium(params['url'], params['parser'], params['wait'],
+                                            params['wait_selector'], params['wait_timeout'])
+    else:
+        scraped_data = scrape_with_requests(params['url'], params['parser'])
+    
+    if 'error' in scraped_data:
+        return scraped_data, 400
+    
+    # Structure the content with LLM
+    structured_data = structure_content_with_llm(scraped_data)
+    
+    # Keep both for /api/results (written in bulk by the store's writer thread)
+    result_store().add(scraped_data, structured_data, source=params['method'])
+    
+    body = {
+        'success': True,
+        'structured_data': structured_data
+    }
+    if params['include_raw']:
+        body['raw_data'] = scraped_data
+    return body, 200
+
 @app.route('/api/scrape', methods=['POST'])
 def scrape():
     try:
-        data = request.get_json()
-        url = data.get('url')
-        method = data.get('method', 'requests')  # 'requests' or 'selenium'
+        try:
+            params = parse_scrape_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if not url:
-            return jsonify({'error': 'URL is required'}), 400
+        body, status = run_scrape(params)
+        return api_response(body, status)
         
-        # Scrape the website
-        if method == 'selenium':
-            scraped_data = scrape_with_selenium(url)
-        else:
-            scraped_data = scrape_with_requests(url)
-        
-        if 'error' in scraped_data:
-            return jsonify(scraped_data), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Queue a scrape and return its job id immediately"""
+    try:
+        try:
+            params = parse_scrape_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Structure the content with LLM
-        structured_data = structure_content_with_llm(scraped_data)
+        try:
+            job = job_manager.submit(run_scrape, params)
+        except QueueFull as e:
+            # Backpressure: tell the client when to retry instead of queueing without bound
+            response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
         
         return jsonify({
-            'success': True,
-            'raw_data': scraped_data,
-            'structured_data': structured_data
-        })
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}',
+            'events_url': f'/api/jobs/{job.id}/events'
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return api_response(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events: a 'status' event per state change, then 'done' with the result"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return Response(job_manager.events(job), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/results')
+def list_results():
+    """Stored scrape results, newest first, filtered by url, domain, content_hash and since/until"""
+    store = result_store()
+    if not store.enabled:
+        return jsonify({'error': 'The result store is disabled (RESULT_STORE_PATH is empty)'}), 404
+    try:
+        query = parse_results_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return api_response(store.query(**query))
+
+@app.route('/api/results/<int:result_id>')
+def get_result(result_id):
+    """One stored scrape result with its raw_data"""
+    store = result_store()
+    result = store.get(result_id) if store.enabled else None
+    if result is None:
+        return jsonify({'error': 'Result not found'}), 404
+    return api_response(result)
+
+# Queue, cache and pool state, read whenever /metrics is scraped
+registry.register_stats('jobs', job_manager.stats)
+registry.register_stats('inference', inference.stats, label='model')
+registry.register_stats('llm_cache', inference.cache_stats)
+registry.register_stats('http_cache', lambda: http_cache().stats())
+registry.register_stats('http_pool', lambda: shared_pool().stats())
+registry.register_stats('browser_pool', lambda: browser_pool().stats())
+registry.register_stats('near_duplicates', lambda: near_duplicate_index().stats())
+registry.register_stats('result_store', lambda: result_store().stats())
+
+@app.route('/metrics')
+def metrics():
+    """Stage histograms and queue/cache gauges in the Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/health')
 def health():
-    return jsonify({'status': 'healthy', 'models_loaded': llm_model is not None})
+    return jsonify({
+        'status': 'healthy',
+        'models_loaded': summarizer.loaded,
+        'models': {'summarizer': summarizer.status()},
+        'inference_backends': {'summarizer': SUMMARIZER_BACKEND},
+        'http_pool': shared_pool().stats(),
+        'browser_pool': browser_pool().stats(),
+        'http_cache': http_cache().stats(),
+        'inference': inference.stats(),
+        'llm_cache': inference.cache_stats(),
+        'near_duplicates': near_duplicate_index().stats(),
+        'result_store': result_store().stats(),
+        'jobs': job_manager.stats()
+    })
 
 if __name__ == '__main__':
-    # Initialize models in a separate thread to avoid blocking
-    model_thread = threading.Thread(target=initialize_models)
-    model_thread.start()
+    # Models load on first use; MODEL_PRELOAD starts loading them in the background now
+    if MODEL_PRELOAD:
+        threading.Thread(target=initialize_models, daemon=True).start()
+    
+    # Resolve chromedriver (and optionally pre-launch browsers) once at startup
+    threading.Thread(target=browser_pool().warm, daemon=True).start()
     
     app.run(debug=True, host='0.0.0.0', port=5002) 
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Asynchronous batch scraping on aiohttp
+
+BatchScraper fetches many URLs concurrently on an asyncio event loop with a
+global and a per-host concurrency limit, and hands every downloaded page to a
+processing callback (normally Crawl4AIScraper.build_page) on a worker thread
+so parsing never blocks the event loop. Results are produced in completion
+order, which lets the Flask endpoint stream them as NDJSON. Bodies are read
+in chunks under the same size and content-type limits as ConnectionPool.stream.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from http_pool import (DEFAULT_HEADERS, FETCH_ALLOWED_TYPES, FETCH_CHUNK_SIZE, FETCH_MAX_BYTES,
+                       FetchLimitExceeded, check_response)
+
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 50))
+BATCH_PER_HOST = int(os.getenv('BATCH_PER_HOST', 8))
+BATCH_MAX_URLS = int(os.getenv('BATCH_MAX_URLS', 1000))
+
+
+async def read_body(response, max_bytes=FETCH_MAX_BYTES, allowed_types=FETCH_ALLOWED_TYPES):
+    """Body of an aiohttp response, read in chunks; raises FetchLimitExceeded past the limits"""
+    check_response(response.status, response.headers, max_bytes, allowed_types)
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(FETCH_CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_bytes:
+            raise FetchLimitExceeded(f'Response is over the {max_bytes} byte limit')
+    return bytes(body)
+
+
+class BatchScraper:
+    """Fetch and process many URLs with bounded global and per-host concurrency"""
+
+    def __init__(self, process, max_concurrency=BATCH_MAX_CONCURRENCY, per_host=BATCH_PER_HOST, timeout=15):
+        """process(url, content, status_code, content_type, encoding) builds the result for one page"""
+        self.process = process
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+
+    async def _scrape_one(self, session, index, url, global_limit, host_limits):
+        """Fetch one URL under both limits, then process it off the event loop"""
+        host = urlparse(url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        start = time.perf_counter()
+        try:
+            # Take the host slot first so requests queued behind a busy host
+            # don't hold global slots other hosts could use
+            async with host_limit:
+                async with global_limit:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                        response.raise_for_status()
+                        content = await read_body(response)
+                        status_code = response.status
+                        content_type = response.headers.get('content-type', '')
+                        encoding = response.charset
+
+            loop = asyncio.get_running_loop()
+            page = await loop.run_in_executor(None, self.process, url, content, status_code, content_type, encoding)
+        except Exception as e:
+            page = {'error': str(e) or e.__class__.__name__}
+
+        result = {'index': index, 'url': url, 'elapsed': round(time.perf_counter() - start, 3)}
+        if 'error' in page:
+            result['error'] = page['error']
+        else:
+            result['success'] = True
+            result['raw_data'] = page
+        return result
+
+    async def scrape_all(self, urls):
+        """Async generator yielding one result dict per URL as soon as it finishes"""
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = {}
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host)
+        async with aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS) as session:
+            tasks = [
+                asyncio.ensure_future(self._scrape_one(session, index, url, global_limit, host_limits))
+                for index, url in enumerate(urls)
+            ]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                # Consumer stopped early (e.g. client disconnected)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stream(self, urls):
+        """Run scrape_all on a background event loop and yield results from this thread
+
+        Closing the generator cancels the outstanding fetches.
+        """
+        return stream_async(lambda: self.scrape_all(urls), 'Batch')
+
+
+def stream_async(make_iterator, label='Job'):
+    """Drive an async iterator on a background event loop and yield its items here
+
+    make_iterator() is called on the background loop. Closing the generator
+    stops the iterator; failures are yielded as a final {'error': ...} item.
+    """
+    results = queue.Queue()
+    cancelled = threading.Event()
+    done = object()
+
+    async def pump():
+        async for result in make_iterator():
+            if cancelled.is_set():
+                break
+            results.put(result)
+
+    def run():
+        try:
+            asyncio.run(pump())
+        except Exception as e:
+            results.put({'error': f'{label} failed: {str(e)}'})
+        finally:
+            results.put(done)
+
+    threading.Thread(target=run, daemon=True).start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                return
+            yield item
+    finally:
+        cancelled.set()
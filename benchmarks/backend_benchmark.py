@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Accuracy vs latency of the inference backends (pytorch, int8, onnx)
+
+Runs the stand-in classifier and summarizer from tiny_models.py (scaled up
+with --hidden / --layers so the matrix multiplies dominate, as they do in the
+real models) over documents cut from the benchmark corpus, once per backend
+from models.py:
+
+- load: seconds to build the backend from the loaded PyTorch model; for onnx
+  both the first load (export) and a reload from the cached export
+- latency: milliseconds per text, batched like the inference worker does
+- accuracy against fp32 PyTorch: for the classifier, the share of identical
+  labels and the mean absolute score difference; for the summarizer, the
+  share of identical summaries and the mean token similarity
+
+The stand-ins are randomly initialised, so scores say how far each backend
+drifts from fp32, not how good the models are. ONNX summarization needs
+optimum and is skipped when it is not installed.
+
+Usage: python benchmarks/backend_benchmark.py [--docs N] [--batch-size N] [--hidden N] [--layers N]
+                                             [--output results.json]
+"""
+
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from models import apply_backend
+from tiny_models import build_classifier, build_summarizer, build_tokenizer, corpus_texts
+
+
+def documents(count, length):
+    """count texts of about length characters built from corpus paragraphs"""
+    paragraphs = corpus_texts()
+    docs, current, i = [], '', 0
+    while len(docs) < count:
+        current += ' ' + paragraphs[i % len(paragraphs)]
+        i += 1
+        if len(current) >= length:
+            docs.append(current.strip()[:length])
+            current = ''
+    return docs
+
+
+def timed_run(model, docs, batch_size, **params):
+    """(outputs, milliseconds per text)"""
+    outputs = []
+    start = time.perf_counter()
+    with torch.inference_mode():
+        for i in range(0, len(docs), batch_size):
+            outputs.extend(model(docs[i:i + batch_size], batch_size=batch_size, **params))
+    return outputs, (time.perf_counter() - start) * 1000 / len(docs)
+
+
+def token_similarity(a, b):
+    return difflib.SequenceMatcher(None, a.split(), b.split()).ratio()
+
+
+def compare_classifier(baseline, outputs):
+    agreement = sum(a['label'] == b['label'] for a, b in zip(baseline, outputs)) / len(outputs)
+    score_diff = statistics.mean(abs(a['score'] - b['score']) for a, b in zip(baseline, outputs))
+    return {'agreement': round(agreement, 4), 'mean_score_diff': round(score_diff, 5)}
+
+
+def compare_summaries(baseline, outputs):
+    texts = [(a['summary_text'], b['summary_text']) for a, b in zip(baseline, outputs)]
+    return {
+        'agreement': round(sum(a == b for a, b in texts) / len(texts), 4),
+        'token_similarity': round(statistics.mean(token_similarity(a, b) for a, b in texts), 4)
+    }
+
+
+def run_backends(label, build, backends, docs, batch_size, compare, cache_dir, **params):
+    """Build, time and score every backend; the first one is the fp32 baseline"""
+    rows = []
+    baseline = None
+    for backend in backends:
+        model = build()
+        start = time.perf_counter()
+        model = apply_backend(model, backend, os.path.join(cache_dir, label))
+        load = time.perf_counter() - start
+        row = {'model': label, 'backend': backend, 'load_seconds': round(load, 3)}
+        if backend == 'onnx':
+            # Second load reuses the cached export
+            start = time.perf_counter()
+            model = apply_backend(build(), backend, os.path.join(cache_dir, label))
+            row['cached_load_seconds'] = round(time.perf_counter() - start, 3)
+
+        # Warm-up batch, then the timed pass
+        timed_run(model, docs[:batch_size], batch_size, **params)
+        outputs, ms_per_text = timed_run(model, docs, batch_size, **params)
+        row['ms_per_text'] = round(ms_per_text, 2)
+        if baseline is None:
+            baseline = outputs
+        row.update(compare(baseline, outputs))
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=64, help='documents per model')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--hidden', type=int, default=384, help='hidden size of the stand-in models')
+    parser.add_argument('--layers', type=int, default=4, help='classifier layers (the summarizer gets half)')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    tokenizer = build_tokenizer()
+    # Same lengths the apps send: 1000 characters to the summarizer, 512 to the classifier
+    docs = documents(args.docs, 1000)
+    try:
+        import optimum.onnxruntime  # noqa: F401
+        summarizer_backends = ('pytorch', 'int8', 'onnx')
+    except ImportError:
+        summarizer_backends = ('pytorch', 'int8')
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        rows = run_backends(
+            'classifier', lambda: build_classifier(tokenizer, hidden_size=args.hidden, layers=args.layers),
+            ('pytorch', 'int8', 'onnx'), [doc[:512] for doc in docs], args.batch_size, compare_classifier,
+            cache_dir
+        )
+        rows += run_backends(
+            'summarizer', lambda: build_summarizer(tokenizer, d_model=args.hidden, layers=max(1, args.layers // 2)),
+            summarizer_backends, docs, args.batch_size, compare_summaries, cache_dir,
+            max_length=60, min_length=20, do_sample=False
+        )
+
+    print(f"⚖️  Inference backends ({args.docs} docs, batch {args.batch_size}, "
+          f"hidden {args.hidden}, {torch.get_num_threads()} threads)")
+    print("=" * 80)
+    print(f"{'model':<12}{'backend':<9}{'load':>8}{'cached':>8}{'ms/text':>10}{'speedup':>9}"
+          f"{'agreement':>11}  drift")
+    for row in rows:
+        baseline = next(r for r in rows if r['model'] == row['model'])
+        cached = f"{row['cached_load_seconds']:.2f}s" if 'cached_load_seconds' in row else '-'
+        drift = (f"score Δ {row['mean_score_diff']:.4f}" if 'mean_score_diff' in row
+                 else f"token sim {row['token_similarity']:.3f}")
+        print(f"{row['model']:<12}{row['backend']:<9}{row['load_seconds']:>7.2f}s{cached:>8}"
+              f"{row['ms_per_text']:>10.2f}{baseline['ms_per_text'] / row['ms_per_text']:>8.2f}x"
+              f"{row['agreement']:>10.1%}  {drift}")
+    if 'onnx' not in summarizer_backends:
+        print("(onnx summarizer skipped: pip install \"optimum[onnxruntime]\")")
+    print("=" * 80)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'docs': args.docs, 'batch_size': args.batch_size, 'hidden': args.hidden,
+                       'layers': args.layers, 'results': rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
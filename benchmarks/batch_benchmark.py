@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Batch scraping benchmark against local aiohttp stub servers
+
+Starts a few aiohttp servers on localhost (one per simulated host) that serve
+corpus pages after an artificial delay, streams a /api/scrape/batch job over
+them through the Flask test client and compares the wall time with scraping a
+sample of the same URLs one by one through Crawl4AIScraper.
+
+Usage: python benchmarks/batch_benchmark.py [--urls N] [--hosts N] [--latency MS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from crawl4ai_app import Crawl4AIScraper, app
+from extraction_benchmark import load_corpus
+
+
+def start_stub_servers(hosts, latency):
+    """Serve the corpus pages from `hosts` aiohttp servers; returns their base URLs"""
+    pages = list(load_corpus().values())
+    ports = []
+    ready = threading.Event()
+
+    async def handle(request):
+        await asyncio.sleep(latency)
+        index = int(request.match_info['index'])
+        if index % 97 == 96:
+            # Sprinkle in failures so the error path is exercised
+            raise web.HTTPNotFound()
+        return web.Response(body=pages[index % len(pages)], content_type='text/html', charset='utf-8')
+
+    async def serve():
+        for _ in range(hosts):
+            stub = web.Application()
+            stub.router.add_get('/page/{index}', handle)
+            runner = web.AppRunner(stub)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            ports.append(site._server.sockets[0].getsockname()[1])
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return [f'http://127.0.0.1:{port}' for port in ports]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--urls', type=int, default=500, help='URLs in the batch')
+    parser.add_argument('--hosts', type=int, default=5, help='number of stub hosts')
+    parser.add_argument('--latency', type=float, default=100, help='stub response delay in ms')
+    parser.add_argument('--sequential-sample', type=int, default=20, help='URLs scraped one by one for comparison')
+    args = parser.parse_args()
+
+    bases = start_stub_servers(args.hosts, args.latency / 1000)
+    urls = [f'{bases[i % len(bases)]}/page/{i}' for i in range(args.urls)]
+
+    print("🚀 Batch scraping benchmark")
+    print("=" * 50)
+    print(f"{args.urls} URLs across {args.hosts} hosts, {args.latency:g} ms per response")
+
+    # Sequential baseline on a sample, extrapolated to the full batch
+    scraper = Crawl4AIScraper()
+    start = time.perf_counter()
+    for url in urls[:args.sequential_sample]:
+        scraper.scrape_with_requests(url)
+    per_url = (time.perf_counter() - start) / args.sequential_sample
+
+    client = app.test_client()
+    start = time.perf_counter()
+    first_result = None
+    summary = None
+    succeeded = failed = 0
+    response = client.post('/api/scrape/batch', json={'urls': urls}, buffered=False)
+    for line in response.response:
+        record = json.loads(line)
+        if first_result is None:
+            first_result = time.perf_counter() - start
+        if record.get('done'):
+            summary = record
+        elif record.get('success'):
+            succeeded += 1
+        else:
+            failed += 1
+    total = time.perf_counter() - start
+
+    print(f"\n📡 Sequential (extrapolated): {per_url * args.urls:8.2f}s")
+    print(f"⚡ Batch endpoint:            {total:8.2f}s  ({args.urls / total:.0f} pages/s)")
+    print(f"   First result after:       {first_result * 1000:8.0f}ms")
+    print(f"   Succeeded / failed:        {succeeded} / {failed}")
+    print(f"   Summary line:              {summary}")
+
+
+if __name__ == '__main__':
+    main()
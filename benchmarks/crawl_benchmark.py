@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Crawler throughput against a local synthetic site
+
+Starts an aiohttp server with --pages interlinked pages (each links to
+--links others, spelled with dot segments, fragments, tracking parameters or
+as absolute URLs so the URL normalizer has duplicates to collapse), a
+robots.txt that disallows /private/, and an artificial per-request latency.
+Crawls it through /api/crawl with the Flask test client at several
+concurrency levels and reports pages/sec.
+
+Usage: python benchmarks/crawl_benchmark.py [--pages N] [--links N] [--latency MS]
+                                            [--concurrency 1,8,32]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+import crawl4ai_app
+from crawler import BloomFilter, UrlSet, normalize_url
+
+
+def build_site(pages, links, seed=0):
+    """HTML for every page of the synthetic site"""
+    rng = random.Random(seed)
+    site = {}
+    for i in range(pages):
+        anchors = []
+        for _ in range(links):
+            target = rng.randrange(pages)
+            # Same page, spelled several ways
+            href = rng.choice([
+                f'/page/{target}',
+                f'/section/../page/{target}#top',
+                f'/page/{target}?utm_source=bench',
+                f'http://LOCALHOST-HOST/page/{target}'
+            ])
+            anchors.append(f'<li><a href="{href}">Page {target}</a></li>')
+        anchors.append('<li><a href="/private/admin">Admin</a></li>')
+        site[i] = (
+            f'<html><head><title>Page {i}</title><meta name="description" content="Synthetic page {i}"></head>'
+            f'<body><nav><a href="/">Home</a></nav><h1>Page {i}</h1>'
+            f'<p>Synthetic page number {i} for the crawler benchmark, with some body text.</p>'
+            f'<ul>{"".join(anchors)}</ul><footer>Footer text</footer></body></html>'
+        )
+    return site
+
+
+def start_site(pages, links, latency):
+    """Serve the synthetic site; returns (base URL, request counters)"""
+    site = build_site(pages, links)
+    counters = {'pages': 0, 'robots': 0, 'private': 0}
+    ready = threading.Event()
+    base = {}
+
+    async def page(request):
+        await asyncio.sleep(latency)
+        counters['pages'] += 1
+        html = site[int(request.match_info['index'])].replace('LOCALHOST-HOST', base['host'])
+        return web.Response(text=html, content_type='text/html')
+
+    async def home(request):
+        raise web.HTTPFound('/page/0')
+
+    async def robots(request):
+        counters['robots'] += 1
+        return web.Response(text='User-agent: *\nDisallow: /private/\n')
+
+    async def private(request):
+        counters['private'] += 1
+        return web.Response(text='<html><body>secret</body></html>', content_type='text/html')
+
+    async def serve():
+        server = web.Application()
+        server.router.add_get('/', home)
+        server.router.add_get('/robots.txt', robots)
+        server.router.add_get('/page/{index}', page)
+        server.router.add_get('/private/{name}', private)
+        runner = web.AppRunner(server)
+        await runner.setup()
+        site_runner = web.TCPSite(runner, '127.0.0.1', 0)
+        await site_runner.start()
+        base['host'] = f"127.0.0.1:{site_runner._server.sockets[0].getsockname()[1]}"
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return f"http://{base['host']}", counters
+
+
+def seen_set_benchmark(count):
+    """Insert count normalized URLs into both seen-set types"""
+    urls = [normalize_url(f'http://example.com/page/{i}?b=2&a=1#frag') for i in range(count)]
+    for name, seen in (('set', UrlSet()), ('bloom', BloomFilter(count))):
+        start = time.perf_counter()
+        added = sum(seen.add(url) for url in urls)
+        elapsed = time.perf_counter() - start
+        memory = len(seen.bits) if isinstance(seen, BloomFilter) else sum(sys.getsizeof(url) for url in urls)
+        print(f"  {name:<6} {count / elapsed:>12,.0f} adds/s  {added:>8} unique  ~{memory / 1024 / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--links', type=int, default=10, help='links per page')
+    parser.add_argument('--latency', type=float, default=20, help='server latency per page (ms)')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated concurrency levels')
+    args = parser.parse_args()
+
+    base_url, counters = start_site(args.pages, args.links, args.latency / 1000)
+    client = crawl4ai_app.app.test_client()
+
+    print(f"🕸️  Crawl benchmark ({args.pages} pages, {args.links} links/page, {args.latency:g}ms latency)")
+    print("=" * 70)
+    print(f"{'concurrency':<14}{'crawled':>9}{'seen':>8}{'robots':>8}{'seconds':>10}{'pages/s':>10}")
+    for concurrency in [int(n) for n in args.concurrency.split(',')]:
+        # Lift the endpoint's caps: no politeness delay against our own server,
+        # per-host limit = concurrency
+        crawl4ai_app.CRAWL_HOST_DELAY = 0.0
+        crawl4ai_app.CRAWL_PER_HOST = concurrency
+        crawl4ai_app.CRAWL_CONCURRENCY = max(crawl4ai_app.CRAWL_CONCURRENCY, concurrency)
+        crawl4ai_app.CRAWL_MAX_PAGES = max(crawl4ai_app.CRAWL_MAX_PAGES, args.pages)
+        crawl4ai_app.CRAWL_MAX_DEPTH = max(crawl4ai_app.CRAWL_MAX_DEPTH, 50)
+        for key in counters:
+            counters[key] = 0
+
+        response = client.post('/api/crawl', json={
+            'url': f'{base_url}/', 'max_pages': args.pages, 'max_depth': 50,
+            'concurrency': concurrency, 'per_host': concurrency, 'delay': 0
+        })
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        summary = lines[-1]
+        if not summary.get('done'):
+            raise RuntimeError(summary)
+        print(f"{concurrency:<14}{summary['crawled']:>9}{summary['seen']:>8}{summary['robots_blocked']:>8}"
+              f"{summary['elapsed']:>10.2f}{summary['crawled'] / summary['elapsed']:>10.1f}")
+        if counters['private']:
+            raise RuntimeError('robots.txt was not respected')
+
+    print("-" * 70)
+    print("Seen-set inserts (1M URLs):")
+    seen_set_benchmark(1000000)
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
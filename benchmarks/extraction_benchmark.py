@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Extraction benchmark: multi-pass extract_* methods vs the single-pass PageExtractor
+
+Runs both paths over every page in benchmarks/corpus plus a synthetic
+multi-megabyte product listing, checks that they produce identical output and
+reports the extraction time (parsing excluded) for each.
+
+Usage: python benchmarks/extraction_benchmark.py [--repeat N] [--large-mb MB]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from crawl4ai_app import Crawl4AIScraper
+from extractor import PageExtractor
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+BASE_URL = 'https://shop.summit.example/p/listing'
+
+
+def load_corpus():
+    """Load the saved pages from the corpus directory"""
+    pages = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(CORPUS_DIR, name), 'rb') as f:
+                pages[name] = f.read()
+    return pages
+
+
+def build_large_page(target_mb):
+    """Build a product listing page of roughly target_mb megabytes"""
+    card = (
+        '<div class="card"><h3 class="name">Product {i}</h3>'
+        '<a href="/p/{i}" title="Product {i}"><img src="/img/{i}.jpg" alt="Product {i}" width="200"></a>'
+        '<p class="blurb">Hand-finished item number {i} with free delivery and a two year warranty.</p>'
+        '<ul class="tags"><li>tag-{i}</li><li>sale</li></ul>'
+        '<table class="spec"><tr><th>SKU</th><td>SKU-{i}</td></tr><tr><th>Stock</th><td>{i}</td></tr></table>'
+        '<a href="https://twitter.com/share?p={i}">Share</a></div>\n'
+    )
+    parts = ['<html><head><title>Catalogue</title></head><body><nav><a href="/">Home</a></nav>']
+    size = 0
+    i = 0
+    while size < target_mb * 1024 * 1024:
+        chunk = card.format(i=i)
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    parts.append('<footer>Catalogue footer <a href="/help">Help</a></footer></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def multi_pass(scraper, soup, url):
+    """The original extraction sequence from Crawl4AIScraper.scrape_with_requests"""
+    for script in soup(["script", "style", "noscript"]):
+        script.decompose()
+    return {
+        'metadata': scraper.extract_metadata(soup, url),
+        'content_blocks': scraper.extract_content_blocks(soup),
+        'media': scraper.extract_media(soup, url),
+        'links': scraper.extract_links(soup, url),
+        'text': soup.get_text()
+    }
+
+
+def time_path(func, html, repeat):
+    """Return (best seconds, last result) for func over freshly parsed soups"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        soup = BeautifulSoup(html, 'html.parser')
+        start = time.perf_counter()
+        result = func(soup)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per page (best is reported)')
+    parser.add_argument('--large-mb', type=float, default=3, help='size of the synthetic page, 0 to skip')
+    args = parser.parse_args()
+
+    scraper = Crawl4AIScraper()
+    extractor = PageExtractor()
+
+    pages = load_corpus()
+    if args.large_mb > 0:
+        pages[f'synthetic-{args.large_mb:g}mb'] = build_large_page(args.large_mb)
+
+    print("📊 Extraction benchmark (parse time excluded)")
+    print("=" * 72)
+    print(f"{'page':<24}{'size':>10}{'multi-pass':>14}{'single-pass':>14}{'speedup':>10}")
+
+    mismatches = []
+    for name, html in pages.items():
+        old_time, old_result = time_path(lambda soup: multi_pass(scraper, soup, BASE_URL), html, args.repeat)
+        new_time, new_result = time_path(lambda soup: extractor.extract(soup, BASE_URL), html, args.repeat)
+        # get_text() has no block split, and the multi-pass path no main-content detection, to compare with
+        del new_result['text_blocks']
+        new_result.pop('main_content', None)
+
+        if old_result != new_result:
+            mismatches.append(name)
+
+        print(f"{name:<24}{len(html) / 1024:>8.0f}KB{old_time * 1000:>12.1f}ms"
+              f"{new_time * 1000:>12.1f}ms{old_time / new_time:>9.1f}x")
+
+    print("=" * 72)
+    if mismatches:
+        print(f"❌ Output differs for: {', '.join(mismatches)}")
+        sys.exit(1)
+    print("✅ Single-pass output matches the multi-pass extract_* methods on every page")
+
+
+if __name__ == '__main__':
+    main()
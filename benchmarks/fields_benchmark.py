@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Per-field extraction cost and payload size for the /api/scrape fields projection
+
+Builds the scrape result with Crawl4AIScraper.build_page for every field on
+its own, the common projections (metadata + text, links) and all fields,
+over the saved-page corpus and a synthetic product listing. For each it
+reports milliseconds per page, the cost on top of a bare parse (a walk with
+no handlers and no text collection) and the size of the JSON payload.
+Every projection is checked against the same sections of the full result.
+
+Usage: python benchmarks/fields_benchmark.py [--parser lxml] [--repeat N] [--large-mb MB]
+                                             [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl4ai_app import Crawl4AIScraper
+from extraction_benchmark import BASE_URL, build_large_page, load_corpus
+from extractor import FIELD_HANDLERS, PageExtractor, resolve_fields
+from http_cache import HttpCache
+from parsers import extract_page
+
+PROJECTIONS = [[field] for field in FIELD_HANDLERS] + [['metadata', 'text'], ['content_blocks'], None]
+
+
+def matches(page, full):
+    """Whether every section in a projected result equals the same part of the full result"""
+    for key, value in page.items():
+        expected = full[key]
+        if key == 'content_blocks':
+            expected = {block: expected[block] for block in value}
+        if value != expected:
+            return False
+    return True
+
+
+def timed(func, repeat):
+    """(last result, milliseconds per call)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parser', default='lxml', help='parser backend to extract with')
+    parser.add_argument('--repeat', type=int, default=200, help='passes over each small page')
+    parser.add_argument('--large-mb', type=float, default=2, help='size of the synthetic page, 0 to skip')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    pages = dict(load_corpus())
+    if args.large_mb > 0:
+        pages['listing'] = build_large_page(args.large_mb)
+    scraper = Crawl4AIScraper(cache=HttpCache(enabled=False))
+    bare = PageExtractor([], keep_text=False)
+
+    def build(html, fields):
+        return scraper.build_page(BASE_URL, html, 200, 'text/html', 'utf-8', args.parser, fields)
+
+    print(f"🎯 Per-field extraction cost ({args.parser})")
+    results = []
+    for name, html in pages.items():
+        repeat = max(1, args.repeat // 100) if name == 'listing' else args.repeat
+        full = build(html, None)
+        _, floor = timed(lambda: extract_page(html, BASE_URL, bare, args.parser), repeat)
+
+        print("=" * 76)
+        print(f"{name} ({len(html) / 1024:.0f} KB), bare parse {floor:.2f} ms")
+        print(f"{'fields':<28}{'ms/page':>10}{'over parse':>12}{'payload':>12}{'of full':>9}")
+        full_size = len(json.dumps(full))
+        for projection in PROJECTIONS:
+            fields = resolve_fields(projection) if projection else None
+            page, ms = timed(lambda: build(html, fields), repeat)
+            if not matches(page, full):
+                raise RuntimeError(f'{name}: {projection} differs from the full result')
+            size = len(json.dumps(page))
+            label = '+'.join(projection) if projection else 'all (default)'
+            results.append({'page': name, 'fields': label, 'ms_per_page': round(ms, 3),
+                            'ms_over_parse': round(ms - floor, 3), 'payload_bytes': size})
+            print(f"{label:<28}{ms:>10.2f}{ms - floor:>12.2f}{size / 1024:>10.1f}KB{size / full_size:>9.0%}")
+    print("=" * 76)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'parser': args.parser, 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
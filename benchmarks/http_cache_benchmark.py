@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+HTTP response cache benchmark against a local server that emits validators
+
+Serves --pages synthetic listing pages with ETag and Last-Modified headers
+and answers conditional requests with 304. A monitoring-style job then scrapes
+every page --rounds times through Crawl4AIScraper.scrape_with_requests:
+
+- without the cache (every round downloads and parses every page)
+- with the cache and Cache-Control: no-cache (every round revalidates; 304s
+  reuse the stored body and the parsed result)
+- with the cache and Cache-Control: max-age=300 (later rounds never leave
+  the process)
+
+and reports bytes sent by the server, 304s and the time per scrape in the
+first round and in the repeat rounds.
+
+Usage: python benchmarks/http_cache_benchmark.py [--pages N] [--rounds N] [--page-kb KB]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl4ai_app import Crawl4AIScraper
+from extraction_benchmark import build_large_page
+from http_cache import HttpCache
+from http_pool import ConnectionPool
+
+
+def start_validator_server(pages, page_kb):
+    """Serve /page/<i> with ETag + Last-Modified; returns (base URL, counters, settings)"""
+    body = build_large_page(page_kb / 1024)
+    bodies = [body.replace(b'Catalogue', f'Catalogue {i}'.encode()) for i in range(pages)]
+    etags = [f'"{hashlib.md5(b).hexdigest()}"' for b in bodies]
+    last_modified = formatdate(time.time() - 86400, usegmt=True)
+    counters = {'requests': 0, 'not_modified': 0, 'bytes': 0}
+    settings = {'cache_control': 'no-cache'}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            index = int(self.path.rsplit('/', 1)[-1])
+            not_modified = self.headers.get('If-None-Match') == etags[index]
+            with lock:
+                counters['requests'] += 1
+                counters['not_modified'] += not_modified
+                counters['bytes'] += 0 if not_modified else len(bodies[index])
+
+            self.send_response(304 if not_modified else 200)
+            self.send_header('ETag', etags[index])
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Cache-Control', settings['cache_control'])
+            if not_modified:
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(bodies[index])))
+            self.end_headers()
+            self.wfile.write(bodies[index])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}', counters, settings
+
+
+def run_job(scraper, base_url, pages, rounds):
+    """Scrape every page rounds times; returns (first round seconds, later rounds seconds, cache statuses)"""
+    statuses = {}
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in range(pages):
+            page = scraper.scrape_with_requests(f'{base_url}/page/{i}')
+            if 'error' in page:
+                raise RuntimeError(page['error'])
+            statuses[page['cache']] = statuses.get(page['cache'], 0) + 1
+        timings.append(time.perf_counter() - start)
+    return timings[0], sum(timings[1:]), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--page-kb', type=int, default=256, help='size of each page')
+    args = parser.parse_args()
+
+    base_url, counters, settings = start_validator_server(args.pages, args.page_kb)
+    pool = ConnectionPool(http2=False)
+    repeats = args.pages * max(args.rounds - 1, 1)
+
+    print(f"🗄️  HTTP cache benchmark ({args.pages} pages x {args.rounds} rounds, {args.page_kb} KB pages)")
+    print("=" * 84)
+    print(f"{'mode':<22}{'first ms':>10}{'repeat ms':>11}{'MB sent':>9}{'304s':>6}  cache statuses")
+
+    with tempfile.TemporaryDirectory() as directory:
+        modes = [
+            ('no cache', HttpCache(enabled=False), 'no-cache'),
+            ('cache, no-cache', HttpCache(os.path.join(directory, 'revalidate')), 'no-cache'),
+            ('cache, max-age=300', HttpCache(os.path.join(directory, 'fresh')), 'max-age=300')
+        ]
+        for name, cache, cache_control in modes:
+            settings['cache_control'] = cache_control
+            for key in counters:
+                counters[key] = 0
+            first, repeat, statuses = run_job(Crawl4AIScraper(pool=pool, cache=cache), base_url,
+                                              args.pages, args.rounds)
+            print(f"{name:<22}{first / args.pages * 1000:>10.2f}{repeat / repeats * 1000:>11.2f}"
+                  f"{counters['bytes'] / 1024 / 1024:>9.1f}{counters['not_modified']:>6}  {statuses}")
+
+    print("=" * 84)
+    pool.close()
+
+
+if __name__ == '__main__':
+    main()
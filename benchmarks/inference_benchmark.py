@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Summarization throughput and latency at 1, 8 and 32 concurrent clients
+
+Uses the tiny stand-in models from tiny_models.py so it runs offline in
+seconds. Each client thread sends --requests summaries of corpus paragraphs
+of varying length, either:
+
+- inline: calling the summarizer directly in the client thread (the old
+  structure_content_with_llm path), or
+- batched: through InferenceServer, which micro-batches the requests on one
+  worker thread
+
+Usage: python benchmarks/inference_benchmark.py [--clients 1,8,32] [--requests N]
+                                                [--max-batch-size N] [--max-wait-ms MS]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import InferenceServer
+from tiny_models import build_classifier, build_summarizer, build_tokenizer, corpus_texts
+
+GENERATION = {'max_length': 40, 'min_length': 10, 'do_sample': False}
+
+
+def make_documents(count, seed=0):
+    """Texts of 1-8 corpus paragraphs, so padding matters"""
+    paragraphs = corpus_texts()
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(paragraphs) for _ in range(rng.randint(1, 8))) for _ in range(count)]
+
+
+def run_clients(call, documents, clients, per_client):
+    """Run clients threads of per_client calls each; returns (latencies ms, wall seconds)"""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def client(offset):
+        barrier.wait()
+        for i in range(per_client):
+            text = documents[(offset * per_client + i) % len(documents)]
+            start = time.perf_counter()
+            call(text)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+def report(name, latencies, wall):
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(f"{name:<24}{len(latencies) / wall:>10.1f}{statistics.median(latencies):>10.1f}ms{p95:>10.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', default='1,8,32', help='comma-separated client counts')
+    parser.add_argument('--requests', type=int, default=8, help='requests per client')
+    parser.add_argument('--max-batch-size', type=int, default=8)
+    parser.add_argument('--max-wait-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    tokenizer = build_tokenizer()
+    summarizer = build_summarizer(tokenizer)
+    classifier = build_classifier(tokenizer)
+    documents = make_documents(256)
+
+    print(f"🧠 Inference batching benchmark ({summarizer.name}, batch<={args.max_batch_size}, "
+          f"wait<={args.max_wait_ms:g}ms)")
+    print("=" * 56)
+    print(f"{'clients / path':<24}{'req/s':>10}{'p50':>12}{'p95':>12}")
+
+    for clients in [int(n) for n in args.clients.split(',')]:
+        latencies, wall = run_clients(lambda text: summarizer(text, **GENERATION), documents, clients, args.requests)
+        report(f"{clients:>3} inline", latencies, wall)
+
+        server = InferenceServer(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+        server.register('summarizer', summarizer)
+        latencies, wall = run_clients(lambda text: server.run('summarizer', text, **GENERATION),
+                                      documents, clients, args.requests)
+        report(f"{clients:>3} batched", latencies, wall)
+        print(f"    avg batch size {server.stats()['summarizer']['avg_batch_size']}")
+        server.close()
+
+    # Classifier goes through the real text-classification pipeline
+    print("-" * 56)
+    clients = max(int(n) for n in args.clients.split(','))
+    latencies, wall = run_clients(lambda text: classifier(text[:512]), documents, clients, args.requests)
+    report(f"{clients:>3} classifier inline", latencies, wall)
+    server = InferenceServer(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    server.register('classifier', classifier)
+    latencies, wall = run_clients(lambda text: server.run('classifier', text[:512]), documents, clients, args.requests)
+    report(f"{clients:>3} classifier batched", latencies, wall)
+    server.close()
+    print("=" * 56)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Link extraction on a synthetic 50k-anchor page: per-anchor urljoin/urlparse vs links.py
+
+Builds a page of --links anchors: repeated relative navigation and
+pagination hrefs, unique item links, external links, social links on
+assorted hosts (m.facebook.com, youtu.be, x.com, ...) and external links
+that only mention a social network in their query string. It extracts the
+links with lxml through:
+
+- legacy   the previous LinkHandler: urljoin and urlparse per anchor, and a
+           substring scan of the URL for every social pattern
+- links    LinkHandler on links.py: cached urljoin, cached URL
+           classification, host-suffix platform lookup, one entry per URL
+           with a count (URL caches cleared before every run)
+- warm     the same with the URL caches already filled, as for the next
+           page of the same site
+
+each with the 5 built-in social networks and with --domains of them, and
+reports the time over a bare parse and the entries produced. It checks that
+both keep the same URLs and that the counts add up to the anchors.
+
+Usage: python benchmarks/links_benchmark.py [--links 50000] [--domains 300] [--repeat N] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urljoin, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import links
+from extractor import ElementHandler, LinkHandler, PageExtractor
+from parsers import extract_page
+
+BASE_URL = 'https://shop.summit.example/catalogue/page/1'
+SOCIAL_HOSTS = ['www.facebook.com', 'm.facebook.com', 'twitter.com', 'x.com', 'www.instagram.com',
+                'www.linkedin.com', 'www.youtube.com', 'youtu.be']
+BUILTIN_PATTERNS = ['facebook', 'twitter', 'instagram', 'linkedin', 'youtube']
+
+
+class LegacyLinkHandler(ElementHandler):
+    """LinkHandler as it was: urljoin + urlparse per anchor, substring scan for social patterns"""
+
+    tags = ('a',)
+    text_tags = tags
+    patterns = BUILTIN_PATTERNS
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.base_netloc = urlparse(run.url).netloc
+
+    def start(self, name, attrs):
+        href = attrs.get('href')
+        if not href or href.startswith('#'):
+            return None
+
+        links_section = self.sections['links']
+        full_url = urljoin(self.run.url, href)
+        link = {'url': full_url, 'text': '', 'title': attrs.get('title', '')}
+        if urlparse(full_url).netloc == self.base_netloc:
+            links_section['internal'].append(link)
+        else:
+            links_section['external'].append(link)
+        entries = [link]
+
+        lowered = full_url.lower()
+        platform = next((p for p in self.patterns if p in lowered), None)
+        if platform:
+            social = {'url': full_url, 'text': '', 'platform': platform}
+            links_section['social'].append(social)
+            entries.append(social)
+        return entries
+
+    def end(self, name, token, text):
+        if token:
+            text = text.strip()
+            for entry in token:
+                entry['text'] = text
+
+
+def build_link_page(count, seed=0):
+    """HTML with count anchors of the mix described above"""
+    rng = random.Random(seed)
+    anchors = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            href = rng.choice([f'/catalogue/page/{rng.randrange(200)}', f'../category/{rng.randrange(100)}',
+                               f'?page={rng.randrange(200)}', f'/tag/{rng.randrange(500)}#top'])
+        elif kind < 0.6:
+            href = f'/item/{i}'
+        elif kind < 0.85:
+            href = f'https://partner{rng.randrange(50)}.example.org/offer/{rng.randrange(5000)}'
+        elif kind < 0.95:
+            href = f'https://{rng.choice(SOCIAL_HOSTS)}/summitshop/{rng.randrange(300)}'
+        else:
+            href = f'https://news.example.net/story/{rng.randrange(2000)}?via=twitter'
+        anchors.append(f'<li><a href="{href}" title="Link {i % 97}">Link text {i % 1000}</a></li>')
+    return ('<html><head><title>Links</title></head><body><ul>' + ''.join(anchors) + '</ul></body></html>').encode()
+
+
+def extra_domains(count):
+    """count made-up social networks: (substring patterns, host -> platform)"""
+    names = [f'network{i}' for i in range(count)]
+    return names, {f'{name}.example': name for name in names}
+
+
+def timed(func, repeat, before=None):
+    """(last result, best milliseconds of repeat calls); before() runs untimed ahead of each call"""
+    best = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+
+def clear_url_caches():
+    links.join_url.cache_clear()
+    links.classify_url.cache_clear()
+
+
+def check(legacy, new, name):
+    """Same URLs, and counts that add up to the anchors the legacy handler listed"""
+    for category in ('internal', 'external'):
+        legacy_urls = [link['url'] for link in legacy[category]]
+        if set(legacy_urls) != {link['url'] for link in new[category]}:
+            raise RuntimeError(f'{name}: {category} URLs differ')
+        if len(legacy_urls) != sum(link['count'] for link in new[category]):
+            raise RuntimeError(f'{name}: {category} counts do not add up')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--links', type=int, default=50000, help='anchors on the page')
+    parser.add_argument('--domains', type=int, default=300, help='size of the grown social-network list')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per variant (best is reported)')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    html = build_link_page(args.links)
+    legacy_extractor = PageExtractor([LegacyLinkHandler], keep_text=False)
+    new_extractor = PageExtractor([LinkHandler], keep_text=False)
+    bare = PageExtractor([], keep_text=False)
+    _, floor = timed(lambda: extract_page(html, BASE_URL, bare, 'lxml'), args.repeat)
+
+    print(f"🔗 Link extraction ({args.links:,} anchors, {len(html) / 1024 / 1024:.1f} MB, lxml), "
+          f"bare parse {floor:.1f} ms")
+    print("=" * 84)
+    print(f"{'networks':<10}{'variant':<9}{'ms':>10}{'over parse':>12}{'internal':>10}{'external':>10}"
+          f"{'social':>9}{'speedup':>10}")
+    results = []
+    for networks in (len(BUILTIN_PATTERNS), len(BUILTIN_PATTERNS) + args.domains):
+        patterns, domains = extra_domains(networks - len(BUILTIN_PATTERNS))
+        LegacyLinkHandler.patterns = BUILTIN_PATTERNS + patterns
+        # platform_for_host reads this dict; restored below
+        links.SOCIAL_DOMAINS.update(domains)
+        clear_url_caches()
+
+        legacy, legacy_ms = timed(lambda: extract_page(html, BASE_URL, legacy_extractor, 'lxml'), args.repeat)
+        new, new_ms = timed(lambda: extract_page(html, BASE_URL, new_extractor, 'lxml'), args.repeat,
+                            before=clear_url_caches)
+        _, warm_ms = timed(lambda: extract_page(html, BASE_URL, new_extractor, 'lxml'), args.repeat)
+        check(legacy['links'], new['links'], f'{networks} networks')
+
+        legacy_over = legacy_ms - floor
+        for variant, page, ms in (('legacy', legacy, legacy_ms), ('links', new, new_ms), ('warm', new, warm_ms)):
+            section = page['links']
+            over = ms - floor
+            results.append({'networks': networks, 'variant': variant, 'ms': round(ms, 2),
+                            'ms_over_parse': round(over, 2), 'internal': len(section['internal']),
+                            'external': len(section['external']), 'social': len(section['social'])})
+            print(f"{networks:<10}{variant:<9}{ms:>10.1f}{over:>12.1f}{len(section['internal']):>10,}"
+                  f"{len(section['external']):>10,}{len(section['social']):>9,}{legacy_over / over:>9.1f}x")
+
+        for host in domains:
+            del links.SOCIAL_DOMAINS[host]
+    print("=" * 84)
+    print("Legacy lists every anchor and counts '?via=twitter' links as social; links.py lists each URL "
+          "once with a count and matches social networks by host.")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'links': args.links, 'parse_ms': round(floor, 2), 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Main-content detection: extraction precision and recall, parse overhead and summarization latency
+
+Runs on the labelled corpus in benchmarks/corpus/main-content-v1: pages laid
+out the ways real sites are (semantic news, classed-div blog, table layout,
+docs with a long sidebar, product, front-page listing, no class hints at all,
+a short article under a mega menu, boilerplate nested inside the article, an
+article split over sibling divs, a forum thread, a short article under long
+comments). Each page has a .gold.txt with its main content, one block per
+line, and MANIFEST.json pins the checksums. It reports:
+
+- precision    word-level precision, recall and F1 against the gold text of
+               what the summarizer is given: the first 1000 characters (the
+               original input), the whole page text, and the main content
+- overhead     extraction time with and without MainContentHandler (runs
+               interleaved), on this corpus and the pipeline corpus
+- summarize    summarize_document with the tiny stand-in BART (tiny_models.py)
+               on the page text and on the main content: tokens, model calls
+               and latency
+
+Usage: python benchmarks/main_content_benchmark.py [--parser lxml] [--repeat N] [--skip-summarize]
+                                                   [--output results.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractor import DEFAULT_HANDLERS, MainContentHandler, PageExtractor
+from parsers import extract_page
+from pipeline_benchmark import load_versioned_corpus
+from textnorm import normalize_blocks
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus', 'main-content-v1')
+WORD_RE = re.compile(r'\w+')
+
+
+def load_labelled_corpus():
+    """(manifest, {name: (html bytes, gold text)}); fails if a page no longer matches its checksum"""
+    with open(os.path.join(CORPUS_DIR, 'MANIFEST.json')) as f:
+        manifest = json.load(f)
+    pages = {}
+    for name, entry in manifest['pages'].items():
+        with open(os.path.join(CORPUS_DIR, entry['file']), 'rb') as f:
+            content = f.read()
+        if hashlib.sha256(content).hexdigest() != entry['sha256']:
+            raise RuntimeError(f"{entry['file']} does not match MANIFEST.json; bump the corpus version "
+                               f"instead of editing pages in place")
+        with open(os.path.join(CORPUS_DIR, entry['gold']), encoding='utf-8') as f:
+            pages[name] = (content, f.read())
+    return manifest, pages
+
+
+def words(text):
+    return Counter(WORD_RE.findall(text.lower()))
+
+
+def score(extracted, gold):
+    """Word-level (precision, recall, F1) of extracted text against the gold text"""
+    found, expected = words(extracted), words(gold)
+    overlap = sum((found & expected).values())
+    precision = overlap / sum(found.values()) if found else 0.0
+    recall = overlap / sum(expected.values()) if expected else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def inputs(html, parser):
+    """The texts the summarizer could be given for a page, and the container main content came from"""
+    page = extract_page(html, 'https://corpus.example/', PageExtractor(DEFAULT_HANDLERS + (MainContentHandler,)), parser)
+    text = normalize_blocks(page['text_blocks'])['text']
+    main = normalize_blocks(page['main_content']['text_blocks'])['text']
+    return {'first 1000': text[:1000], 'page text': text, 'main content': main}, page['main_content']['container']
+
+
+def bench_precision(pages, parser):
+    methods = ('first 1000', 'page text', 'main content')
+    print(f"\n🎯 Word-level precision / recall against the gold main content ({parser})")
+    print("=" * 100)
+    print(f"{'page':<20}" + ''.join(f'{method:>22}' for method in methods) + f"  {'container'}")
+    results = []
+    totals = {method: [] for method in methods}
+    for name, (html, gold) in pages.items():
+        texts, container = inputs(html, parser)
+        row = {'page': name, 'container': container}
+        cells = ''
+        for method in methods:
+            precision, recall, f1 = score(texts[method], gold)
+            row[method] = {'precision': round(precision, 3), 'recall': round(recall, 3), 'f1': round(f1, 3)}
+            totals[method].append((precision, recall, f1))
+            cells += f'{precision:>12.2f} / {recall:<7.2f}'
+        results.append(row)
+        print(f"{name:<20}{cells}  {container or '(whole page)'}")
+    print("-" * 100)
+    means = {}
+    for method in methods:
+        means[method] = {key: round(statistics.mean(values), 3)
+                         for key, values in zip(('precision', 'recall', 'f1'), zip(*totals[method]))}
+    print(f"{'mean':<20}" + ''.join(f"{means[m]['precision']:>12.2f} / {means[m]['recall']:<7.2f}" for m in methods))
+    print(f"{'mean F1':<20}" + ''.join(f"{means[m]['f1']:>22.2f}" for m in methods))
+    return {'pages': results, 'mean': means}
+
+
+def bench_overhead(pages, parser, repeat):
+    without = PageExtractor([handler for handler in DEFAULT_HANDLERS if handler is not MainContentHandler])
+    with_main = PageExtractor(list(without.handler_classes) + [MainContentHandler])
+    print(f"\n⏱️  Extraction time with and without MainContentHandler ({parser}, best of {repeat}, interleaved)")
+    print("=" * 64)
+    print(f"{'page':<20}{'size':>9}{'without':>11}{'with':>11}{'overhead':>11}")
+    results = []
+    for name, html in pages.items():
+        best = {'without': None, 'with': None}
+        for _ in range(repeat):
+            for label, extractor in (('without', without), ('with', with_main)):
+                start = time.perf_counter()
+                extract_page(html, 'https://corpus.example/', extractor, parser)
+                elapsed = time.perf_counter() - start
+                best[label] = elapsed if best[label] is None else min(best[label], elapsed)
+        overhead = best['with'] / best['without'] - 1
+        results.append({'page': name, 'bytes': len(html), 'without_ms': round(best['without'] * 1000, 2),
+                        'with_ms': round(best['with'] * 1000, 2), 'overhead': round(overhead, 3)})
+        print(f"{name:<20}{len(html) / 1024:>7.0f}KB{best['without'] * 1000:>9.1f}ms{best['with'] * 1000:>9.1f}ms"
+              f"{overhead:>10.0%}")
+    return results
+
+
+def bench_summarize(pages, parser, repeat):
+    from inference import InferenceServer
+    from summarize import summarize_document
+    from tiny_models import build_summarizer, build_tokenizer
+
+    tokenizer = build_tokenizer()
+    summarizer = build_summarizer(tokenizer)
+    # No LLM cache: every run pays for its model calls
+    inference = InferenceServer()
+    inference.register('summarizer', summarizer)
+    calls = lambda: inference.stats()['summarizer']['requests']
+
+    print(f"\n📝 Summarization of the page text vs the main content ({summarizer.name}, median of {repeat})")
+    print("=" * 84)
+    print(f"{'page':<20}{'tokens':>9}{'→':>3}{'main':>7}{'calls':>8}{'→':>3}{'main':>6}{'page ms':>11}{'main ms':>10}"
+          f"{'change':>9}")
+    results = []
+    totals = {'page text': 0.0, 'main content': 0.0}
+    for name, (html, _) in pages.items():
+        texts, _ = inputs(html, parser)
+        row = {'page': name}
+        for method in ('page text', 'main content'):
+            samples = []
+            for _ in range(repeat):
+                before = calls()
+                start = time.perf_counter()
+                summary = summarize_document(inference, texts[method], tokenizer=tokenizer, max_length=130,
+                                             min_length=30, do_sample=False)
+                samples.append(time.perf_counter() - start)
+            row[method] = {'tokens': summary['tokens'], 'calls': calls() - before,
+                           'ms': round(statistics.median(samples) * 1000, 1)}
+            totals[method] += statistics.median(samples)
+        results.append(row)
+        page, main = row['page text'], row['main content']
+        print(f"{name:<20}{page['tokens']:>9,}{'':>3}{main['tokens']:>7,}{page['calls']:>8}{'':>3}{main['calls']:>6}"
+              f"{page['ms']:>9.1f}ms{main['ms']:>8.1f}ms{main['ms'] / page['ms'] - 1:>9.0%}")
+    print("-" * 84)
+    change = totals['main content'] / totals['page text'] - 1
+    print(f"{'total':<20}{'':>36}{totals['page text'] * 1000:>9.0f}ms{totals['main content'] * 1000:>8.0f}ms"
+          f"{change:>9.0%}")
+    inference.close()
+    return {'pages': results, 'total_page_ms': round(totals['page text'] * 1000, 1),
+            'total_main_ms': round(totals['main content'] * 1000, 1), 'change': round(change, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parser', default='lxml', help='parser backend to extract with')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per timing')
+    parser.add_argument('--skip-summarize', action='store_true', help='skip the run with the stand-in summarizer')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    manifest, pages = load_labelled_corpus()
+    print(f"📰 Main-content detection on {manifest['version']} ({len(pages)} labelled pages)")
+    results = {'corpus': manifest['version'], 'parser': args.parser,
+               'precision': bench_precision(pages, args.parser)}
+
+    _, pipeline_pages = load_versioned_corpus()
+    timed_pages = {name: html for name, (html, _) in pages.items()}
+    timed_pages.update(pipeline_pages)
+    results['overhead'] = bench_overhead(timed_pages, args.parser, args.repeat)
+
+    if not args.skip_summarize:
+        results['summarize'] = bench_summarize(pages, args.parser, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection: SimHash speed, detection quality, index scale and LLM calls saved
+
+Works on the clean text of the pipeline corpus pages and reports:
+
+- fingerprint  simhash() time per page, with numpy and with the pure-Python
+               fallback (when numpy is installed), checking both agree
+- detection    Hamming distance from every page to its pagination, tag-page
+               and printer-view variants, and between unrelated pages
+- index        --size random fingerprints inserted into a NearDuplicateIndex:
+               insert rate, traced memory, and lookup p50/p99 for misses and
+               for copies with up to NEAR_DUP_DISTANCE bits flipped (recall)
+- pipeline     structure_content_with_llm with the tiny stand-in models over
+               the pages and their variants, with the index off and in reuse
+               mode: summarizer calls and total time
+
+Usage: python benchmarks/near_duplicate_benchmark.py [--size 1000000] [--lookups 10000]
+                                                     [--skip-pipeline] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import near_duplicates
+from near_duplicates import NearDuplicateIndex, hamming, simhash
+from parsers import extract_page
+from pipeline_benchmark import load_versioned_corpus, percentile
+from textnorm import normalize_blocks
+
+VARIANTS = {
+    'pagination': lambda words: words + ['Page', '2', 'of', '9', 'Previous', 'Next'],
+    'tag page': lambda words: ['Tag:', 'offers', 'Posts', 'tagged', 'offers'] + words,
+    'printer view': lambda words: words[len(words) // 50:len(words) - len(words) // 50]
+}
+
+
+def corpus_pages():
+    """name -> extracted page with its clean text, for every corpus page"""
+    _, pages = load_versioned_corpus()
+    extracted = {}
+    for name, html in pages.items():
+        page = extract_page(html, f'https://corpus.example/{name}')
+        page.update(normalize_blocks(page.pop('text_blocks')))
+        page['url'] = f'https://corpus.example/{name}'
+        extracted[name] = page
+    return extracted
+
+
+def variant_pages(pages):
+    """The pages followed by each of their variants, as (name, page)"""
+    result = list(pages.items())
+    for variant, make in VARIANTS.items():
+        for name, page in pages.items():
+            text = ' '.join(make(page['text'].split()))
+            result.append((f'{name} / {variant}', dict(page, text=text, url=f"{page['url']}?view={variant}")))
+    return result
+
+
+def best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def bench_fingerprint(pages, repeat):
+    print("\n⏱️  Fingerprint time per page")
+    print("=" * 64)
+    print(f"{'page':<14}{'words':>10}{'numpy':>12}{'python':>12}{'speedup':>12}")
+    results = []
+    numpy = near_duplicates.np
+    for name, page in pages.items():
+        text = page['text']
+        fast_ms = best_ms(lambda: simhash(text), repeat) if numpy is not None else None
+        near_duplicates.np = None
+        try:
+            fingerprint = simhash(text)
+            slow_ms = best_ms(lambda: simhash(text), 1 if len(text) > 1e6 else repeat)
+        finally:
+            near_duplicates.np = numpy
+        if numpy is not None and simhash(text) != fingerprint:
+            raise RuntimeError(f'{name}: numpy and Python fingerprints differ')
+        results.append({'page': name, 'words': page['word_count'], 'numpy_ms': fast_ms and round(fast_ms, 3),
+                        'python_ms': round(slow_ms, 3)})
+        fast = f'{fast_ms:.2f}ms' if fast_ms is not None else 'n/a'
+        speedup = f'{slow_ms / fast_ms:.1f}x' if fast_ms else 'n/a'
+        print(f"{name:<14}{page['word_count']:>10,}{fast:>12}{slow_ms:>10.2f}ms{speedup:>12}")
+    return results
+
+
+def bench_detection(pages, distance):
+    print(f"\n🔍 Hamming distance to variants (near-duplicate at <= {distance} bits)")
+    print("=" * 64)
+    print(f"{'page':<14}" + ''.join(f'{variant:>14}' for variant in VARIANTS) + f"{'nearest other':>16}")
+    fingerprints = {name: simhash(page['text']) for name, page in pages.items()}
+    results = []
+    for name, page in pages.items():
+        words = page['text'].split()
+        distances = {variant: hamming(fingerprints[name], simhash(' '.join(make(words))))
+                     for variant, make in VARIANTS.items()}
+        other = min(hamming(fingerprints[name], fp) for other_name, fp in fingerprints.items() if other_name != name)
+        results.append({'page': name, **distances, 'nearest_other': other})
+        print(f"{name:<14}" + ''.join(f'{value:>14}' for value in distances.values()) + f"{other:>16}")
+    return results
+
+
+def bench_index(size, lookups, distance, seed=0):
+    rng = random.Random(seed)
+    fingerprints = [rng.getrandbits(64) for _ in range(size)]
+    index = NearDuplicateIndex(distance=distance, path='', max_results=0, mode='reuse')
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for position, fingerprint in enumerate(fingerprints):
+        index._insert(fingerprint, position)
+    insert_seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    def timed_lookups(queries):
+        samples = []
+        found = 0
+        for query, expected in queries:
+            start = time.perf_counter()
+            result = index.nearest(query)
+            samples.append(time.perf_counter() - start)
+            found += result is not None and (expected is None or result[0] == expected)
+        samples.sort()
+        return samples, found
+
+    misses = [(rng.getrandbits(64), None) for _ in range(lookups)]
+    hits = []
+    for _ in range(lookups):
+        position = rng.randrange(size)
+        flipped = fingerprints[position]
+        for bit in rng.sample(range(64), rng.randint(0, distance)):
+            flipped ^= 1 << bit
+        hits.append((flipped, position))
+
+    miss_samples, false_matches = timed_lookups(misses)
+    hit_samples, recalled = timed_lookups(hits)
+
+    print(f"\n🗂️  Index of {size:,} random fingerprints ({len(index.bands)} bands, distance {distance})")
+    print("=" * 64)
+    print(f"insert   {size / insert_seconds:>12,.0f} fingerprints/s   {memory / 1024 / 1024:.1f} MB traced "
+          f"({memory / size:.0f} bytes each)")
+    for label, samples in (('miss', miss_samples), ('hit', hit_samples)):
+        print(f"{label:<8} p50 {percentile(samples, 50) * 1e6:>8.1f}us   p99 {percentile(samples, 99) * 1e6:>8.1f}us")
+    print(f"recall   {recalled / lookups:.2%} of copies with <= {distance} bits flipped; "
+          f"{false_matches} random lookups matched")
+    return {
+        'size': size, 'bands': len(index.bands), 'insert_per_sec': round(size / insert_seconds),
+        'memory_mb': round(memory / 1024 / 1024, 1),
+        'miss_p50_us': round(percentile(miss_samples, 50) * 1e6, 1),
+        'miss_p99_us': round(percentile(miss_samples, 99) * 1e6, 1),
+        'hit_p50_us': round(percentile(hit_samples, 50) * 1e6, 1),
+        'hit_p99_us': round(percentile(hit_samples, 99) * 1e6, 1),
+        'recall': recalled / lookups, 'random_matches': false_matches
+    }
+
+
+def bench_pipeline(pages, distance):
+    import crawl4ai_app
+    from pipeline_benchmark import use_stand_ins
+
+    use_stand_ins()
+    crawl = variant_pages(pages)
+    print(f"\n🤖 structure_content_with_llm over {len(crawl)} pages ({len(pages)} originals + variants)")
+    print("=" * 64)
+    print(f"{'index':<10}{'summarizer calls':>18}{'reused':>10}{'seconds':>12}")
+    results = []
+    for mode in ('off', 'reuse'):
+        near_duplicates._near_duplicate_index = NearDuplicateIndex(distance=distance, path='', mode=mode)
+        before = crawl4ai_app.inference.stats().get('summarizer', {}).get('requests', 0)
+        start = time.perf_counter()
+        for name, page in crawl:
+            result = crawl4ai_app.structure_content_with_llm(page)
+            if 'error' in result:
+                raise RuntimeError(f"{name}: {result['error']}")
+        seconds = time.perf_counter() - start
+        calls = crawl4ai_app.inference.stats()['summarizer']['requests'] - before
+        reused = near_duplicates._near_duplicate_index.stats()['reused']
+        results.append({'mode': mode, 'summarizer_calls': calls, 'reused': reused, 'seconds': round(seconds, 2)})
+        print(f"{mode:<10}{calls:>18,}{reused:>10}{seconds:>12.2f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=1000000, help='fingerprints in the index scale test')
+    parser.add_argument('--lookups', type=int, default=10000, help='lookups of each kind in the index scale test')
+    parser.add_argument('--distance', type=int, default=near_duplicates.NEAR_DUP_DISTANCE,
+                        help='Hamming distance that counts as a near-duplicate')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per fingerprint timing (best is reported)')
+    parser.add_argument('--skip-pipeline', action='store_true', help='skip the run with the stand-in models')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    pages = corpus_pages()
+    print(f"🪞 Near-duplicate detection (SimHash, {near_duplicates.SHINGLE_WORDS}-word shingles, "
+          f"numpy {'on' if near_duplicates.np is not None else 'off'})")
+    results = {
+        'distance': args.distance,
+        'fingerprint': bench_fingerprint(pages, args.repeat),
+        'detection': bench_detection(pages, args.distance),
+        'index': bench_index(args.size, args.lookups, args.distance)
+    }
+    if not args.skip_pipeline:
+        results['pipeline'] = bench_pipeline(pages, args.distance)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
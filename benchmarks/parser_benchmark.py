@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Parser backend benchmark and parity check
+
+Runs the full single-pass extractor through every installed parser backend
+(html.parser, lxml, selectolax) over the saved-page corpus plus a synthetic
+product listing, reports throughput in pages/sec and checks that each backend
+produces the same sections and clean text as html.parser.
+
+Usage: python benchmarks/parser_benchmark.py [--repeat N] [--large-mb MB]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_benchmark import BASE_URL, build_large_page, load_corpus
+from extractor import BASIC_HANDLERS, PageExtractor
+from parsers import available_parsers, extract_page
+
+SECTIONS = ('metadata', 'content_blocks', 'media', 'links')
+
+
+def clean(text):
+    """The clean_text normalization used by the scrape paths"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def comparable(page):
+    """The parts of an extraction result that must match across backends"""
+    result = {key: page[key] for key in SECTIONS}
+    result['hrefs'] = page.get('hrefs')
+    result['image_srcs'] = page.get('image_srcs')
+    result['text'] = clean(page['text'])
+    return result
+
+
+def check_parity(pages, parsers):
+    """Return a list of (parser, page, extractor) combinations that differ from html.parser"""
+    failures = []
+    extractors = {
+        'full': PageExtractor(),
+        'basic': PageExtractor(BASIC_HANDLERS)
+    }
+    for name, html in pages.items():
+        for label, extractor in extractors.items():
+            expected = comparable(extract_page(html, BASE_URL, extractor, 'html.parser'))
+            for parser in parsers:
+                actual = comparable(extract_page(html, BASE_URL, extractor, parser))
+                if actual != expected:
+                    failures.append((parser, name, label))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the small pages')
+    parser.add_argument('--large-mb', type=float, default=3, help='size of the synthetic page, 0 to skip')
+    args = parser.parse_args()
+
+    parsers = available_parsers()
+    corpus = load_corpus()
+    extractor = PageExtractor()
+
+    print("⚖️  Parity against html.parser")
+    print("=" * 60)
+    failures = check_parity(corpus, parsers)
+    for backend, page, label in failures:
+        print(f"❌ {backend}: {page} ({label} extractor) differs")
+    if not failures:
+        print(f"✅ {', '.join(parsers)} agree on {len(corpus)} corpus pages")
+
+    print("\n📊 Throughput (parse + extract)")
+    print("=" * 60)
+    large = build_large_page(args.large_mb) if args.large_mb > 0 else None
+    print(f"{'parser':<14}{'corpus pages/s':>18}{'large MB/s':>14}")
+    for backend in parsers:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for html in corpus.values():
+                extract_page(html, BASE_URL, extractor, backend)
+        corpus_rate = args.repeat * len(corpus) / (time.perf_counter() - start)
+
+        large_rate = ''
+        if large:
+            start = time.perf_counter()
+            extract_page(large, BASE_URL, extractor, backend)
+            large_rate = f"{len(large) / 1024 / 1024 / (time.perf_counter() - start):.1f}"
+        print(f"{backend:<14}{corpus_rate:>18.0f}{large_rate:>14}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the scrape pipeline: fetch, parse, extract, LLM and end to end
+
+Serves the versioned corpus in benchmarks/corpus/pipeline-v1 (small, large,
+table-heavy, link-heavy and malformed pages; MANIFEST.json pins their
+checksums) from a local HTTP server, so no run touches the network, and
+times each stage of crawl4ai_app on every page:
+
+- fetch       the shared connection pool's limited streaming download
+- parse       a bare parse (no handlers, no text collection)
+- extract     Crawl4AIScraper.build_page: parse, extraction and text cleanup
+- llm         structure_content_with_llm with the tiny stand-in models
+              (tiny_models.py), no LLM cache and no near-duplicate index
+- end_to_end  POST /api/scrape through the Flask test client
+
+For each stage and page it reports p50/p95/p99 and mean latency, pages/sec
+and MB/sec, and the peak Python heap of one extra traced run (tracemalloc;
+memory held by torch tensors is not included). --output writes everything,
+with the corpus version, checksums and git commit, to JSON, and --compare
+diffs p50s against such a file from another commit.
+
+Usage: python benchmarks/pipeline_benchmark.py [--stages fetch,parse,extract,llm,end_to_end]
+                                               [--pages small,large] [--parser lxml] [--repeat N]
+                                               [--llm-repeat N] [--output results.json]
+                                               [--compare baseline.json] [--threshold 10]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawl4ai_app
+import near_duplicates
+import result_store
+from extractor import PageExtractor
+from http_cache import HttpCache
+from near_duplicates import NearDuplicateIndex
+from parsers import DEFAULT_PARSER, extract_page
+from result_store import ResultStore
+from tiny_models import build_classifier, build_summarizer, build_tokenizer
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus', 'pipeline-v1')
+STAGES = ('fetch', 'parse', 'extract', 'llm', 'end_to_end')
+
+
+def load_versioned_corpus():
+    """(manifest, {name: bytes}); fails if a page no longer matches its checksum"""
+    with open(os.path.join(CORPUS_DIR, 'MANIFEST.json')) as f:
+        manifest = json.load(f)
+    pages = {}
+    for name, entry in manifest['pages'].items():
+        with open(os.path.join(CORPUS_DIR, entry['file']), 'rb') as f:
+            content = f.read()
+        if hashlib.sha256(content).hexdigest() != entry['sha256']:
+            raise RuntimeError(f"{entry['file']} does not match MANIFEST.json; bump the corpus version "
+                               f"instead of editing pages in place")
+        pages[name] = content
+    return manifest, pages
+
+
+def start_corpus_server(pages):
+    """Serve /<name> for every corpus page; returns the base URL"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            body = pages.get(self.path.lstrip('/'))
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def use_stand_ins():
+    """Swap the app's models for the tiny ones and turn its caches, near-duplicate index and result store off"""
+    tokenizer = build_tokenizer()
+    crawl4ai_app.summarizer.model = build_summarizer(tokenizer)
+    crawl4ai_app.content_classifier.model = build_classifier(tokenizer)
+    # Every run pays for its download, parse and model calls
+    crawl4ai_app.inference.cache = None
+    crawl4ai_app.scraper.cache = HttpCache(enabled=False)
+    near_duplicates._near_duplicate_index = NearDuplicateIndex(mode='off')
+    result_store._result_store = ResultStore(path='')
+    return crawl4ai_app.summarizer.model.name
+
+
+def stage_calls(base_url, pages, parser):
+    """stage -> page name -> zero-argument callable running that stage once"""
+    scraper = crawl4ai_app.scraper
+    client = crawl4ai_app.app.test_client()
+    bare = PageExtractor([], keep_text=False)
+
+    def fetch(name):
+        response = scraper.pool.stream(f'{base_url}/{name}')
+        response.raise_for_status()
+        return response
+
+    def built(name):
+        return scraper.build_page(f'{base_url}/{name}', pages[name], 200, 'text/html; charset=utf-8', 'utf-8', parser)
+
+    def end_to_end(name):
+        response = client.post('/api/scrape', json={'url': f'{base_url}/{name}', 'parser': parser})
+        if response.status_code != 200:
+            raise RuntimeError(f'{name}: {response.get_data(as_text=True)[:200]}')
+        return response
+
+    # The LLM stage starts from an already extracted page
+    extracted = {name: built(name) for name in pages}
+    calls = {
+        'fetch': lambda name: lambda: fetch(name),
+        'parse': lambda name: lambda: extract_page(pages[name], f'{base_url}/{name}', bare, parser),
+        'extract': lambda name: lambda: built(name),
+        'llm': lambda name: lambda: crawl4ai_app.structure_content_with_llm(extracted[name]),
+        'end_to_end': lambda name: lambda: end_to_end(name)
+    }
+    return {stage: {name: make(name) for name in pages} for stage, make in calls.items()}
+
+
+def percentile(ordered, q):
+    """Linearly interpolated q-th percentile of an ascending list"""
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def measure(call, repeat, size):
+    """Latency percentiles and throughput of repeat calls, plus the traced heap peak of one more"""
+    call()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - start)
+        if isinstance(result, dict) and 'error' in result:
+            raise RuntimeError(result['error'])
+    samples.sort()
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean = sum(samples) / len(samples)
+    return {
+        'runs': repeat,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(mean * 1000, 3),
+        'pages_per_sec': round(1 / mean, 2),
+        'mb_per_sec': round(size / 1024 / 1024 / mean, 2),
+        'peak_heap_kb': round(peak / 1024)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print the p50 change of every stage/page also in the baseline; returns the regressions"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline['corpus']['version'] != results['corpus']['version']:
+        print(f"⚠️  Baseline used corpus {baseline['corpus']['version']}, this run {results['corpus']['version']}")
+    before = {(row['stage'], row['page']): row for row in baseline['results']}
+
+    print(f"Against {baseline_path} (commit {baseline.get('commit') or 'unknown'}), p50:")
+    print(f"{'stage':<12}{'page':<13}{'before':>11}{'after':>11}{'change':>9}")
+    regressions = []
+    for row in results['results']:
+        old = before.get((row['stage'], row['page']))
+        if old is None:
+            continue
+        change = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+        flag = ''
+        if change > threshold:
+            regressions.append(row)
+            flag = '  ❌'
+        print(f"{row['stage']:<12}{row['page']:<13}{old['p50_ms']:>9.2f}ms{row['p50_ms']:>9.2f}ms{change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stages', default=','.join(STAGES), help='comma-separated stages to run')
+    parser.add_argument('--pages', help='comma-separated corpus pages (default: all)')
+    parser.add_argument('--parser', default=DEFAULT_PARSER, help='parser backend')
+    parser.add_argument('--repeat', type=int, default=30, help='timed runs per page for fetch, parse and extract')
+    parser.add_argument('--llm-repeat', type=int, default=5, help='timed runs per page for llm and end_to_end')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='results JSON of another commit to diff p50s against')
+    parser.add_argument('--threshold', type=float, default=10, help='p50 slowdown (%%) reported as a regression')
+    args = parser.parse_args()
+
+    stages = args.stages.split(',')
+    for stage in stages:
+        if stage not in STAGES:
+            parser.error(f'unknown stage {stage!r}; choose from {", ".join(STAGES)}')
+
+    manifest, pages = load_versioned_corpus()
+    if args.pages:
+        pages = {name: pages[name] for name in args.pages.split(',')}
+    base_url = start_corpus_server(pages)
+    model_name = use_stand_ins()
+    calls = stage_calls(base_url, pages, args.parser)
+
+    print(f"⏱️  Pipeline benchmark (corpus {manifest['version']}, {args.parser}, {model_name})")
+    print("=" * 96)
+    print(f"{'stage':<12}{'page':<13}{'size':>8}{'runs':>6}{'p50':>10}{'p95':>10}{'p99':>10}"
+          f"{'pages/s':>10}{'MB/s':>8}{'peak heap':>11}")
+    rows = []
+    for stage in stages:
+        repeat = args.llm_repeat if stage in ('llm', 'end_to_end') else args.repeat
+        for name, content in pages.items():
+            row = dict(stage=stage, page=name, bytes=len(content), **measure(calls[stage][name], repeat, len(content)))
+            rows.append(row)
+            print(f"{stage:<12}{name:<13}{len(content) / 1024:>6.0f}KB{repeat:>6}{row['p50_ms']:>8.2f}ms"
+                  f"{row['p95_ms']:>8.2f}ms{row['p99_ms']:>8.2f}ms{row['pages_per_sec']:>10.1f}"
+                  f"{row['mb_per_sec']:>8.1f}{row['peak_heap_kb'] / 1024:>9.1f}MB")
+    print("=" * 96)
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Process peak RSS: {max_rss_mb:.0f} MB")
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'parser': args.parser,
+        'models': model_name,
+        'corpus': {'version': manifest['version'],
+                   'sha256': {name: manifest['pages'][name]['sha256'] for name in pages}},
+        'max_rss_mb': round(max_rss_mb),
+        'results': rows
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        print("-" * 96)
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} p50 regression(s) over {args.threshold:g}%")
+            sys.exit(1)
+        print(f"✅ No p50 regressions over {args.threshold:g}%")
+
+
+if __name__ == '__main__':
+    main()
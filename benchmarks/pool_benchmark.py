@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Connection pool latency benchmark against a local HTTPS server
+
+Generates a throwaway self-signed certificate with openssl, serves a corpus
+page over HTTPS with keep-alive, and measures per-request latency for:
+
+- requests.get() per call (the old app.py path)
+- a new requests.Session per call (the old per-request Crawl4AIScraper)
+- the shared ConnectionPool (HTTP/1.1 keep-alive)
+- the shared ConnectionPool over httpx, when httpx[http2] is installed
+
+Usage: python benchmarks/pool_benchmark.py [--requests N]
+"""
+
+import argparse
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from extraction_benchmark import load_corpus
+from http_pool import ConnectionPool, httpx
+
+
+def make_certificate(directory):
+    """Create a self-signed localhost certificate; returns (cert, key) paths"""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', key, '-out', cert, '-subj', '/CN=localhost',
+         '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1'],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def start_https_server(cert, key, body):
+    """Serve body over HTTPS with HTTP/1.1 keep-alive; returns the base URL"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'https://localhost:{server.server_address[1]}'
+
+
+def measure(fetch, url, count):
+    """Return per-request latencies in milliseconds"""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = fetch(f'{url}/page/{i}')
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='requests per strategy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        body = next(iter(load_corpus().values()))
+        url = start_https_server(cert, key, body)
+
+        def new_session(target):
+            with requests.Session() as session:
+                return session.get(target, verify=cert, timeout=10)
+
+        pooled = ConnectionPool(http2=False, verify=cert)
+        strategies = [
+            ('requests.get per call', lambda target: requests.get(target, verify=cert, timeout=10)),
+            ('new Session per call', new_session),
+            ('shared pool (HTTP/1.1)', lambda target: pooled.get(target, timeout=10))
+        ]
+        pooled_h2 = None
+        if httpx is not None:
+            pooled_h2 = ConnectionPool(http2=True, verify=cert)
+            strategies.append(('shared pool (httpx)', lambda target: pooled_h2.get(target, timeout=10)))
+
+        print("🔌 HTTPS connection reuse benchmark")
+        print("=" * 66)
+        print(f"{'strategy':<26}{'p50':>10}{'p95':>10}{'mean':>10}{'req/s':>10}")
+        for name, fetch in strategies:
+            latencies = measure(fetch, url, args.requests)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{name:<26}{statistics.median(latencies):>8.2f}ms{p95:>8.2f}ms"
+                  f"{statistics.mean(latencies):>8.2f}ms{1000 / statistics.mean(latencies):>10.0f}")
+
+        print("=" * 66)
+        print(f"Shared pool stats: {pooled.stats()}")
+        if pooled_h2 is not None:
+            print(f"httpx pool stats:  {pooled_h2.stats()}")
+            pooled_h2.close()
+        pooled.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Result store: encoding size, insert throughput with per-row and bulk transactions, and query latency
+
+Works on the scrape results (crawl4ai_app build_page output) of the pipeline
+and main-content corpus pages, written to a temporary SQLite file:
+
+- encoding     raw_data JSON size and zlib-compressed size per page, and the
+               time to encode and compress it
+- insert       rows/sec with one transaction per row and with bulk
+               transactions of RESULT_STORE_BATCH_SIZE rows, and the time
+               ResultStore.add() holds the calling (request) thread
+- query        --rows results over --domains domains: p50/p99 of
+               /api/results-style lookups by url, domain, content_hash and
+               time range, and of a deep page read with a keyset cursor vs
+               with OFFSET
+
+Usage: python benchmarks/result_store_benchmark.py [--rows 50000] [--domains 500] [--queries 200]
+                                                   [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl4ai_app import Crawl4AIScraper
+from http_cache import HttpCache
+from main_content_benchmark import load_labelled_corpus
+from pipeline_benchmark import load_versioned_corpus, percentile
+from result_store import COMPRESS_LEVEL, RESULT_STORE_BATCH_SIZE, ResultStore, content_hash
+from serialization import dumps_json
+
+STRUCTURED = {
+    'title': 'Corpus page',
+    'summary': {'summary': 'A short summary of the page standing in for the model output.'},
+    'sentiment': [{'label': 'POSITIVE', 'score': 0.98}],
+    'statistics': {'word_count': 0}
+}
+
+
+def corpus_results():
+    """name -> raw_data, as /api/scrape builds it, for every corpus page"""
+    scraper = Crawl4AIScraper(cache=HttpCache(enabled=False))
+    _, pages = load_versioned_corpus()
+    pages = dict(pages)
+    pages.update({name: html for name, (html, _) in load_labelled_corpus()[1].items()})
+    return {name: scraper.build_page(f'https://corpus.example/{name}', html, 200, 'text/html; charset=utf-8', 'utf-8')
+            for name, html in pages.items()}
+
+
+def bench_encoding(results):
+    print("\n📦 raw_data size per page (JSON vs zlib level %d)" % COMPRESS_LEVEL)
+    print("=" * 64)
+    print(f"{'page':<20}{'json':>10}{'stored':>10}{'ratio':>8}{'encode':>12}")
+    rows = []
+    for name, raw in results.items():
+        start = time.perf_counter()
+        data = dumps_json(raw)
+        stored = zlib.compress(data, COMPRESS_LEVEL)
+        elapsed = time.perf_counter() - start
+        rows.append({'page': name, 'json_bytes': len(data), 'stored_bytes': len(stored),
+                     'encode_ms': round(elapsed * 1000, 2)})
+        print(f"{name:<20}{len(data) / 1024:>8.0f}KB{len(stored) / 1024:>8.0f}KB{len(data) / len(stored):>7.1f}x"
+              f"{elapsed * 1000:>10.2f}ms")
+    return rows
+
+
+def synthetic(results, count, domains, seed=0):
+    """count (raw_data, structured_data, source, scraped_at) tuples spread over domains and a month"""
+    rng = random.Random(seed)
+    # The small pages keep the file size reasonable at high row counts
+    small = [raw for raw in results.values() if len(raw.get('text', '')) < 20000]
+    now = time.time()
+    rows = []
+    for index in range(count):
+        raw = dict(rng.choice(small), url=f'https://site{rng.randrange(domains)}.example/page/{index % (count // 3 + 1)}')
+        structured = dict(STRUCTURED, statistics={'word_count': raw.get('word_count', 0)})
+        rows.append((raw, structured, 'batch', now - 30 * 86400 * (count - index) / count))
+    return rows
+
+
+def bench_insert(rows, batch_size, directory):
+    print(f"\n✍️  Inserting {len(rows):,} results")
+    print("=" * 64)
+    results = {}
+    for label, size in (('row per transaction', 1), (f'bulk ({batch_size} rows)', batch_size)):
+        store = ResultStore(path=os.path.join(directory, f'insert-{size}.sqlite3'), batch_size=batch_size)
+        connection = store._open()
+        start = time.perf_counter()
+        for offset in range(0, len(rows), size):
+            store.insert_many(rows[offset:offset + size], connection)
+        seconds = time.perf_counter() - start
+        connection.close()
+        store.close()
+        results[label] = round(len(rows) / seconds)
+        print(f"{label:<28}{len(rows) / seconds:>12,.0f} rows/s")
+
+    # What a scrape pays: a queue put, with encoding and inserts on the writer thread
+    store = ResultStore(path=os.path.join(directory, 'add.sqlite3'), batch_size=batch_size)
+    samples = []
+    start = time.perf_counter()
+    for row in rows:
+        begin = time.perf_counter()
+        store.add(row[0], row[1], row[2])
+        samples.append(time.perf_counter() - begin)
+    store.flush()
+    seconds = time.perf_counter() - start
+    samples.sort()
+    stats = store.stats()
+    store.close()
+    print(f"{'add() + writer thread':<28}{len(rows) / seconds:>12,.0f} rows/s   {stats['transactions']:,} transactions")
+    print(f"{'add() on the caller':<28}p50 {percentile(samples, 50) * 1e6:>7.1f}us   "
+          f"p99 {percentile(samples, 99) * 1e6:>7.1f}us")
+    results['writer_thread'] = round(len(rows) / seconds)
+    results['add_p50_us'] = round(percentile(samples, 50) * 1e6, 1)
+    results['add_p99_us'] = round(percentile(samples, 99) * 1e6, 1)
+    return results
+
+
+def bench_query(rows, domains, queries, batch_size, directory, seed=0):
+    path = os.path.join(directory, 'query.sqlite3')
+    store = ResultStore(path=path)
+    connection = store._open()
+    for offset in range(0, len(rows), batch_size):
+        store.insert_many(rows[offset:offset + batch_size], connection)
+    connection.close()
+    rng = random.Random(seed)
+    hashes = [content_hash(row[0]) for row in rng.sample(rows, min(len(rows), 50))]
+    span = rows[-1][3] - rows[0][3]
+
+    def timed(make_query):
+        samples = []
+        for _ in range(queries):
+            kwargs = make_query()
+            start = time.perf_counter()
+            store.query(**kwargs)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        return samples
+
+    def deep(kind):
+        # Page 50 of 20 rows, newest first
+        depth = min(1000, len(rows) - 20)
+        connection = store.connection
+        if kind == 'offset':
+            return lambda: connection.execute('SELECT id FROM results ORDER BY id DESC LIMIT 20 OFFSET ?',
+                                              (depth,)).fetchall()
+        cursor = connection.execute('SELECT id FROM results ORDER BY id DESC LIMIT 1 OFFSET ?', (depth,)).fetchone()[0]
+        return lambda: store.query(cursor=cursor + 1)
+
+    cases = {
+        'by url': lambda: {'url': rng.choice(rows)[0]['url']},
+        'by domain': lambda: {'domain': f'site{rng.randrange(domains)}.example'},
+        'by content_hash': lambda: {'content_hash': rng.choice(hashes)},
+        'last day': lambda: {'since': rows[-1][3] - 86400},
+        'one day, a week ago': lambda: {'since': rows[-1][3] - 8 * 86400, 'until': rows[-1][3] - 7 * 86400},
+        'by url, with raw_data': lambda: {'url': rng.choice(rows)[0]['url'], 'include_raw': True}
+    }
+    print(f"\n🔎 Queries over {len(rows):,} results ({domains} domains, {span / 86400:.0f} days, "
+          f"{os.path.getsize(path) / 1024 / 1024:.0f} MB; 20 per page)")
+    print("=" * 64)
+    results = {}
+    for label, make_query in cases.items():
+        samples = timed(make_query)
+        results[label] = {'p50_ms': round(percentile(samples, 50) * 1000, 3),
+                          'p99_ms': round(percentile(samples, 99) * 1000, 3)}
+        print(f"{label:<28}p50 {percentile(samples, 50) * 1000:>7.2f}ms   p99 {percentile(samples, 99) * 1000:>7.2f}ms")
+    for kind in ('cursor', 'offset'):
+        run = deep(kind)
+        samples = []
+        for _ in range(queries):
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        label = f'page 51 via {kind}'
+        results[label] = {'p50_ms': round(percentile(samples, 50) * 1000, 3),
+                          'p99_ms': round(percentile(samples, 99) * 1000, 3)}
+        print(f"{label:<28}p50 {percentile(samples, 50) * 1000:>7.2f}ms   p99 {percentile(samples, 99) * 1000:>7.2f}ms")
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='results in the insert and query tests')
+    parser.add_argument('--domains', type=int, default=500, help='distinct domains among the results')
+    parser.add_argument('--queries', type=int, default=200, help='queries of each kind')
+    parser.add_argument('--batch-size', type=int, default=RESULT_STORE_BATCH_SIZE, help='rows per bulk transaction')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    results = corpus_results()
+    print(f"🗄️  Result store (SQLite {sqlite3.sqlite_version}, WAL) on {len(results)} corpus pages")
+    rows = synthetic(results, args.rows, args.domains)
+    with tempfile.TemporaryDirectory() as directory:
+        output = {
+            'rows': args.rows,
+            'encoding': bench_encoding(results),
+            'insert': bench_insert(rows, args.batch_size, directory),
+            'query': bench_query(rows, args.domains, args.queries, args.batch_size, directory)
+        }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Serialization time and wire size of /api/scrape responses
+
+Builds real scrape results with Crawl4AIScraper.build_page (the corpus pages
+and a synthetic product listing of --page-mb) plus a stand-in structured_data
+of the shape structure_content_with_llm returns, and encodes each response
+body:
+
+- encoders: Flask's jsonify (the old path), the standard library json,
+  orjson and MessagePack (each skipped when not installed)
+- compression: none, gzip and brotli at the levels serialization.py uses
+- bodies: with raw_data (include_raw) and without it (the new default)
+
+For each combination it reports encode and compress time in milliseconds
+and the bytes on the wire.
+
+Usage: python benchmarks/serialization_benchmark.py [--page-mb 2] [--repeat N] [--output results.json]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+
+from crawl4ai_app import Crawl4AIScraper, app
+from extraction_benchmark import BASE_URL, build_large_page, load_corpus
+from http_cache import HttpCache
+from serialization import RESPONSE_BROTLI_QUALITY, RESPONSE_GZIP_LEVEL, brotli, msgpack, orjson
+
+
+def structured_stand_in(page):
+    """A structured_data dict of the size and shape structure_content_with_llm returns"""
+    return {
+        'url': page['url'],
+        'title': page['metadata']['title'],
+        'description': page['metadata']['description'],
+        'summary': ' '.join(page['text'].split()[:110]),
+        'summary_stats': {'tokens': page['word_count'], 'chunks': 1, 'chunks_summarized': 1,
+                          'coverage': 1.0, 'reduce_rounds': 0},
+        'sentiment': 'neutral',
+        'content_analysis': {'has_headings': True, 'has_lists': True, 'has_tables': True,
+                             'has_forms': False, 'has_images': True, 'has_videos': False},
+        'statistics': {
+            'word_count': page['word_count'],
+            'character_count': page['character_count'],
+            'headings_count': len(page['content_blocks']['headings']),
+            'paragraphs_count': len(page['content_blocks']['paragraphs']),
+            'images_count': len(page['media']['images']),
+            'internal_links_count': len(page['links']['internal']),
+            'external_links_count': len(page['links']['external']),
+            'social_links_count': len(page['links']['social'])
+        },
+        'processing_timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def encoders():
+    """name -> body -> bytes, for every installed encoder"""
+    def with_jsonify(body):
+        with app.app_context():
+            return jsonify(body).get_data()
+
+    found = {
+        'jsonify': with_jsonify,
+        'json': lambda body: json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    }
+    if orjson is not None:
+        found['orjson'] = orjson.dumps
+    if msgpack is not None:
+        found['msgpack'] = lambda body: msgpack.packb(body, use_bin_type=True)
+    return found
+
+
+def compressors():
+    found = {
+        'none': lambda data: data,
+        'gzip': lambda data: gzip.compress(data, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+    }
+    if brotli is not None:
+        found['br'] = lambda data: brotli.compress(data, quality=RESPONSE_BROTLI_QUALITY)
+    return found
+
+
+def timed(func, arg, repeat):
+    """(result, milliseconds per call)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(arg)
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--page-mb', type=float, default=2, help='size of the synthetic listing, 0 to skip')
+    parser.add_argument('--repeat', type=int, default=5, help='encodes per measurement (x20 for small pages)')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    pages = dict(load_corpus())
+    if args.page_mb > 0:
+        pages['listing'] = build_large_page(args.page_mb)
+    scraper = Crawl4AIScraper(cache=HttpCache(enabled=False))
+
+    print(f"📦 Response serialization (gzip level {RESPONSE_GZIP_LEVEL}, brotli quality {RESPONSE_BROTLI_QUALITY})")
+    results = []
+    for name, html in pages.items():
+        repeat = args.repeat if name == 'listing' else args.repeat * 20
+        page = scraper.build_page(BASE_URL, html, 200, 'text/html', 'utf-8', 'lxml')
+        structured = structured_stand_in(page)
+        bodies = {
+            'with raw_data': {'success': True, 'raw_data': page, 'structured_data': structured},
+            'default': {'success': True, 'structured_data': structured}
+        }
+
+        print("=" * 84)
+        print(f"{name} ({len(html) / 1024:.0f} KB of HTML)")
+        print(f"{'body':<15}{'encoder':<9}{'compression':<13}{'encode':>10}{'compress':>10}{'total':>10}{'wire':>13}")
+        for body_name, body in bodies.items():
+            for encoder_name, encoder in encoders().items():
+                data, encode_ms = timed(encoder, body, repeat)
+                for compression, compressor in compressors().items():
+                    wire, compress_ms = timed(compressor, data, repeat)
+                    results.append({'page': name, 'body': body_name, 'encoder': encoder_name,
+                                    'compression': compression, 'encode_ms': round(encode_ms, 3),
+                                    'compress_ms': round(compress_ms, 3), 'wire_bytes': len(wire)})
+                    print(f"{body_name:<15}{encoder_name:<9}{compression:<13}{encode_ms:>8.2f}ms{compress_ms:>8.2f}ms"
+                          f"{encode_ms + compress_ms:>8.2f}ms{len(wire) / 1024:>11.1f}KB")
+    print("=" * 84)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'gzip_level': RESPONSE_GZIP_LEVEL, 'brotli_quality': RESPONSE_BROTLI_QUALITY,
+                       'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Start-up time benchmark for app.py and crawl4ai_app.py
+
+For each app, in fresh interpreter processes:
+
+- import time of the module, and which heavy libraries (torch, transformers,
+  selenium.webdriver, webdriver_manager) it pulled in
+- time from process spawn to the first 200 from /api/health, with the app
+  served by Flask's built-in server on a free port
+
+Models are loaded on first use, so neither number includes loading BART.
+Pass --output to save the results as JSON so runs can be compared over time.
+
+Usage: python benchmarks/startup_benchmark.py [--runs N] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ('app', 'crawl4ai_app')
+HEAVY_MODULES = ('torch', 'transformers', 'selenium.webdriver', 'webdriver_manager')
+
+IMPORT_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+SERVE_SNIPPET = """
+import sys
+sys.path.insert(0, {root!r})
+import {module}
+{module}.app.run(host='127.0.0.1', port={port}, debug=False, use_reloader=False)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(module):
+    """Import time (seconds) and heavy modules loaded, in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET.format(root=ROOT, module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_first_healthy(module, timeout=120):
+    """Seconds from spawning the server to the first 200 from /api/health"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVE_SNIPPET.format(root=ROOT, module=module, port=port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f'http://127.0.0.1:{port}/api/health', timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.RequestException:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f'{module} exited with code {process.returncode}')
+            time.sleep(0.02)
+        raise TimeoutError(f'{module} was not healthy after {timeout}s')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    print("⏱️  Start-up benchmark")
+    print("=" * 72)
+    print(f"{'app':<16}{'import (median)':>17}{'first healthy':>16}  heavy modules at import")
+    results = {'runs': args.runs, 'python': sys.version.split()[0], 'apps': {}}
+    for module in APPS:
+        imports = [measure_import(module) for _ in range(args.runs)]
+        healthy = [measure_first_healthy(module) for _ in range(args.runs)]
+        import_seconds = statistics.median(run['seconds'] for run in imports)
+        healthy_seconds = statistics.median(healthy)
+        heavy = sorted({name for run in imports for name in run['heavy']})
+        results['apps'][module] = {
+            'import_seconds': round(import_seconds, 3),
+            'first_healthy_seconds': round(healthy_seconds, 3),
+            'heavy_modules': heavy
+        }
+        print(f"{module:<16}{import_seconds:>16.2f}s{healthy_seconds:>15.2f}s  {', '.join(heavy) or 'none'}")
+    print("=" * 72)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Streaming fetch limits and metadata-only early termination
+
+Starts a local server with hostile responses and fetches each one through
+ConnectionPool.stream (the fetch layer under both apps' scrape paths) and,
+for comparison, the old way - requests reading response.content in full:
+
+- huge:     a --huge-mb page with an honest Content-Length
+- endless:  a chunked HTML stream that never ends
+- trickle:  1 KB every 100 ms, forever
+- binary:   a 20 MB application/octet-stream body
+
+For each it reports whether the fetch was rejected, the time taken and the
+peak Python memory (tracemalloc). The old way is skipped for the endless and
+trickling responses, which it would read until the socket timeout or memory
+runs out.
+
+It then scrapes a --page-mb page twice with the HTTP cache disabled: a full
+Crawl4AIScraper.scrape_with_requests (lxml parser) and scrape_metadata, which parses the
+page as it downloads and stops after </head>, and reports bytes downloaded
+and time for each.
+
+Usage: python benchmarks/streaming_benchmark.py [--huge-mb 200] [--page-mb 5] [--max-mb 10]
+                                                [--max-seconds 2] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from crawl4ai_app import Crawl4AIScraper
+from extraction_benchmark import build_large_page
+from http_cache import HttpCache
+from http_pool import ConnectionPool, FetchLimitExceeded
+
+BLOCK = b'<p>' + b'filler text ' * 85 + b'</p>\n'
+
+
+def start_server(huge_mb, page):
+    """Serve the hostile responses and the test page; returns the base URL"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def send_head(self, content_type, length=None):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            if length is None:
+                self.send_header('Transfer-Encoding', 'chunked')
+            else:
+                self.send_header('Content-Length', str(length))
+            self.end_headers()
+
+        def write_chunk(self, data):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+        def do_GET(self):
+            try:
+                if self.path == '/page':
+                    self.send_head('text/html; charset=utf-8', len(page))
+                    self.wfile.write(page)
+                elif self.path == '/huge':
+                    blocks = huge_mb * 1024 * 1024 // len(BLOCK)
+                    self.send_head('text/html', blocks * len(BLOCK))
+                    for _ in range(blocks):
+                        self.wfile.write(BLOCK)
+                elif self.path == '/endless':
+                    self.send_head('text/html')
+                    self.write_chunk(b'<html><body>')
+                    while True:
+                        self.write_chunk(BLOCK * 16)
+                elif self.path == '/trickle':
+                    self.send_head('text/html')
+                    while True:
+                        self.write_chunk(BLOCK)
+                        time.sleep(0.1)
+                elif self.path == '/binary':
+                    body = os.urandom(1024 * 1024) * 20
+                    self.send_head('application/octet-stream', len(body))
+                    self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    # Clients hanging up mid-response is the point of the exercise
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def measure(fetch):
+    """Run fetch(); returns (outcome, seconds, peak MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        response = fetch()
+        outcome = f'read {len(response.content) / 1024 / 1024:.1f} MB'
+    except (FetchLimitExceeded, requests.RequestException) as e:
+        outcome = f'rejected: {e}'
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return outcome, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--huge-mb', type=int, default=200, help='size of the huge response')
+    parser.add_argument('--page-mb', type=float, default=5, help='size of the metadata-only test page')
+    parser.add_argument('--max-mb', type=float, default=10, help='byte limit for the streamed fetches')
+    parser.add_argument('--max-seconds', type=float, default=2, help='time limit for the streamed fetches')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    page_html = build_large_page(args.page_mb)
+    base_url = start_server(args.huge_mb, page_html)
+    pool = ConnectionPool(http2=False)
+    limits = {'max_bytes': int(args.max_mb * 1024 * 1024), 'max_seconds': args.max_seconds, 'timeout': 15}
+
+    print(f"🛡️  Streaming fetch limits ({args.max_mb:g} MB, {args.max_seconds:g}s)")
+    print("=" * 96)
+    print(f"{'response':<10}{'fetch':<10}{'time':>8}{'peak mem':>11}  outcome")
+    results = {'limits': {'max_mb': args.max_mb, 'max_seconds': args.max_seconds}, 'hostile': [], 'metadata': []}
+    for name in ('huge', 'endless', 'trickle', 'binary'):
+        url = f'{base_url}/{name}'
+        fetches = [('streamed', lambda: pool.stream(url, **limits))]
+        if name in ('huge', 'binary'):
+            fetches.append(('old', lambda: requests.get(url, timeout=15)))
+        for label, fetch in fetches:
+            outcome, elapsed, peak = measure(fetch)
+            results['hostile'].append({'response': name, 'fetch': label, 'seconds': round(elapsed, 3),
+                                       'peak_mb': round(peak, 1), 'outcome': outcome})
+            print(f"{name:<10}{label:<10}{elapsed:>7.2f}s{peak:>9.1f}MB  {outcome[:60]}")
+    print("=" * 96)
+
+    # Full scrape vs <head> only, cache disabled so both download
+    scraper = Crawl4AIScraper(pool=pool, cache=HttpCache(enabled=False))
+    url = f'{base_url}/page'
+    print(f"📄 Metadata-only scrape of a {args.page_mb:g} MB page")
+    print("=" * 96)
+    print(f"{'scrape':<16}{'downloaded':>14}{'time':>10}  title")
+    for label, scrape in (('full', partial(scraper.scrape_with_requests, parser='lxml')), ('metadata_only', scraper.scrape_metadata)):
+        # Warm-up, then the timed scrape
+        scrape(url)
+        start = time.perf_counter()
+        page = scrape(url)
+        elapsed = time.perf_counter() - start
+        if 'error' in page:
+            raise RuntimeError(page['error'])
+        # The full scrape reads the whole page
+        downloaded = page.get('bytes_downloaded', len(page_html))
+        results['metadata'].append({'scrape': label, 'bytes_downloaded': downloaded, 'seconds': round(elapsed, 4),
+                                    'title': page['metadata']['title']})
+        print(f"{label:<16}{downloaded / 1024:>12.0f}KB{elapsed * 1000:>8.1f}ms  {page['metadata']['title']}")
+    print("=" * 96)
+    pool.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Chunked map-reduce summarization cost at 10k, 100k and 1M characters
+
+Builds documents of each size from the benchmark corpus and summarizes them
+with summarize.summarize_document through an InferenceServer running the tiny
+stand-in BART (tiny_models.py), next to the old approach of summarizing the
+first 1000 characters. For each size it reports the token count, chunks
+found and summarized, how much of the document the summary covers,
+summarizer calls, and time split into chunking (tokenize + split) and model
+work. With the token budget, the number of calls, and so the model time,
+stays flat once documents outgrow the budget.
+
+Usage: python benchmarks/summarize_benchmark.py [--sizes 10000,100000,1000000] [--chunk-tokens N]
+                                                [--budget N] [--no-reduce] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend_benchmark import documents
+from inference import InferenceServer
+from summarize import SUMMARY_CHUNK_TOKENS, SUMMARY_TOKEN_BUDGET, chunk_text, summarize_document
+from tiny_models import build_summarizer, build_tokenizer
+
+PARAMS = {'max_length': 130, 'min_length': 30, 'do_sample': False}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma-separated document sizes (characters)')
+    parser.add_argument('--chunk-tokens', type=int, default=SUMMARY_CHUNK_TOKENS)
+    parser.add_argument('--budget', type=int, default=SUMMARY_TOKEN_BUDGET, help='token budget of the map step')
+    parser.add_argument('--no-reduce', action='store_true', help='join chunk summaries instead of reducing them')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    tokenizer = build_tokenizer()
+    summarizer = build_summarizer(tokenizer)
+    # No LLM cache: every run pays for its model calls
+    inference = InferenceServer()
+    inference.register('summarizer', summarizer)
+    calls = lambda: inference.stats()['summarizer']['requests']
+
+    print(f"📝 Long-document summarization ({args.chunk_tokens}-token chunks, {args.budget}-token budget, "
+          f"reduce {'off' if args.no_reduce else 'on'}, {summarizer.name})")
+    print("=" * 96)
+    print(f"{'chars':>9}  {'method':<11}{'tokens':>9}{'chunks':>8}{'used':>6}{'coverage':>10}{'calls':>7}"
+          f"{'chunking':>10}{'model':>9}{'total':>9}")
+    results = []
+    for size in [int(n) for n in args.sizes.split(',')]:
+        text = documents(1, size)[0]
+
+        # Old behaviour: the first 1000 characters, one call
+        before = calls()
+        start = time.perf_counter()
+        inference.run('summarizer', text[:1000] + '...', **PARAMS)
+        truncated = {'method': 'truncate', 'tokens': len(tokenizer(text[:1000])['input_ids']), 'chunks': 1,
+                     'chunks_summarized': 1, 'coverage': round(min(1.0, 1000 / size), 3),
+                     'calls': calls() - before, 'chunking_seconds': 0.0,
+                     'total_seconds': round(time.perf_counter() - start, 3)}
+
+        start = time.perf_counter()
+        chunk_text(text, tokenizer, args.chunk_tokens)
+        chunking = time.perf_counter() - start
+
+        before = calls()
+        start = time.perf_counter()
+        summary = summarize_document(inference, text, tokenizer, chunk_tokens=args.chunk_tokens,
+                                     token_budget=args.budget, reduce=not args.no_reduce, **PARAMS)
+        total = time.perf_counter() - start
+        chunked = {key: value for key, value in summary.items() if key != 'summary'}
+        chunked.update({'method': 'map-reduce', 'calls': calls() - before,
+                        'chunking_seconds': round(chunking, 3), 'total_seconds': round(total, 3)})
+
+        for row in (truncated, chunked):
+            row['chars'] = size
+            results.append(row)
+            model = row['total_seconds'] - row['chunking_seconds']
+            print(f"{size:>9,}  {row['method']:<11}{row['tokens']:>9,}{row['chunks']:>8}{row['chunks_summarized']:>6}"
+                  f"{row['coverage']:>10.1%}{row['calls']:>7}{row['chunking_seconds']:>9.2f}s{model:>8.2f}s"
+                  f"{row['total_seconds']:>8.2f}s")
+    print("=" * 96)
+    inference.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'chunk_tokens': args.chunk_tokens, 'budget': args.budget, 'reduce': not args.no_reduce,
+                       'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Text cleanup: the splitlines/split("  ") generator vs textnorm.normalize_blocks
+
+Extracts every page of the pipeline corpus and a synthetic multi-megabyte
+listing once, then times, on the same text:
+
+- legacy     the nested generator the scrape functions used (get_text()
+             text -> splitlines -> strip -> split("  ") -> strip -> join),
+             plus the separate len(text.split()) word count
+- regex      one compiled \\s+ substitution over the block-split text,
+             with the word count taken from the spaces left
+- blocks     normalize_blocks over the block-split text: text, word count
+             and character count in one str.split() pass
+
+It checks that all three keep the same non-whitespace characters in the same
+order, and reports the word counts, where they differ by the words the old
+cleanup glued together across block boundaries ('<td>a</td><td>b</td>' ->
+'ab').
+
+Usage: python benchmarks/textnorm_benchmark.py [--parser lxml] [--large-mb 4] [--repeat N] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_benchmark import BASE_URL, build_large_page
+from parsers import extract_page
+from pipeline_benchmark import load_versioned_corpus
+from textnorm import normalize_blocks
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def legacy_clean(text):
+    """The cleanup the scrape functions used, with its word and character counts"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    clean_text = ' '.join(chunk for chunk in chunks if chunk)
+    return {'text': clean_text, 'word_count': len(clean_text.split()), 'character_count': len(clean_text)}
+
+
+def regex_clean(blocks):
+    """normalize_blocks done with a regex substitution instead of split()"""
+    text = WHITESPACE_RE.sub(' ', ' '.join(blocks)).strip()
+    return {'text': text, 'word_count': text.count(' ') + 1 if text else 0, 'character_count': len(text)}
+
+
+def timed(func, arg, repeat):
+    """(last result, best milliseconds of repeat calls)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parser', default='lxml', help='parser backend to extract with')
+    parser.add_argument('--large-mb', type=float, default=4, help='size of the synthetic listing, 0 to skip')
+    parser.add_argument('--repeat', type=int, default=10, help='runs per page (best is reported)')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    _, pages = load_versioned_corpus()
+    if args.large_mb > 0:
+        pages['listing'] = build_large_page(args.large_mb)
+
+    print(f"🧹 Text cleanup ({args.parser} extraction, best of {args.repeat})")
+    print("=" * 92)
+    print(f"{'page':<13}{'text':>9}{'legacy':>11}{'regex':>11}{'blocks':>11}{'legacy words':>15}{'block words':>14}")
+    results = []
+    for name, html in pages.items():
+        page = extract_page(html, BASE_URL, parser=args.parser)
+        old, old_ms = timed(legacy_clean, page['text'], args.repeat)
+        regex, regex_ms = timed(regex_clean, page['text_blocks'], args.repeat)
+        new, new_ms = timed(normalize_blocks, page['text_blocks'], args.repeat)
+        if ''.join(old['text'].split()) != ''.join(new['text'].split()):
+            raise RuntimeError(f'{name}: the cleanups kept different characters')
+        if regex != new:
+            raise RuntimeError(f'{name}: regex and split() normalization differ')
+
+        results.append({'page': name, 'text_chars': len(page['text']), 'legacy_ms': round(old_ms, 3),
+                        'regex_ms': round(regex_ms, 3), 'blocks_ms': round(new_ms, 3), 'legacy_words': old['word_count'],
+                        'block_words': new['word_count']})
+        print(f"{name:<13}{len(page['text']) / 1024:>7.0f}KB{old_ms:>9.2f}ms{regex_ms:>9.2f}ms{new_ms:>9.2f}ms"
+              f"{old['word_count']:>15,}{new['word_count']:>14,}")
+    print("=" * 92)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'parser': args.parser, 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tiny, randomly initialised stand-ins for the app's Hugging Face pipelines
+
+The real models (BART-large-CNN, twitter-roberta) are gigabytes and need a
+network download. These build in well under a second from the benchmark
+corpus: a word-level tokenizer, a 2-layer BART and a 1-layer BERT classifier.
+The outputs are nonsense, but the call signatures and output shapes match the
+summarization and text-classification pipelines, and batching and padding
+behave like the real thing, only scaled down.
+
+Usage: python benchmarks/tiny_models.py   (prints a sample of each)
+"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+from transformers import (BartConfig, BartForConditionalGeneration, BertConfig, BertForSequenceClassification,
+                          PreTrainedTokenizerFast, pipeline)
+
+from extraction_benchmark import load_corpus
+
+SPECIAL_TOKENS = ['<s>', '<pad>', '</s>', '<unk>', '<mask>']
+
+
+def corpus_texts():
+    """Plain-text paragraphs from the benchmark corpus"""
+    texts = []
+    for html in load_corpus().values():
+        text = re.sub(r'<[^>]+>', ' ', html.decode('utf-8', 'replace'))
+        texts.extend(line.strip() for line in text.splitlines() if len(line.strip()) > 20)
+    return texts
+
+
+def build_tokenizer(texts=None):
+    """Word-level tokenizer trained on texts (the corpus by default)"""
+    tokenizer = Tokenizer(models.WordLevel(unk_token='<unk>'))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(texts or corpus_texts(), trainers.WordLevelTrainer(special_tokens=SPECIAL_TOKENS))
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single='<s> $A </s>', special_tokens=[('<s>', 0), ('</s>', 2)]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, bos_token='<s>', eos_token='</s>', pad_token='<pad>',
+        unk_token='<unk>', mask_token='<mask>', model_max_length=1024
+    )
+
+
+class TinySummarizer:
+    """Callable with the summarization pipeline's interface, backed by a tiny BART"""
+
+    def __init__(self, tokenizer, d_model=64, layers=2, seed=0):
+        torch.manual_seed(seed)
+        config = BartConfig(
+            vocab_size=len(tokenizer), d_model=d_model, encoder_layers=layers, decoder_layers=layers,
+            encoder_attention_heads=4, decoder_attention_heads=4, encoder_ffn_dim=d_model * 4,
+            decoder_ffn_dim=d_model * 4, max_position_embeddings=1024,
+            pad_token_id=1, bos_token_id=0, eos_token_id=2, decoder_start_token_id=2
+        )
+        self.tokenizer = tokenizer
+        self.model = BartForConditionalGeneration(config).eval()
+        self.name = f'tiny-bart-{d_model}x{layers}'
+
+    def __call__(self, texts, max_length=130, min_length=30, do_sample=False, batch_size=None, truncation=True, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batch_size = batch_size or 1
+        summaries = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(texts[i:i + batch_size], return_tensors='pt', padding=True, truncation=truncation)
+            with torch.inference_mode():
+                output = self.model.generate(**encoded, max_length=max_length, min_length=min_length,
+                                             do_sample=do_sample, num_beams=1)
+            summaries.extend({'summary_text': text}
+                             for text in self.tokenizer.batch_decode(output, skip_special_tokens=True))
+        return summaries
+
+
+def build_summarizer(tokenizer=None, **kwargs):
+    return TinySummarizer(tokenizer or build_tokenizer(), **kwargs)
+
+
+def build_classifier(tokenizer=None, hidden_size=64, layers=1, seed=0):
+    """A real text-classification pipeline around a small BERT (1 layer by default) with three labels"""
+    tokenizer = tokenizer or build_tokenizer()
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(tokenizer), hidden_size=hidden_size, num_hidden_layers=layers, num_attention_heads=4,
+        intermediate_size=hidden_size * 4, max_position_embeddings=1024, num_labels=3,
+        id2label={0: 'negative', 1: 'neutral', 2: 'positive'}, label2id={'negative': 0, 'neutral': 1, 'positive': 2}
+    )
+    return pipeline('text-classification', model=BertForSequenceClassification(config).eval(), tokenizer=tokenizer)
+
+
+if __name__ == '__main__':
+    tokenizer = build_tokenizer()
+    text = ' '.join(corpus_texts()[:5])
+    print(f"🧪 Tiny models (vocab {len(tokenizer)} words)")
+    print("=" * 50)
+    print(f"Summary:   {build_summarizer(tokenizer)(text, max_length=20, min_length=5)[0]['summary_text'][:60]}...")
+    print(f"Sentiment: {build_classifier(tokenizer)(text[:512])[0]}")
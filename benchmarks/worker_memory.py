@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory of crawl4ai_app under gunicorn, with and without preload
+
+Saves randomly initialised stand-in checkpoints (a BERT classifier and a BART
+summarizer, sized with --hidden / --layers) to a temporary directory, points
+SUMMARIZER_MODEL / CLASSIFIER_MODEL at them and starts the app under
+`gunicorn -c gunicorn.conf.py` with N workers in two modes:
+
+- preload: models loaded once in the master, workers forked afterwards
+- per-worker: GUNICORN_PRELOAD=false, every worker loads its own copy at boot
+
+The gunicorn target is this module, which re-exports crawl4ai_app.app and
+wraps initialize_models() with one warm-up call per model, so the weights have
+actually been read (transformers may map safetensors files lazily) and the
+numbers are those of a worker that has served traffic.
+
+Once every process has loaded, RSS, PSS (each shared page split between the
+processes sharing it) and private memory are read from
+/proc/<pid>/smaps_rollup for the master and each worker. Total PSS is what
+the deployment really costs; its growth per extra worker is the number that
+decides how many workers fit on a box. Linux only.
+
+Usage: python benchmarks/worker_memory.py [--workers 1,2,4] [--hidden 768] [--layers 8]
+                                          [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+import crawl4ai_app
+from startup_benchmark import ROOT, free_port
+
+MODES = {'preload': 'true', 'per-worker': 'false'}
+WARMUP_TEXT = 'A short paragraph of page text used to warm up the models after loading.'
+
+# gunicorn target (worker_memory:app)
+app = crawl4ai_app.app
+
+
+def initialize_models():
+    """crawl4ai_app.initialize_models(), then one call per loaded model"""
+    crawl4ai_app.initialize_models()
+    for model in (crawl4ai_app.summarizer, crawl4ai_app.content_classifier):
+        if model.loaded:
+            model([WARMUP_TEXT], batch_size=1)
+
+
+def save_checkpoints(directory, hidden, layers):
+    """Write the stand-in classifier and summarizer; returns (summarizer dir, classifier dir, MB of weights)"""
+    # torch and transformers are only needed here, not in the gunicorn target
+    from tiny_models import build_classifier, build_summarizer, build_tokenizer
+
+    tokenizer = build_tokenizer()
+    classifier = build_classifier(tokenizer, hidden_size=hidden, layers=layers)
+    summarizer = build_summarizer(tokenizer, d_model=hidden, layers=max(1, layers // 2))
+
+    classifier_dir = os.path.join(directory, 'classifier')
+    summarizer_dir = os.path.join(directory, 'summarizer')
+    classifier.save_pretrained(classifier_dir)
+    summarizer.model.save_pretrained(summarizer_dir)
+    tokenizer.save_pretrained(summarizer_dir)
+
+    size = sum(p.numel() * p.element_size()
+               for model in (classifier.model, summarizer.model) for p in model.parameters())
+    return summarizer_dir, classifier_dir, size / 1024 / 1024
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory(pid):
+    """RSS, PSS and private memory of pid in MB, from smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': round(fields['Rss'], 1),
+        'pss_mb': round(fields['Pss'], 1),
+        'private_mb': round(fields['Private_Clean'] + fields['Private_Dirty'], 1)
+    }
+
+
+def wait_until_loaded(process, log_path, mode, workers, timeout):
+    """Block until the master (preload) or every worker (per-worker) reports its models loaded"""
+    expected = 1 if mode == 'preload' else workers
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {process.returncode}, see {log_path}')
+        with open(log_path) as f:
+            log = f.read()
+        if log.count('Models loaded in') + log.count('Error loading models in') >= expected \
+                and len(children(process.pid)) == workers:
+            return
+        time.sleep(0.2)
+    raise TimeoutError(f'models not loaded after {timeout}s, see {log_path}')
+
+
+def measure(mode, workers, model_dirs, directory, timeout=300):
+    """Start gunicorn in mode with workers workers; returns memory per process plus model status"""
+    port = free_port()
+    log_path = os.path.join(directory, f'gunicorn-{mode}-{workers}.log')
+    env = dict(os.environ, GUNICORN_PRELOAD=MODES[mode], MODEL_PRELOAD='true',
+               SUMMARIZER_MODEL=model_dirs[0], CLASSIFIER_MODEL=model_dirs[1],
+               LLM_CACHE_PATH='', OMP_NUM_THREADS='1')
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers),
+             '-b', f'127.0.0.1:{port}', '--pythonpath', os.path.join(ROOT, 'benchmarks'), 'worker_memory:app'],
+            stdout=log, stderr=subprocess.STDOUT, cwd=ROOT, env=env
+        )
+    try:
+        wait_until_loaded(process, log_path, mode, workers, timeout)
+        status = requests.get(f'http://127.0.0.1:{port}/api/health', timeout=30).json()['models']
+        # Let the workers settle (imports triggered by the first request, GC) before reading
+        time.sleep(1)
+        master = memory(process.pid)
+        worker_memory = [memory(pid) for pid in children(process.pid)]
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        'master': master,
+        'workers': worker_memory,
+        'total_pss_mb': round(master['pss_mb'] + sum(w['pss_mb'] for w in worker_memory), 1),
+        'total_rss_mb': round(master['rss_mb'] + sum(w['rss_mb'] for w in worker_memory), 1),
+        'models': status
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated worker counts')
+    parser.add_argument('--hidden', type=int, default=768, help='hidden size of the stand-in models')
+    parser.add_argument('--layers', type=int, default=8, help='classifier layers (the summarizer gets half)')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        summarizer_dir, classifier_dir, weights_mb = save_checkpoints(directory, args.hidden, args.layers)
+
+        print(f"🧠 Worker memory benchmark ({weights_mb:.0f} MB of stand-in weights)")
+        print("=" * 78)
+        print(f"{'mode':<12}{'workers':>8}{'master PSS':>12}{'worker PSS':>12}{'worker priv':>13}"
+              f"{'total PSS':>11}{'total RSS':>11}")
+        results = {'weights_mb': round(weights_mb, 1), 'runs': []}
+        status = None
+        for workers in [int(n) for n in args.workers.split(',')]:
+            for mode in MODES:
+                run = measure(mode, workers, (summarizer_dir, classifier_dir), directory)
+                results['runs'].append(dict(run, mode=mode, worker_count=workers))
+                status = run['models']
+                worker_pss = sum(w['pss_mb'] for w in run['workers']) / workers
+                worker_private = sum(w['private_mb'] for w in run['workers']) / workers
+                print(f"{mode:<12}{workers:>8}{run['master']['pss_mb']:>10.0f}MB{worker_pss:>10.0f}MB"
+                      f"{worker_private:>11.0f}MB{run['total_pss_mb']:>9.0f}MB{run['total_rss_mb']:>9.0f}MB")
+        print("=" * 78)
+        print(f"Model status in the workers: {status}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Warm pool of headless Chrome drivers for the Selenium scrape paths
+
+Launching Chrome (and resolving chromedriver through webdriver_manager) on
+every dynamic scrape costs several seconds. BrowserPool keeps up to
+BROWSER_POOL_SIZE long-lived drivers and leases them out per request:
+
+- the chromedriver binary is resolved once per process
+- each lease runs in a fresh tab that is closed afterwards, and browser
+  cookies are cleared, so requests don't see each other's state
+- drivers are retired after BROWSER_MAX_USES leases or as soon as they stop
+  responding, and replaced on demand
+- the pool size caps the number of Chrome processes (and so memory); callers
+  wait up to BROWSER_LEASE_TIMEOUT seconds for a free driver
+"""
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# selenium.webdriver and webdriver_manager are imported when the first
+# browser is launched, not at app start-up
+from selenium.common.exceptions import WebDriverException
+
+from metrics import stage
+
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', 2))
+BROWSER_MAX_USES = int(os.getenv('BROWSER_MAX_USES', 50))
+BROWSER_LEASE_TIMEOUT = float(os.getenv('BROWSER_LEASE_TIMEOUT', 30))
+BROWSER_POOL_PREWARM = int(os.getenv('BROWSER_POOL_PREWARM', 0))
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def driver_path():
+    """Resolve the chromedriver binary once per process (CHROMEDRIVER_PATH overrides)"""
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                _driver_path = os.getenv('CHROMEDRIVER_PATH')
+                if not _driver_path:
+                    from webdriver_manager.chrome import ChromeDriverManager
+                    _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+def chrome_options():
+    """Headless Chrome options used by every pooled driver"""
+    from selenium.webdriver.chrome.options import Options
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    # driver.get() returns at DOMContentLoaded; readiness.wait_for_page decides the rest
+    options.page_load_strategy = 'eager'
+    # Network events for the network_idle wait strategy
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+class PooledDriver:
+    """A long-lived driver plus the bookkeeping the pool needs"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.base_handle = driver.current_window_handle
+
+    def is_alive(self):
+        try:
+            self.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def begin(self):
+        """Open a fresh tab for one lease"""
+        self.driver.switch_to.new_window('tab')
+        # Drop performance log entries left over from earlier leases
+        try:
+            self.driver.get_log('performance')
+        except WebDriverException:
+            pass
+
+    def end(self):
+        """Close the lease's tab and clear cookies; False if the driver is broken"""
+        try:
+            if self.driver.current_window_handle != self.base_handle:
+                self.driver.close()
+            self.driver.switch_to.window(self.base_handle)
+            self.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            return True
+        except WebDriverException:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """Bounded pool of warm Chrome drivers, leased per request"""
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_uses=BROWSER_MAX_USES, lease_timeout=BROWSER_LEASE_TIMEOUT):
+        self.size = size
+        self.max_uses = max_uses
+        self.lease_timeout = lease_timeout
+        self.idle = []
+        self.live = 0  # idle + leased drivers
+        self.condition = threading.Condition()
+        self.counters = {'leases': 0, 'launched': 0, 'recycled': 0, 'crashed': 0}
+
+    def _launch(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        driver = webdriver.Chrome(service=Service(driver_path()), options=chrome_options())
+        with self.condition:
+            self.counters['launched'] += 1
+        return PooledDriver(driver)
+
+    def _retire(self, pooled, reason):
+        pooled.quit()
+        with self.condition:
+            self.live -= 1
+            self.counters[reason] += 1
+            self.condition.notify()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.lease_timeout
+        while True:
+            with self.condition:
+                while not self.idle and self.live >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f'No browser available within {self.lease_timeout:g}s')
+                    self.condition.wait(remaining)
+                pooled = self.idle.pop() if self.idle else None
+                if pooled is None:
+                    self.live += 1
+
+            if pooled is None:
+                try:
+                    return self._launch()
+                except Exception:
+                    with self.condition:
+                        self.live -= 1
+                        self.condition.notify()
+                    raise
+
+            # Idle drivers can die (Chrome crash, OOM kill) while parked
+            if pooled.is_alive():
+                return pooled
+            self._retire(pooled, 'crashed')
+
+    def _release(self, pooled, healthy):
+        pooled.uses += 1
+        if not healthy:
+            self._retire(pooled, 'crashed')
+        elif pooled.uses >= self.max_uses:
+            self._retire(pooled, 'recycled')
+        else:
+            with self.condition:
+                self.idle.append(pooled)
+                self.condition.notify()
+
+    @contextmanager
+    def lease(self):
+        """Borrow a driver in a fresh tab for the duration of the with block"""
+        with stage('browser_acquire'):
+            pooled = self._acquire()
+        with self.condition:
+            self.counters['leases'] += 1
+        healthy = False
+        try:
+            with stage('browser_acquire'):
+                pooled.begin()
+            yield pooled.driver
+            healthy = True
+        except Exception:
+            # Page errors leave the driver usable; a dead browser does not
+            healthy = pooled.is_alive()
+            raise
+        finally:
+            if healthy:
+                healthy = pooled.end()
+            self._release(pooled, healthy)
+
+    def warm(self, count=BROWSER_POOL_PREWARM):
+        """Resolve chromedriver and pre-launch up to count drivers"""
+        try:
+            driver_path()
+            for _ in range(min(count, self.size)):
+                with self.condition:
+                    if self.live >= self.size:
+                        break
+                    self.live += 1
+                try:
+                    pooled = self._launch()
+                except Exception:
+                    with self.condition:
+                        self.live -= 1
+                    raise
+                with self.condition:
+                    self.idle.append(pooled)
+                    self.condition.notify()
+        except Exception as e:
+            print(f"Error warming browser pool: {e}")
+
+    def stats(self):
+        with self.condition:
+            stats = dict(self.counters)
+            stats['size'] = self.size
+            stats['live'] = self.live
+            stats['idle'] = len(self.idle)
+        return stats
+
+    def close(self):
+        with self.condition:
+            drivers, self.idle = self.idle, []
+            self.live -= len(drivers)
+        for pooled in drivers:
+            pooled.quit()
+
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def browser_pool():
+    """Return the process-wide BrowserPool, creating it on first use"""
+    global _browser_pool
+    if _browser_pool is None:
+        with _browser_pool_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool()
+                atexit.register(_browser_pool.close)
+    return _browser_pool
@@ -1,66 +1,81 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
-import os
 import json
-import requests
-from bs4 import BeautifulSoup
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
 from dotenv import load_dotenv
 import time
 import threading
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import asyncio
-import aiohttp
-from urllib.parse import urljoin, urlparse
-import re
+from functools import partial
+from batch import BATCH_MAX_CONCURRENCY, BATCH_MAX_URLS, BATCH_PER_HOST, BatchScraper, stream_async
+from crawler import CRAWL_CONCURRENCY, CRAWL_HOST_DELAY, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, CRAWL_PER_HOST, Crawler, normalize_url
+from extractor import BASIC_HANDLERS, METADATA_HANDLERS, PageExtractor, field_extractor, resolve_fields, select_fields
+from browser_pool import browser_pool
+from readiness import resolve_strategy, resolve_timeout, wait_for_page
+from http_pool import FETCH_CHUNK_SIZE, shared_pool
+from http_cache import http_cache
+from parsers import DEFAULT_PARSER, IncrementalParser, content_type_charset, extract_page, get_parser
+from textnorm import normalize_blocks
+from links import LinkCollector, join_url, url_cache_stats
+from near_duplicates import near_duplicate_index
+from result_store import parse_results_query, result_store
+from jobs import JobManager, QueueFull
+from serialization import api_response
+from metrics import registry, requests_tracker, stage
+from inference import InferenceServer
+from llm_cache import LLMCache
+from summarize import summarize_document
+from models import (CLASSIFIER_BACKEND, CLASSIFIER_MODEL, MODEL_PRELOAD, SUMMARIZER_BACKEND, SUMMARIZER_MODEL, LazyModel,
+                    load_pipeline, model_key)
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
-# Global variables for LLM model
-llm_model = None
-tokenizer = None
-summarizer = None
-content_classifier = None
+# Hugging Face models, loaded on first use (transformers and torch are only
+# imported then)
+summarizer = LazyModel('summarizer', partial(load_pipeline, "summarization", SUMMARIZER_MODEL, SUMMARIZER_BACKEND))
+content_classifier = LazyModel('classifier',
+                               partial(load_pipeline, "text-classification", CLASSIFIER_MODEL, CLASSIFIER_BACKEND))
+
+# Micro-batches summarizer and classifier requests off the request threads,
+# with a content-hash cache in front
+inference = InferenceServer(cache=LLMCache())
+inference.register('summarizer', summarizer, model_id=model_key(SUMMARIZER_MODEL, SUMMARIZER_BACKEND))
+inference.register('classifier', content_classifier, model_id=model_key(CLASSIFIER_MODEL, CLASSIFIER_BACKEND))
+
+# Title, text, links and images only, for the Selenium path
+basic_extractor = PageExtractor(BASIC_HANDLERS)
+
+# Bounded worker pool for /api/jobs
+job_manager = JobManager()
 
 def initialize_models():
-    """Initialize Hugging Face models"""
-    global llm_model, tokenizer, summarizer, content_classifier
-    
+    """Load the Hugging Face models now instead of on first use; returns {model name: error} for failed loads"""
     print("Loading Hugging Face models...")
     
-    try:
-        # Load a text classification model for content categorization
-        model_name = "distilbert-base-uncased"
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        llm_model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        
-        # Load a summarization model
-        summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-        
-        # Load a text classification model for content type detection
-        content_classifier = pipeline("text-classification", model="cardiffnlp/twitter-roberta-base-sentiment")
-        
-        print("Models loaded successfully!")
-    except Exception as e:
-        print(f"Error loading models: {e}")
+    # Summarization model, then the text classification model for content
+    # type detection; one failing to load does not stop the other
+    failures = {}
+    for model in (summarizer, content_classifier):
+        try:
+            model.get()
+        except Exception as e:
+            failures[model.name] = str(e)
+            print(f"Error loading {model.name} model: {e}")
+    
+    print("Some models failed to load" if failures else "Models loaded successfully!")
+    return failures
 
 class Crawl4AIScraper:
     """Enhanced web scraper with Crawl4AI-inspired features"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, pool=None, cache=None):
+        # Process-wide keep-alive pool shared by every scraper and thread
+        self.pool = pool or shared_pool()
+        # On-disk response cache with ETag / Last-Modified revalidation
+        self.cache = cache or http_cache()
+        self.extractor = PageExtractor()
+        self.metadata_extractor = PageExtractor(METADATA_HANDLERS)
     
     def extract_metadata(self, soup, url):
         """Extract comprehensive metadata from the page"""
@@ -116,7 +131,7 @@ class Crawl4AIScraper:
         # Canonical URL
         canonical = soup.select_one('link[rel="canonical"]')
         if canonical and canonical.get('href'):
-            metadata['canonical_url'] = urljoin(url, canonical['href'])
+            metadata['canonical_url'] = join_url(url, canonical['href'])
         
         # Structured data (JSON-LD)
         structured_scripts = soup.find_all('script', type='application/ld+json')
@@ -233,7 +248,7 @@ class Crawl4AIScraper:
         for img in images:
             src = img.get('src', '')
             if src:
-                full_url = urljoin(base_url, src)
+                full_url = join_url(base_url, src)
                 media['images'].append({
                     'src': full_url,
                     'alt': img.get('alt', ''),
@@ -247,7 +262,7 @@ class Crawl4AIScraper:
         for video in videos:
             src = video.get('src', '')
             if src:
-                full_url = urljoin(base_url, src)
+                full_url = join_url(base_url, src)
                 media['videos'].append({
                     'src': full_url,
                     'type': video.get('type', ''),
@@ -259,7 +274,7 @@ class Crawl4AIScraper:
         for audio in audio_elements:
             src = audio.get('src', '')
             if src:
-                full_url = urljoin(base_url, src)
+                full_url = join_url(base_url, src)
                 media['audio'].append({
                     'src': full_url,
                     'controls': audio.get('controls') is not None
@@ -270,7 +285,7 @@ class Crawl4AIScraper:
         for iframe in iframes:
             src = iframe.get('src', '')
             if src:
-                full_url = urljoin(base_url, src)
+                full_url = join_url(base_url, src)
                 media['iframes'].append({
                     'src': full_url,
                     'title': iframe.get('title', ''),
@@ -281,7 +296,7 @@ class Crawl4AIScraper:
         return media
     
     def extract_links(self, soup, base_url):
-        """Extract and categorize links"""
+        """Extract and categorize links, deduplicated with counts"""
         links = {
             'internal': [],
             'external': [],
@@ -292,153 +307,226 @@ class Crawl4AIScraper:
         
         all_links = soup.find_all('a', href=True)
         
+        # Resolved through the shared URL cache, one entry per URL with a count
+        collector = LinkCollector(base_url, links)
         for link in all_links:
             href = link.get('href')
-            text = link.get_text().strip()
             
             if not href or href.startswith('#'):
                 continue
             
-            full_url = urljoin(base_url, href)
-            parsed_url = urlparse(full_url)
-            
-            # Categorize links
-            if parsed_url.netloc == urlparse(base_url).netloc:
-                links['internal'].append({
-                    'url': full_url,
-                    'text': text,
-                    'title': link.get('title', '')
-                })
-            else:
-                links['external'].append({
-                    'url': full_url,
-                    'text': text,
-                    'title': link.get('title', '')
-                })
-            
-            # Social media links
-            social_patterns = ['facebook', 'twitter', 'instagram', 'linkedin', 'youtube']
-            if any(pattern in full_url.lower() for pattern in social_patterns):
-                links['social'].append({
-                    'url': full_url,
-                    'text': text,
-                    'platform': next((p for p in social_patterns if p in full_url.lower()), 'other')
-                })
+            # Categorize links (internal/external, plus social by host)
+            entries = collector.add(href, link.get('title', ''))
+            LinkCollector.set_text(entries, link.get_text().strip())
         
         return links
     
-    def scrape_with_requests(self, url):
-        """Enhanced scraping using requests"""
+    def scrape_with_requests(self, url, parser=None, fields=None):
+        """Enhanced scraping using requests; fields (from resolve_fields) limits what is extracted"""
         try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
+            response, cache_status = self.cache.fetch(self.pool, url, timeout=15)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Unchanged page (fresh or 304): reuse the result parsed last time
+            variant = f'crawl4ai:{parser or DEFAULT_PARSER}'
+            if fields is not None:
+                variant += ':' + ','.join(fields)
+            page = self.cache.reuse_parsed(response, cache_status, variant)
+            if page is None:
+                page = self.build_page(url, response.content, response.status_code,
+                                       response.headers.get('content-type', ''), response.encoding, parser, fields)
+                if 'error' not in page:
+                    self.cache.remember_parsed(response, variant, page)
+            
+            return dict(page, cache=cache_status)
+            
+        except Exception as e:
+            return {'error': str(e)}
+    
+    def scrape_metadata(self, url):
+        """<head> metadata only: the page is parsed as it downloads and the download stops after </head>"""
+        try:
+            # Made once the headers are in, so the Content-Type charset decodes the body
+            parser = None
+
+            def start(headers):
+                nonlocal parser
+                parser = IncrementalParser(self.metadata_extractor.start(url), stop_after_head=True,
+                                           encoding=content_type_charset(headers.get('content-type')))
+
+            response, cache_status = self.cache.fetch(self.pool, url, on_chunk=lambda chunk: parser.feed(chunk),
+                                                      on_headers=start, timeout=15)
+            downloaded = len(response.content) if cache_status in ('miss', 'bypass') else 0
             
-            # Remove script and style elements
-            for script in soup(["script", "style", "noscript"]):
-                script.decompose()
+            variant = 'crawl4ai:metadata'
+            page = self.cache.reuse_parsed(response, cache_status, variant)
+            if page is None:
+                if parser is None:
+                    # Stored body (hit or 304): stop at </head> all the same
+                    start(response.headers)
+                    content = response.content
+                    for offset in range(0, len(content), FETCH_CHUNK_SIZE):
+                        if parser.feed(content[offset:offset + FETCH_CHUNK_SIZE]):
+                            break
+                page = {
+                    'url': url,
+                    'status_code': response.status_code,
+                    'content_type': response.headers.get('content-type', ''),
+                    'encoding': response.encoding,
+                    'metadata': parser.close()['metadata']
+                }
+                self.cache.remember_parsed(response, variant, page)
             
-            # Extract comprehensive data
-            metadata = self.extract_metadata(soup, url)
-            content_blocks = self.extract_content_blocks(soup)
-            media = self.extract_media(soup, url)
-            links = self.extract_links(soup, url)
+            return dict(page, bytes_downloaded=downloaded, complete=response.complete, cache=cache_status)
             
-            # Get clean text
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            clean_text = ' '.join(chunk for chunk in chunks if chunk)
+        except Exception as e:
+            return {'error': str(e)}
+    
+    def build_page(self, url, content, status_code, content_type, encoding, parser=None, fields=None):
+        """Build the scrape result for a downloaded page
+
+        With fields (from resolve_fields) only the handlers for those fields
+        run and only those sections are returned.
+        """
+        try:
+            # The Content-Type charset, not the transport's guess (requests assumes
+            # ISO-8859-1 for text/* without one), decides how the bytes are decoded
+            charset = content_type_charset(content_type)
+            # Parse and extract comprehensive data in a single pass
+            # (script, style and noscript subtrees are skipped)
+            if fields is None:
+                page = extract_page(content, url, self.extractor, parser, charset)
+                sections = {
+                    'metadata': page['metadata'],
+                    'content_blocks': page['content_blocks'],
+                    'media': page['media'],
+                    'links': page['links'],
+                    'text': page['text']
+                }
+                if 'main_content' in page:
+                    sections['main_content'] = page['main_content']
+            else:
+                page = extract_page(content, url, field_extractor(fields), parser, charset)
+                sections = select_fields(page, fields)
             
-            return {
+            result = {
                 'url': url,
-                'status_code': response.status_code,
-                'content_type': response.headers.get('content-type', ''),
-                'encoding': response.encoding,
-                'metadata': metadata,
-                'content_blocks': content_blocks,
-                'media': media,
-                'links': links,
-                'text': clean_text,
-                'word_count': len(clean_text.split()),
-                'character_count': len(clean_text)
+                'status_code': status_code,
+                'content_type': content_type,
+                'encoding': encoding
             }
+            result.update(sections)
+            
+            # Get clean text, with word and character counts from the same pass
+            if 'text' in sections:
+                with stage('clean_text'):
+                    result.update(normalize_blocks(page['text_blocks']))
+            
+            # The same for the main content (article body) picked out during the parse
+            if 'main_content' in sections:
+                with stage('clean_text'):
+                    result['main_content'] = main_content_section(page['main_content'])
+            
+            return result
             
         except Exception as e:
             return {'error': str(e)}
 
-def scrape_with_selenium(url):
+# Shared by all requests so connections are reused across scrapes
+scraper = Crawl4AIScraper()
+
+def scrape_with_selenium(url, parser=None, wait=None, wait_selector=None, wait_timeout=None):
     """Scrape website using Selenium for dynamic content"""
     try:
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        driver = webdriver.Chrome(ChromeDriverManager().install(), options=chrome_options)
-        
-        driver.get(url)
-        
-        # Wait for page to load
-        time.sleep(3)
-        
-        # Get page source
-        page_source = driver.page_source
-        
-        # Extract text content
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
+        # Lease a warm browser (fresh tab) instead of launching Chrome per request
+        with browser_pool().lease() as driver:
+            with stage('navigate'):
+                driver.get(url)
+            
+            # Wait until the page is ready (readyState, network idle, selector
+            # or DOM quiescence), up to a hard ceiling
+            with stage('wait'):
+                wait_info = wait_for_page(driver, wait, wait_selector, wait_timeout)
+            
+            # Get page source
+            with stage('page_source'):
+                page_source = driver.page_source
         
-        # Get text content
-        text = soup.get_text()
+        # Extract text content (script, style and noscript are skipped)
+        page = extract_page(page_source, url, basic_extractor, parser)
         
         # Clean up text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        driver.quit()
+        with stage('clean_text'):
+            text = normalize_blocks(page['text_blocks'])['text']
+            main = main_content_section(page['main_content']) if 'main_content' in page else None
         
-        return {
+        result = {
             'url': url,
-            'title': soup.title.string if soup.title else 'No title',
+            'title': page['metadata']['title'] or 'No title',
             'text': text,
-            'links': [a.get('href') for a in soup.find_all('a', href=True)],
-            'images': [img.get('src') for img in soup.find_all('img', src=True)]
+            'links': page['hrefs'],
+            'images': page['image_srcs'],
+            'wait': wait_info
         }
+        if main is not None:
+            result['main_content'] = main
+        return result
         
     except Exception as e:
         return {'error': str(e)}
 
+def main_content_section(main):
+    """Clean text and counts of the main content found by the extractor, with the container it came from"""
+    section = normalize_blocks(main['text_blocks'])
+    section['container'] = main['container']
+    return section
+
 def structure_content_with_llm(content):
     """Enhanced LLM processing with content classification"""
     try:
         if not content or 'text' not in content:
             return {'error': 'No content to process'}
         
-        text = content['text']
-        
-        # Truncate text if too long for model
-        if len(text) > 1000:
-            text = content['text'][:1000] + "..."
-        
-        # Generate summary
-        summary = summarizer(text, max_length=130, min_length=30, do_sample=False)
-        
-        # Classify content sentiment (if classifier is available)
-        sentiment = "neutral"
-        if content_classifier:
-            try:
-                sentiment_result = content_classifier(text[:512])  # Limit for classification
-                sentiment = sentiment_result[0]['label']
-            except:
-                pass
+        # The models get the article body when one was found, not the
+        # navigation, banners and footers around it
+        text = (content.get('main_content') or {}).get('text') or content['text']
+        
+        # Near-duplicate of a page analyzed before (pagination, tag page,
+        # printer view): reuse its summary and sentiment, or skip the models
+        index = near_duplicate_index()
+        with stage('fingerprint'):
+            fingerprint, duplicate = index.check(text)
+        
+        # Only set when the earlier page's result stands in for this one
+        near_duplicate_of = None
+        if duplicate is not None and duplicate['result'] is not None and index.mode == 'reuse':
+            index.count('reused')
+            summary = duplicate['result']['summary']
+            sentiment = duplicate['result']['sentiment']
+            near_duplicate_of = {'url': duplicate['url'], 'distance': duplicate['distance']}
+        elif duplicate is not None and index.mode == 'skip':
+            index.count('skipped')
+            near_duplicate_of = {'url': duplicate['url'], 'distance': duplicate['distance']}
+            summary = {'summary': ''}
+            sentiment = None
+        else:
+            # Summarize the whole text: token-budgeted chunks, summarized as one
+            # batch on the inference worker, then reduced to a single summary
+            with stage('summarize'):
+                tokenizer = getattr(summarizer.get(), 'tokenizer', None)
+                summary = summarize_document(inference, text, tokenizer=tokenizer, max_length=130, min_length=30, do_sample=False)
+            
+            # Classify content sentiment (if classifier is available)
+            sentiment = "neutral"
+            if inference.available('classifier'):
+                try:
+                    with stage('sentiment'):
+                        sentiment_result = inference.run('classifier', text[:512])  # Limit for classification
+                    sentiment = sentiment_result[0]['label']
+                except Exception as e:
+                    print(f"Sentiment analysis failed: {e}")
+            
+            if fingerprint is not None:
+                index.add(fingerprint, content.get('url', ''), {'summary': summary, 'sentiment': sentiment})
         
         # Analyze content structure
         content_analysis = {
@@ -455,12 +543,14 @@ def structure_content_with_llm(content):
             'url': content.get('url', ''),
             'title': content.get('metadata', {}).get('title', ''),
             'description': content.get('metadata', {}).get('description', ''),
-            'summary': summary[0]['summary_text'],
+            'summary': summary['summary'],
+            'summary_stats': {key: value for key, value in summary.items() if key != 'summary'},
             'sentiment': sentiment,
             'content_analysis': content_analysis,
             'statistics': {
                 'word_count': content.get('word_count', 0),
                 'character_count': content.get('character_count', 0),
+                'main_content_word_count': (content.get('main_content') or {}).get('word_count', 0),
                 'headings_count': len(content.get('content_blocks', {}).get('headings', [])),
                 'paragraphs_count': len(content.get('content_blocks', {}).get('paragraphs', [])),
                 'images_count': len(content.get('media', {}).get('images', [])),
@@ -470,6 +560,8 @@ def structure_content_with_llm(content):
             },
             'processing_timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         }
+        if near_duplicate_of is not None:
+            structured_data['near_duplicate_of'] = near_duplicate_of
         
         return structured_data
         
@@ -480,48 +572,304 @@ def structure_content_with_llm(content):
 def index():
     return render_template('index.html')
 
+def parse_scrape_request(data):
+    """Validate a scrape request body; raises ValueError with a message for the client"""
+    data = data or {}
+    params = {
+        'url': data.get('url'),
+        'method': data.get('method', 'requests'),
+        'parser': data.get('parser'),  # 'html.parser', 'lxml' or 'selectolax'
+        # The full scraped page next to structured_data; left out by default to keep responses small
+        'include_raw': bool(data.get('include_raw')),
+        # <head> metadata only, without downloading the rest of the page (requests only)
+        'metadata_only': bool(data.get('metadata_only')),
+        # Sections to extract and return, e.g. ['metadata', 'text']; all of them by default
+        'fields': data.get('fields'),
+        # Add a per-stage timings breakdown (milliseconds) to the response
+        'debug': bool(data.get('debug')),
+        # Selenium only: 'load', 'network_idle', 'selector' or 'mutation'
+        'wait': data.get('wait'),
+        'wait_selector': data.get('wait_selector'),
+        'wait_timeout': data.get('wait_timeout')
+    }
+    
+    if not params['url']:
+        raise ValueError('URL is required')
+    
+    if params['metadata_only'] and params['method'] == 'selenium':
+        raise ValueError('metadata_only is only supported with the requests method')
+    if params['fields'] is not None:
+        if params['method'] == 'selenium':
+            raise ValueError('fields is only supported with the requests method')
+        params['fields'] = resolve_fields(params['fields'])
+    
+    get_parser(params['parser'])
+    resolve_strategy(params['wait'], params['wait_selector'])
+    # Seconds, capped at SELENIUM_MAX_WAIT_TIME
+    params['wait_timeout'] = resolve_timeout(params['wait_timeout'])
+    return params
+
+def run_scrape(params):
+    """Scrape and analyze one page, timing every stage; returns (response body, HTTP status)"""
+    method = 'metadata' if params['metadata_only'] else params['method']
+    with requests_tracker.track(method) as timings:
+        body, status = scrape_page(params)
+        if status < 400:
+            timings.status = 'ok'
+    if params['debug']:
+        body['timings'] = timings.as_dict()
+    return body, status
+
+def scrape_page(params):
+    """Scrape and analyze one page; returns (response body, HTTP status)"""
+    # Metadata only: no body text, so nothing for the LLM to structure
+    if params['metadata_only']:
+        scraped_data = scraper.scrape_metadata(params['url'])
+        if 'error' in scraped_data:
+            return scraped_data, 400
+        result_store().add(scraped_data, source='metadata')
+        return {'success': True, 'raw_data': scraped_data}, 200
+    
+    # Scrape the website
+    if params['method'] == 'selenium':
+        # Fallback to selenium for dynamic content
+        scraped_data = scrape_with_selenium(params['url'], params['parser'], params['wait'],
+                                            params['wait_selector'], params['wait_timeout'])
+    else:
+        scraped_data = scraper.scrape_with_requests(params['url'], params['parser'], params['fields'])
+    
+    if 'error' in scraped_data:
+        return scraped_data, 400
+    
+    # The LLM analysis needs the page text
+    if 'text' not in scraped_data:
+        result_store().add(scraped_data, source=params['method'])
+        return {'success': True, 'raw_data': scraped_data}, 200
+    
+    # Structure the content with LLM
+    structured_data = structure_content_with_llm(scraped_data)
+    
+    # Keep both for /api/results (written in bulk by the store's writer thread)
+    result_store().add(scraped_data, structured_data, source=params['method'])
+    
+    body = {
+        'success': True,
+        'structured_data': structured_data
+    }
+    # A fields projection is a request for the raw sections
+    if params['include_raw'] or params['fields'] is not None:
+        body['raw_data'] = scraped_data
+    return body, 200
+
 @app.route('/api/scrape', methods=['POST'])
 def scrape():
     try:
-        data = request.get_json()
-        url = data.get('url')
-        method = data.get('method', 'requests')
+        try:
+            params = parse_scrape_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if not url:
-            return jsonify({'error': 'URL is required'}), 400
+        body, status = run_scrape(params)
+        return api_response(body, status)
         
-        # Initialize scraper
-        scraper = Crawl4AIScraper()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Queue a scrape and return its job id immediately"""
+    try:
+        try:
+            params = parse_scrape_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Scrape the website
-        if method == 'selenium':
-            # Fallback to selenium for dynamic content
-            scraped_data = scrape_with_selenium(url)
-        else:
-            scraped_data = scraper.scrape_with_requests(url)
+        try:
+            job = job_manager.submit(run_scrape, params)
+        except QueueFull as e:
+            # Backpressure: tell the client when to retry instead of queueing without bound
+            response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
         
-        if 'error' in scraped_data:
-            return jsonify(scraped_data), 400
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}',
+            'events_url': f'/api/jobs/{job.id}/events'
+        }), 202
         
-        # Structure the content with LLM
-        structured_data = structure_content_with_llm(scraped_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return api_response(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events: a 'status' event per state change, then 'done' with the result"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return Response(job_manager.events(job), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/scrape/batch', methods=['POST'])
+def scrape_batch():
+    """Scrape many URLs concurrently and stream one NDJSON line per finished page"""
+    try:
+        data = request.get_json(silent=True) or {}
+        urls = data.get('urls') or []
+        parser = data.get('parser')
         
-        return jsonify({
-            'success': True,
-            'raw_data': scraped_data,
-            'structured_data': structured_data
-        })
+        if not isinstance(urls, list) or not urls:
+            return jsonify({'error': 'urls must be a non-empty list'}), 400
+        if len(urls) > BATCH_MAX_URLS:
+            return jsonify({'error': f'At most {BATCH_MAX_URLS} URLs per batch'}), 400
+        
+        try:
+            get_parser(parser)
+            fields = resolve_fields(data['fields']) if data.get('fields') is not None else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Callers may lower the limits but not raise them past the configured maximum
+        try:
+            max_concurrency = max(min(int(data.get('concurrency', BATCH_MAX_CONCURRENCY)), BATCH_MAX_CONCURRENCY), 1)
+            per_host = max(min(int(data.get('per_host', BATCH_PER_HOST)), BATCH_PER_HOST), 1)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        batch = BatchScraper(partial(scraper.build_page, parser=parser, fields=fields),
+                             max_concurrency=max_concurrency, per_host=per_host)
+        
+        def generate():
+            start = time.time()
+            succeeded = 0
+            store = result_store()
+            for result in batch.stream(urls):
+                if result.get('success'):
+                    succeeded += 1
+                    store.add(result['raw_data'], source='batch')
+                yield json.dumps(result) + '\n'
+            yield json.dumps({
+                'done': True,
+                'total': len(urls),
+                'succeeded': succeeded,
+                'elapsed': round(time.time() - start, 3)
+            }) + '\n'
+        
+        return Response(generate(), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/crawl', methods=['POST'])
+def crawl():
+    """Crawl a site from a seed URL and stream one NDJSON line per crawled page"""
+    try:
+        data = request.get_json(silent=True) or {}
+        url = data.get('url')
+        parser = data.get('parser')
+        
+        if not url:
+            return jsonify({'error': 'URL is required'}), 400
+        if normalize_url(url) is None:
+            return jsonify({'error': 'URL must be an absolute http(s) URL'}), 400
+        
+        try:
+            get_parser(parser)
+            # Callers may lower the limits but not raise them past the configured maximum
+            max_pages = min(int(data.get('max_pages', CRAWL_MAX_PAGES)), CRAWL_MAX_PAGES)
+            max_depth = min(int(data.get('max_depth', CRAWL_MAX_DEPTH)), CRAWL_MAX_DEPTH)
+            concurrency = min(int(data.get('concurrency', CRAWL_CONCURRENCY)), CRAWL_CONCURRENCY)
+            per_host = min(int(data.get('per_host', CRAWL_PER_HOST)), CRAWL_PER_HOST)
+            # Politeness can be increased per crawl but not reduced
+            delay = max(float(data.get('delay', CRAWL_HOST_DELAY)), CRAWL_HOST_DELAY)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        crawler = Crawler(partial(scraper.build_page, parser=parser),
+                          max_pages=max(max_pages, 1), max_depth=max(max_depth, 0),
+                          concurrency=max(concurrency, 1), per_host=max(per_host, 1), delay=delay)
+        
+        def generate():
+            store = result_store()
+            for result in stream_async(lambda: crawler.crawl(url), 'Crawl'):
+                if result.get('success'):
+                    store.add(result['raw_data'], source='crawl')
+                yield json.dumps(result) + '\n'
+        
+        return Response(generate(), mimetype='application/x-ndjson')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/results')
+def list_results():
+    """Stored scrape results, newest first, filtered by url, domain, content_hash and since/until"""
+    store = result_store()
+    if not store.enabled:
+        return jsonify({'error': 'The result store is disabled (RESULT_STORE_PATH is empty)'}), 404
+    try:
+        query = parse_results_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return api_response(store.query(**query))
+
+@app.route('/api/results/<int:result_id>')
+def get_result(result_id):
+    """One stored scrape result with its raw_data"""
+    store = result_store()
+    result = store.get(result_id) if store.enabled else None
+    if result is None:
+        return jsonify({'error': 'Result not found'}), 404
+    return api_response(result)
+
+# Queue, cache and pool state, read whenever /metrics is scraped
+registry.register_stats('jobs', job_manager.stats)
+registry.register_stats('inference', inference.stats, label='model')
+registry.register_stats('llm_cache', inference.cache_stats)
+registry.register_stats('http_cache', lambda: http_cache().stats())
+registry.register_stats('http_pool', lambda: shared_pool().stats())
+registry.register_stats('browser_pool', lambda: browser_pool().stats())
+registry.register_stats('url_cache', url_cache_stats)
+registry.register_stats('near_duplicates', lambda: near_duplicate_index().stats())
+registry.register_stats('result_store', lambda: result_store().stats())
+
+@app.route('/metrics')
+def metrics():
+    """Stage histograms and queue/cache gauges in the Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/health')
 def health():
-    return jsonify({'status': 'healthy', 'models_loaded': llm_model is not None})
+    return jsonify({
+        'status': 'healthy',
+        'models_loaded': summarizer.loaded,
+        'models': {'summarizer': summarizer.status(), 'classifier': content_classifier.status()},
+        'inference_backends': {'summarizer': SUMMARIZER_BACKEND, 'classifier': CLASSIFIER_BACKEND},
+        'http_pool': shared_pool().stats(),
+        'browser_pool': browser_pool().stats(),
+        'http_cache': http_cache().stats(),
+        'inference': inference.stats(),
+        'llm_cache': inference.cache_stats(),
+        'url_cache': url_cache_stats(),
+        'near_duplicates': near_duplicate_index().stats(),
+        'result_store': result_store().stats(),
+        'jobs': job_manager.stats()
+    })
 
 if __name__ == '__main__':
-    # Initialize models in a separate thread to avoid blocking
-    model_thread = threading.Thread(target=initialize_models)
-    model_thread.start()
+    # Models load on first use; MODEL_PRELOAD starts loading them in the background now
+    if MODEL_PRELOAD:
+        threading.Thread(target=initialize_models, daemon=True).start()
+    
+    # Resolve chromedriver (and optionally pre-launch browsers) once at startup
+    threading.Thread(target=browser_pool().warm, daemon=True).start()
     
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
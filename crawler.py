@@ -0,0 +1,342 @@
+"""
+Site crawler built on the batch fetch engine
+
+Starting from a seed URL, Crawler follows the internal links that
+Crawl4AIScraper.extract_links finds on every page:
+
+- a priority frontier (asyncio.PriorityQueue); shallow pages and short,
+  query-free paths are crawled first
+- URLs are normalized (scheme/host case, default ports, dot segments,
+  fragments, tracking parameters, query order) before the seen-set check; the
+  seen-set is a plain set, or a Bloom filter for very large crawls
+- with same_host, only links to the seed's host or the host the seed
+  redirects to are followed (a leading www. is ignored)
+- max_depth / max_pages limits
+- politeness per host: at most per_host fetches in flight, at least `delay`
+  seconds between request starts (or the robots.txt Crawl-delay, if longer),
+  and robots.txt rules
+- up to `concurrency` fetches in flight overall, with parsing on worker
+  threads so the event loop keeps fetching
+
+Results are produced as pages finish, so /api/crawl can stream progress.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import posixpath
+import time
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from batch import read_body
+from http_pool import DEFAULT_HEADERS
+
+CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', 1000))
+CRAWL_MAX_DEPTH = int(os.getenv('CRAWL_MAX_DEPTH', 5))
+CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', 16))
+CRAWL_PER_HOST = int(os.getenv('CRAWL_PER_HOST', 4))
+CRAWL_HOST_DELAY = float(os.getenv('CRAWL_HOST_DELAY', 0.1))
+# Seen-sets larger than this many URLs use a Bloom filter
+CRAWL_BLOOM_THRESHOLD = int(os.getenv('CRAWL_BLOOM_THRESHOLD', 100000))
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+# Roughly how many distinct links a crawled page adds to the seen-set
+LINKS_PER_PAGE = 20
+
+
+def normalize_url(url):
+    """Canonical form of url for deduplication, or None if it is not http(s)"""
+    parts = urlparse(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+
+    path = parts.path or '/'
+    if '.' in path:
+        # Resolve ./ and ../ segments, keeping a trailing slash
+        trailing = path.endswith('/')
+        path = posixpath.normpath(path)
+        path = '/' if path in ('.', '/', '//') else path
+        if trailing and not path.endswith('/'):
+            path += '/'
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunparse((scheme, netloc, path, '', query, ''))
+
+
+def site_host(netloc):
+    """netloc without a leading www., so example.com and www.example.com are one site"""
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def default_priority(url, depth):
+    """Lower is crawled first: breadth-first, preferring short paths without queries"""
+    parts = urlparse(url)
+    return depth + 0.1 * parts.path.count('/') + (0.5 if parts.query else 0)
+
+
+class UrlSet:
+    """Exact seen-set"""
+
+    def __init__(self):
+        self.items = set()
+
+    def add(self, url):
+        """Add url; True if it was not seen before"""
+        if url in self.items:
+            return False
+        self.items.add(url)
+        return True
+
+    def __len__(self):
+        return len(self.items)
+
+
+class BloomFilter:
+    """Fixed-memory probabilistic seen-set (false positives skip a URL, never re-crawl one)"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, url):
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, url):
+        """Add url; True if it was (probably) not seen before"""
+        added = False
+        for position in self._positions(url):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        self.count += added
+        return added
+
+    def __len__(self):
+        return self.count
+
+
+def make_seen_set(max_pages):
+    capacity = max_pages * LINKS_PER_PAGE
+    return BloomFilter(capacity) if capacity > CRAWL_BLOOM_THRESHOLD else UrlSet()
+
+
+class HostState:
+    """Per-host politeness: in-flight limit, request spacing and robots.txt rules"""
+
+    def __init__(self, per_host, delay):
+        self.slots = asyncio.Semaphore(per_host)
+        self.delay = delay
+        self.next_start = 0.0
+        self.spacing = asyncio.Lock()
+        self.robots = None
+        self.robots_loaded = asyncio.Event()
+        self.robots_loading = False
+
+    async def wait_turn(self):
+        """Sleep until this host may be sent the next request"""
+        async with self.spacing:
+            now = time.monotonic()
+            if self.next_start > now:
+                await asyncio.sleep(self.next_start - now)
+                now = time.monotonic()
+            self.next_start = now + self.delay
+
+
+class Crawler:
+    """Concurrent, polite crawl of one site from a seed URL"""
+
+    def __init__(self, process, max_pages=CRAWL_MAX_PAGES, max_depth=CRAWL_MAX_DEPTH,
+                 concurrency=CRAWL_CONCURRENCY, per_host=CRAWL_PER_HOST, delay=CRAWL_HOST_DELAY,
+                 respect_robots=True, same_host=True, priority=default_priority, timeout=15):
+        """process(url, content, status_code, content_type, encoding) builds the result for one page"""
+        self.process = process
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.respect_robots = respect_robots
+        self.same_host = same_host
+        self.priority = priority
+        self.timeout = timeout
+        self.user_agent = DEFAULT_HEADERS['User-Agent']
+
+    async def _robots(self, session, url, host):
+        """The host's robots.txt rules (None means allow everything)"""
+        if host.robots_loading:
+            await host.robots_loaded.wait()
+            return host.robots
+        host.robots_loading = True
+
+        parts = urlparse(url)
+        robots_url = f'{parts.scheme}://{parts.netloc}/robots.txt'
+        rules = RobotFileParser(robots_url)
+        try:
+            async with session.get(robots_url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                body = await response.text(errors='replace')
+                if response.status >= 500:
+                    # Server error: treat the whole site as disallowed (RFC 9309)
+                    rules.disallow_all = True
+                elif response.status >= 400:
+                    rules = None
+                else:
+                    rules.parse(body.splitlines())
+        except Exception:
+            rules.disallow_all = True
+
+        if rules is not None:
+            crawl_delay = rules.crawl_delay(self.user_agent)
+            if crawl_delay:
+                host.delay = max(host.delay, float(crawl_delay))
+        host.robots = rules
+        host.robots_loaded.set()
+        return rules
+
+    async def _fetch(self, session, url, host):
+        """Download url under the host's politeness rules"""
+        async with host.slots:
+            await host.wait_turn()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                response.raise_for_status()
+                content = await read_body(response)
+                return str(response.url), content, response.status, response.headers.get('content-type', ''), response.charset
+
+    def _children(self, page, base_url, site_hosts):
+        """Normalized internal links of a processed page (site_hosts holds site_host() names)"""
+        links = page.get('links', {})
+        candidates = links.get('internal', []) + ([] if self.same_host else links.get('external', []))
+        for link in candidates:
+            url = normalize_url(urljoin(base_url, link['url']))
+            if url and (not self.same_host or site_host(urlparse(url).netloc) in site_hosts):
+                yield url
+
+    async def crawl(self, seed):
+        """Async generator yielding one result dict per crawled page, then a summary"""
+        seed = normalize_url(seed)
+        if seed is None:
+            raise ValueError('Seed URL must be an absolute http(s) URL')
+        # The seed's host, plus the one it redirects to once it has been fetched
+        site_hosts = {site_host(urlparse(seed).netloc)}
+
+        frontier = asyncio.PriorityQueue()
+        results = asyncio.Queue()
+        seen = make_seen_set(self.max_pages)
+        hosts = {}
+        counters = {'crawled': 0, 'succeeded': 0, 'robots_blocked': 0, 'scheduled': 0}
+        sequence = 0
+        start = time.perf_counter()
+
+        def enqueue(url, depth):
+            nonlocal sequence
+            if seen.add(url):
+                sequence += 1
+                frontier.put_nowait((self.priority(url, depth), sequence, url, depth))
+
+        async def visit(session, url, depth):
+            host_name = urlparse(url).netloc
+            host = hosts.setdefault(host_name, HostState(self.per_host, self.delay))
+            if self.respect_robots:
+                rules = await self._robots(session, url, host)
+                if rules is not None and not rules.can_fetch(self.user_agent, url):
+                    counters['robots_blocked'] += 1
+                    return None
+
+            page_start = time.perf_counter()
+            result = {'url': url, 'depth': depth}
+            try:
+                final_url, content, status_code, content_type, encoding = await self._fetch(session, url, host)
+                loop = asyncio.get_running_loop()
+                page = await loop.run_in_executor(None, self.process, final_url, content, status_code,
+                                                  content_type, encoding)
+            except Exception as e:
+                page = {'error': str(e) or e.__class__.__name__}
+
+            result['elapsed'] = round(time.perf_counter() - page_start, 3)
+            counters['crawled'] += 1
+            if 'error' in page:
+                result['error'] = page['error']
+            else:
+                counters['succeeded'] += 1
+                result['success'] = True
+                result['raw_data'] = page
+                if depth == 0:
+                    site_hosts.add(site_host(urlparse(normalize_url(final_url) or url).netloc))
+                if depth < self.max_depth:
+                    for child in self._children(page, final_url, site_hosts):
+                        enqueue(child, depth + 1)
+            return result
+
+        async def worker(session):
+            while True:
+                _, _, url, depth = await frontier.get()
+                try:
+                    if counters['scheduled'] >= self.max_pages:
+                        continue
+                    counters['scheduled'] += 1
+                    result = await visit(session, url, depth)
+                    if result is None:
+                        counters['scheduled'] -= 1
+                        continue
+                    result['progress'] = {
+                        'crawled': counters['crawled'],
+                        'queued': frontier.qsize(),
+                        'seen': len(seen)
+                    }
+                    await results.put(result)
+                finally:
+                    frontier.task_done()
+
+        async def finish_when_idle(workers):
+            await frontier.join()
+            for task in workers:
+                task.cancel()
+            await results.put(None)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        async with aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS) as session:
+            enqueue(seed, 0)
+            workers = [asyncio.ensure_future(worker(session)) for _ in range(self.concurrency)]
+            watcher = asyncio.ensure_future(finish_when_idle(workers))
+            try:
+                while True:
+                    result = await results.get()
+                    if result is None:
+                        break
+                    yield result
+            finally:
+                # Consumer stopped early (e.g. client disconnected)
+                watcher.cancel()
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(watcher, *workers, return_exceptions=True)
+
+        yield {
+            'done': True,
+            'crawled': counters['crawled'],
+            'succeeded': counters['succeeded'],
+            'robots_blocked': counters['robots_blocked'],
+            'seen': len(seen),
+            'elapsed': round(time.perf_counter() - start, 3)
+        }
@@ -0,0 +1,756 @@
+"""
+Single-pass page extraction for Crawl4AIScraper
+
+The multi-pass extract_* methods on Crawl4AIScraper run one find_all/select_one
+sweep per element type. PageExtractor walks the parsed tree once instead and
+hands every element to the handlers registered for its tag name, producing the
+same metadata, content_blocks, media and links dicts. field_extractor() builds
+one that runs only the handlers behind a requested set of output fields.
+"""
+
+from bs4.element import CData, NavigableString, Tag
+
+from links import LinkCollector, join_url
+from main_content import CONTAINER_TAGS, MAIN_CONTENT, select_main_content
+
+# Tags whose subtrees are dropped before extraction (the multi-pass path
+# decomposes them)
+SKIPPED_TAGS = frozenset(['script', 'style', 'noscript'])
+
+# Elements that start a new text block: their text never runs into the
+# text next to them (get_text() joins '<p>a</p><p>b</p>' as 'ab')
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'br', 'caption', 'dd', 'details', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+    'hr', 'li', 'main', 'nav', 'ol', 'option', 'p', 'pre', 'section', 'summary', 'table', 'td', 'th',
+    'title', 'tr', 'ul'
+])
+
+# String types that contribute to get_text() - comments, doctypes and the
+# strings of <template>/<rt>/<rp> containers are ignored, as in BeautifulSoup
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+def empty_sections():
+    """Return the empty output dicts, keyed the same way as the extract_* methods"""
+    return {
+        'metadata': {
+            'title': '',
+            'description': '',
+            'keywords': '',
+            'author': '',
+            'language': '',
+            'robots': '',
+            'og_title': '',
+            'og_description': '',
+            'og_image': '',
+            'twitter_card': '',
+            'canonical_url': '',
+            # JSON-LD lives in <script> tags, which are skipped with the
+            # other scripts before extraction
+            'structured_data': []
+        },
+        'content_blocks': {
+            'headings': [],
+            'paragraphs': [],
+            'lists': [],
+            'tables': [],
+            'forms': [],
+            'navigation': [],
+            'footer': []
+        },
+        'media': {
+            'images': [],
+            'videos': [],
+            'audio': [],
+            'iframes': []
+        },
+        'links': {
+            'internal': [],
+            'external': [],
+            'social': [],
+            'navigation': [],
+            'footer': []
+        }
+    }
+
+
+class ElementHandler:
+    """Base class for handlers that receive elements from a PageExtractor walk
+
+    A new handler instance is created for every page, so handlers can keep
+    per-page state on self. ``start`` is called when an element opens and its
+    return value is passed back to ``end`` when the element closes. Tags listed
+    in ``text_tags`` get their get_text() equivalent passed to ``end``.
+    """
+
+    tags = ()
+    text_tags = ()
+
+    def __init__(self, run):
+        self.run = run
+        self.sections = run.sections
+
+    def start(self, name, attrs):
+        return None
+
+    def end(self, name, token, text):
+        pass
+
+    def finish(self):
+        pass
+
+
+class TitleHandler(ElementHandler):
+    """First <title> element, like soup.title"""
+
+    tags = ('title',)
+    text_tags = ('title',)
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.seen = False
+
+    def start(self, name, attrs):
+        if self.seen:
+            return False
+        self.seen = True
+        return True
+
+    def end(self, name, token, text):
+        if token:
+            self.sections['metadata']['title'] = text.strip()
+
+
+class MetaTagHandler(ElementHandler):
+    """<meta> and canonical <link> tags, first match per selector"""
+
+    tags = ('meta', 'link')
+
+    # metadata key -> (attribute, value) of the select_one() selector
+    META_SELECTORS = {
+        'description': ('name', 'description'),
+        'keywords': ('name', 'keywords'),
+        'author': ('name', 'author'),
+        'language': ('http-equiv', 'content-language'),
+        'robots': ('name', 'robots'),
+        'og_title': ('property', 'og:title'),
+        'og_description': ('property', 'og:description'),
+        'og_image': ('property', 'og:image'),
+        'twitter_card': ('name', 'twitter:card')
+    }
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.matched = set()
+        self.canonical_seen = False
+
+    def start(self, name, attrs):
+        metadata = self.sections['metadata']
+
+        if name == 'link':
+            rel = attrs.get('rel')
+            if isinstance(rel, list):
+                rel = ' '.join(rel)
+            if rel == 'canonical' and not self.canonical_seen:
+                self.canonical_seen = True
+                if attrs.get('href'):
+                    metadata['canonical_url'] = join_url(self.run.url, attrs['href'])
+            return None
+
+        for key, (attribute, value) in self.META_SELECTORS.items():
+            if key in self.matched or attrs.get(attribute) != value:
+                continue
+            self.matched.add(key)
+            if attrs.get('content'):
+                metadata[key] = attrs['content'].strip()
+        return None
+
+
+class HeadingHandler(ElementHandler):
+    """h1-h6, grouped by level like the per-level find_all sweeps"""
+
+    tags = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+    text_tags = tags
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.levels = [[] for _ in range(6)]
+
+    def start(self, name, attrs):
+        level = int(name[1])
+        heading = {
+            'level': level,
+            'text': '',
+            'id': attrs.get('id', ''),
+            'class': attrs.get('class', [])
+        }
+        self.levels[level - 1].append(heading)
+        return heading
+
+    def end(self, name, token, text):
+        token['text'] = text.strip()
+
+    def finish(self):
+        headings = self.sections['content_blocks']['headings']
+        for level in self.levels:
+            headings.extend(level)
+
+
+class ParagraphHandler(ElementHandler):
+    """<p> elements with more than 10 characters of text"""
+
+    tags = ('p',)
+    text_tags = tags
+
+    def __init__(self, run):
+        super().__init__(run)
+        # Slots are reserved on open so nested paragraphs keep document order
+        self.slots = []
+
+    def start(self, name, attrs):
+        self.slots.append(None)
+        return len(self.slots) - 1, attrs.get('class', [])
+
+    def end(self, name, token, text):
+        slot, css_class = token
+        text = text.strip()
+        if text and len(text) > 10:  # Filter out very short paragraphs
+            self.slots[slot] = {
+                'text': text,
+                'class': css_class
+            }
+
+    def finish(self):
+        self.sections['content_blocks']['paragraphs'] = [p for p in self.slots if p is not None]
+
+
+class ListHandler(ElementHandler):
+    """<ul>/<ol> elements and every <li> nested inside them"""
+
+    tags = ('ul', 'ol', 'li')
+    text_tags = ('li',)
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.open_lists = []
+
+    def start(self, name, attrs):
+        if name == 'li':
+            slots = []
+            for lst in self.open_lists:
+                slots.append((lst['items'], len(lst['items'])))
+                lst['items'].append('')
+            return slots
+
+        lst = {
+            'type': name,
+            'items': [],
+            'class': attrs.get('class', [])
+        }
+        self.sections['content_blocks']['lists'].append(lst)
+        self.open_lists.append(lst)
+        return None
+
+    def end(self, name, token, text):
+        if name != 'li':
+            self.open_lists.pop()
+            return
+        text = text.strip()
+        for items, slot in token:
+            items[slot] = text
+
+
+class TableHandler(ElementHandler):
+    """<table> rows and the <td>/<th> cells inside each row"""
+
+    tags = ('table', 'tr', 'td', 'th')
+    text_tags = ('td', 'th')
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.open_tables = []
+        self.open_rows = []
+
+    def start(self, name, attrs):
+        if name == 'table':
+            table = {
+                'rows': [],
+                'class': attrs.get('class', [])
+            }
+            self.sections['content_blocks']['tables'].append(table)
+            self.open_tables.append(table)
+            return None
+
+        if name == 'tr':
+            if not self.open_tables:
+                return False
+            cells = []
+            for table in self.open_tables:
+                table['rows'].append(cells)
+            self.open_rows.append(cells)
+            return True
+
+        slots = []
+        for cells in self.open_rows:
+            slots.append((cells, len(cells)))
+            cells.append('')
+        return slots
+
+    def end(self, name, token, text):
+        if name == 'table':
+            self.open_tables.pop()
+        elif name == 'tr':
+            if token:
+                self.open_rows.pop()
+        else:
+            text = text.strip()
+            for cells, slot in token:
+                cells[slot] = text
+
+
+class FormHandler(ElementHandler):
+    """<form> elements and the <input> tags inside them"""
+
+    tags = ('form', 'input')
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.open_forms = []
+
+    def start(self, name, attrs):
+        if name == 'form':
+            form = {
+                'action': attrs.get('action', ''),
+                'method': attrs.get('method', 'get'),
+                'inputs': []
+            }
+            self.sections['content_blocks']['forms'].append(form)
+            self.open_forms.append(form)
+            return None
+
+        for form in self.open_forms:
+            form['inputs'].append({
+                'type': attrs.get('type', 'text'),
+                'name': attrs.get('name', ''),
+                'placeholder': attrs.get('placeholder', '')
+            })
+        return None
+
+    def end(self, name, token, text):
+        if name == 'form':
+            self.open_forms.pop()
+
+
+class NavigationHandler(ElementHandler):
+    """<nav>/<header> elements and the hrefs of the anchors inside them"""
+
+    tags = ('nav', 'header', 'a')
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.open_navs = []
+
+    def start(self, name, attrs):
+        if name == 'a':
+            if self.open_navs and 'href' in attrs:
+                for nav in self.open_navs:
+                    nav['links'].append(attrs['href'])
+            return None
+
+        nav = {
+            'links': [],
+            'class': attrs.get('class', [])
+        }
+        self.sections['content_blocks']['navigation'].append(nav)
+        self.open_navs.append(nav)
+        return None
+
+    def end(self, name, token, text):
+        if name != 'a':
+            self.open_navs.pop()
+
+
+class FooterHandler(ElementHandler):
+    """Text and anchor hrefs of the first <footer>"""
+
+    tags = ('footer', 'a')
+    text_tags = ('footer',)
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.seen = False
+        self.footer = None
+
+    def start(self, name, attrs):
+        if name == 'a':
+            if self.footer is not None and 'href' in attrs:
+                self.footer['links'].append(attrs['href'])
+            return None
+
+        if self.seen:
+            return False
+        self.seen = True
+        self.footer = {
+            'text': '',
+            'links': []
+        }
+        return True
+
+    def end(self, name, token, text):
+        if name == 'footer' and token:
+            self.footer['text'] = text.strip()
+            self.sections['content_blocks']['footer'] = self.footer
+            self.footer = None
+
+
+class MediaHandler(ElementHandler):
+    """Images, videos, audio and iframes with a src attribute"""
+
+    tags = ('img', 'video', 'source', 'audio', 'iframe')
+
+    def start(self, name, attrs):
+        src = attrs.get('src', '')
+        if not src:
+            return None
+
+        media = self.sections['media']
+        full_url = join_url(self.run.url, src)
+        if name == 'img':
+            media['images'].append({
+                'src': full_url,
+                'alt': attrs.get('alt', ''),
+                'title': attrs.get('title', ''),
+                'width': attrs.get('width', ''),
+                'height': attrs.get('height', '')
+            })
+        elif name == 'audio':
+            media['audio'].append({
+                'src': full_url,
+                'controls': attrs.get('controls') is not None
+            })
+        elif name == 'iframe':
+            media['iframes'].append({
+                'src': full_url,
+                'title': attrs.get('title', ''),
+                'width': attrs.get('width', ''),
+                'height': attrs.get('height', '')
+            })
+        else:
+            media['videos'].append({
+                'src': full_url,
+                'type': attrs.get('type', ''),
+                'poster': attrs.get('poster', '')
+            })
+        return None
+
+
+class LinkHandler(ElementHandler):
+    """Anchors categorized as internal, external and social, one entry per URL with a count"""
+
+    tags = ('a',)
+    text_tags = tags
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.collector = LinkCollector(run.url, self.sections['links'])
+
+    def start(self, name, attrs):
+        href = attrs.get('href')
+        if not href or href.startswith('#'):
+            return None
+        return self.collector.add(href, attrs.get('title', ''))
+
+    def end(self, name, token, text):
+        if token:
+            LinkCollector.set_text(token, text.strip())
+
+
+class MainContentHandler(ElementHandler):
+    """Positions of containers and anchors in the page text, scored into 'main_content' (main_content.py)"""
+
+    tags = CONTAINER_TAGS + ('a',)
+
+    def __init__(self, run):
+        super().__init__(run)
+        # [tag, attrs, start, end, parent] with start/end indexes into the run's text_parts
+        self.containers = []
+        self.open_containers = []
+        self.anchors = []
+
+    def start(self, name, attrs):
+        position = len(self.run.text_parts)
+        if name == 'a':
+            return position
+        parent = self.open_containers[-1] if self.open_containers else -1
+        self.open_containers.append(len(self.containers))
+        self.containers.append([name, attrs, position, position, parent])
+        return len(self.containers) - 1
+
+    def end(self, name, token, text):
+        position = len(self.run.text_parts)
+        if name == 'a':
+            if position > token:
+                self.anchors.append((token, position))
+            return
+        self.containers[token][3] = position
+        self.open_containers.pop()
+
+    def finish(self):
+        if not self.run.keep_text:
+            self.sections['main_content'] = {'container': None, 'text_blocks': []}
+            return
+        # Containers still open when the page ended run to the end of the text
+        for index in self.open_containers:
+            self.containers[index][3] = len(self.run.text_parts)
+        self.sections['main_content'] = select_main_content(
+            self.run.text_parts, self.run.block_breaks, self.containers, self.anchors
+        )
+
+
+class HrefHandler(ElementHandler):
+    """Raw href of every anchor and src of every image, as the basic scrapers report them"""
+
+    tags = ('a', 'img')
+
+    def __init__(self, run):
+        super().__init__(run)
+        self.sections['hrefs'] = []
+        self.sections['image_srcs'] = []
+
+    def start(self, name, attrs):
+        if name == 'a':
+            if 'href' in attrs:
+                self.sections['hrefs'].append(attrs['href'])
+        elif 'src' in attrs:
+            self.sections['image_srcs'].append(attrs['src'])
+        return None
+
+
+DEFAULT_HANDLERS = (
+    TitleHandler,
+    MetaTagHandler,
+    HeadingHandler,
+    ParagraphHandler,
+    ListHandler,
+    TableHandler,
+    FormHandler,
+    NavigationHandler,
+    FooterHandler,
+    MediaHandler,
+    LinkHandler
+) + ((MainContentHandler,) if MAIN_CONTENT else ())
+
+# Title, text, hrefs and image srcs only - used by app.py and the Selenium scrapers
+BASIC_HANDLERS = (
+    TitleHandler,
+    HrefHandler
+) + ((MainContentHandler,) if MAIN_CONTENT else ())
+
+# <head> metadata only - used by metadata-only scrapes, which stop reading after </head>
+METADATA_HANDLERS = (
+    TitleHandler,
+    MetaTagHandler
+)
+
+# Output fields a caller can ask for, and the handlers that fill them in;
+# 'text' needs no handler, only the text collected during the walk
+FIELD_HANDLERS = {
+    'metadata': METADATA_HANDLERS,
+    'content_blocks.headings': (HeadingHandler,),
+    'content_blocks.paragraphs': (ParagraphHandler,),
+    'content_blocks.lists': (ListHandler,),
+    'content_blocks.tables': (TableHandler,),
+    'content_blocks.forms': (FormHandler,),
+    'content_blocks.navigation': (NavigationHandler,),
+    'content_blocks.footer': (FooterHandler,),
+    'media': (MediaHandler,),
+    'links': (LinkHandler,),
+    'main_content': (MainContentHandler,),
+    'text': ()
+}
+
+
+def resolve_fields(fields):
+    """Validate a fields projection and expand 'content_blocks' to its seven blocks
+
+    Accepts a list or a comma-separated string; returns a sorted list. Raises
+    ValueError for unknown fields.
+    """
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    if not isinstance(fields, (list, tuple)) or not fields:
+        raise ValueError('fields must be a non-empty list')
+    resolved = set()
+    for field in fields:
+        field = str(field).strip()
+        if field == 'content_blocks':
+            resolved.update(name for name in FIELD_HANDLERS if name.startswith('content_blocks.'))
+        elif field in FIELD_HANDLERS:
+            resolved.add(field)
+        else:
+            raise ValueError(f"Unknown field '{field}'. Choose from: content_blocks, {', '.join(FIELD_HANDLERS)}")
+    return sorted(resolved)
+
+
+def field_extractor(fields):
+    """A PageExtractor running only the handlers behind fields (from resolve_fields)"""
+    wanted = {handler for field in fields for handler in FIELD_HANDLERS[field]}
+    handlers = [handler for handler in DEFAULT_HANDLERS + (MainContentHandler,) if handler in wanted]
+    # Main-content detection works on the page text
+    return PageExtractor(list(dict.fromkeys(handlers)), keep_text='text' in fields or 'main_content' in fields)
+
+
+def select_fields(page, fields):
+    """The requested sections of an extraction result; content_blocks keeps only the requested blocks"""
+    selected = {}
+    for field in fields:
+        section, _, block = field.partition('.')
+        if block:
+            selected.setdefault(section, {})[block] = page[section][block]
+        else:
+            selected[section] = page[section]
+    return selected
+
+
+class ExtractionRun:
+    """Event target for a single page: start/data/end/close, like an lxml parser target"""
+
+    def __init__(self, extractor, url):
+        self.url = url
+        self.sections = empty_sections()
+        self.text_parts = []
+        # Indexes into text_parts where a block element starts or ends
+        self.block_breaks = []
+        self.handlers = [handler_class(self) for handler_class in extractor.handler_classes]
+
+        # tag name -> (handlers, whether any of them needs the element text)
+        self.dispatch = {}
+        for handler in self.handlers:
+            for tag in handler.tags:
+                handlers, needs_text = self.dispatch.get(tag, ((), False))
+                self.dispatch[tag] = (handlers + (handler,), needs_text or tag in handler.text_tags)
+
+        # Without keep_text only the text of elements a handler reads is collected
+        self.keep_text = extractor.keep_text
+        self._text_depth = 0
+        self._stack = []
+        self._skip_depth = 0
+
+    def start(self, name, attrs):
+        if self._skip_depth:
+            self._skip_depth += 1
+            return
+        if name in SKIPPED_TAGS:
+            self._skip_depth = 1
+            return
+        if self.keep_text and name in BLOCK_TAGS:
+            self._break_block()
+
+        entry = self.dispatch.get(name)
+        if entry is None:
+            self._stack.append(None)
+            return
+        handlers, needs_text = entry
+        tokens = [handler.start(name, attrs) for handler in handlers]
+        if needs_text:
+            self._text_depth += 1
+        self._stack.append((handlers, tokens, len(self.text_parts) if needs_text else -1))
+
+    def data(self, text):
+        if not self._skip_depth and (self.keep_text or self._text_depth):
+            self.text_parts.append(text)
+
+    def end(self, name):
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        if self.keep_text and name in BLOCK_TAGS:
+            self._break_block()
+
+        entry = self._stack.pop()
+        if entry is None:
+            return
+        handlers, tokens, text_start = entry
+        text = ''
+        if text_start >= 0:
+            text = ''.join(self.text_parts[text_start:])
+            self._text_depth -= 1
+        for handler, token in zip(handlers, tokens):
+            handler.end(name, token, text)
+
+    def _break_block(self):
+        position = len(self.text_parts)
+        if not self.block_breaks or self.block_breaks[-1] != position:
+            self.block_breaks.append(position)
+
+    def text_blocks(self):
+        """The collected text split at block elements (for textnorm.normalize_blocks)"""
+        parts = self.text_parts
+        blocks = []
+        start = 0
+        for end in self.block_breaks + [len(parts)]:
+            if end > start:
+                blocks.append(''.join(parts[start:end]))
+                start = end
+        return blocks
+
+    def close(self):
+        for handler in self.handlers:
+            handler.finish()
+        result = dict(self.sections)
+        if self.keep_text:
+            blocks = self.text_blocks()
+            result['text'] = ''.join(blocks)
+            result['text_blocks'] = blocks
+        else:
+            result['text'] = ''
+            result['text_blocks'] = []
+        return result
+
+
+def walk_soup(soup, target):
+    """Replay a BeautifulSoup tree as start/data/end events on target"""
+    iterators = [iter(soup.contents)]
+    names = []
+    while iterators:
+        for node in iterators[-1]:
+            if isinstance(node, Tag):
+                if node.name in SKIPPED_TAGS:
+                    continue
+                target.start(node.name, node.attrs)
+                iterators.append(iter(node.contents))
+                names.append(node.name)
+                break
+            if type(node) in TEXT_STRING_TYPES:
+                target.data(node)
+        else:
+            iterators.pop()
+            if names:
+                target.end(names.pop())
+    return target.close()
+
+
+class PageExtractor:
+    """Extract metadata, content blocks, media, links and text in one tree walk"""
+
+    def __init__(self, handler_classes=DEFAULT_HANDLERS, keep_text=True):
+        """keep_text=False leaves 'text' empty and skips collecting it"""
+        self.handler_classes = list(handler_classes)
+        self.keep_text = keep_text
+
+    def register(self, handler_class):
+        """Add an ElementHandler subclass to every subsequent walk"""
+        self.handler_classes.append(handler_class)
+
+    def start(self, url):
+        """Return a fresh event target for one page"""
+        return ExtractionRun(self, url)
+
+    def extract(self, soup, url):
+        """Walk a parsed BeautifulSoup tree once and return every extracted section
+
+        The result has 'metadata', 'content_blocks', 'media' and 'links' dicts
+        plus 'text', the equivalent of soup.get_text() with scripts stripped,
+        and 'text_blocks', the same text split at block elements.
+        """
+        return walk_soup(soup, self.start(url))
@@ -0,0 +1,75 @@
+"""
+gunicorn configuration that shares the model weights between workers
+
+    gunicorn -c gunicorn.conf.py crawl4ai_app:app
+
+With GUNICORN_PRELOAD on (the default) the app is imported and the Hugging
+Face models are loaded once, in the master process, before the workers are
+forked. Workers then share the weight pages with the master copy-on-write:
+nothing writes to the tensors, so the pages stay shared and each additional
+worker costs its own Python heap, not another copy of BART. gc.freeze() moves
+everything loaded so far out of the garbage collector's reach, so collections
+in the workers don't dirty (and copy) the pages holding those objects.
+
+With GUNICORN_PRELOAD=false every worker imports the app itself and, if
+MODEL_PRELOAD is set, loads its own copy of the models at boot; otherwise
+each worker loads them on first use.
+
+Inference worker threads and SQLite connections are reopened in each forked
+worker (see inference.py and llm_cache.py). Memory per worker can be checked
+with benchmarks/worker_memory.py.
+
+WEB_CONCURRENCY defaults to a single worker with GUNICORN_THREADS threads.
+Some state is per process: each worker has its own inference queues (so
+requests only batch with others in the same worker), its own in-memory
+near-duplicate index (NEAR_DUP_PATH shares fingerprints stored before a
+worker starts, not ones added later by its siblings) and its own /metrics.
+Job state (jobs.py), the LLM cache file and the result store are SQLite files
+shared by all workers. Raise WEB_CONCURRENCY for more CPU parallelism when
+that trade-off is acceptable.
+"""
+
+import gc
+import os
+import sys
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+# One worker by default, because some state is per process (see above)
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+# Threads per worker: /api/jobs event streams and batch/crawl streams hold a thread each
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+model_preload = os.getenv('MODEL_PRELOAD', 'false').lower() in ('1', 'true', 'yes')
+
+
+def load_models(app_uri, log, where):
+    """Call initialize_models() in the app module behind app_uri (e.g. 'crawl4ai_app:app')"""
+    module = sys.modules.get(app_uri.split(':')[0])
+    if module is None or not hasattr(module, 'initialize_models'):
+        log.warning("%s has no initialize_models(); models will load on first use", app_uri)
+        return
+    try:
+        failures = module.initialize_models() or {}
+    except Exception as e:
+        failures = {'models': str(e)}
+    if not failures:
+        log.info("Models loaded in %s", where)
+        return
+    for name, error in failures.items():
+        log.error("Failed to load the %s model in %s: %s", name, where, error)
+    log.error("%d model(s) failed to load in %s; they will be retried on first use and "
+              "requests needing them fail until then", len(failures), where)
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before any worker is forked
+    if preload_app:
+        load_models(server.app.app_uri, server.log, 'master')
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    if not preload_app and model_preload:
+        load_models(worker.app.app_uri, worker.log, f'worker {worker.pid}')
@@ -0,0 +1,336 @@
+"""
+On-disk HTTP response cache with conditional revalidation
+
+Sits between the scrape functions and the ConnectionPool and follows the
+private-cache rules of RFC 7234 closely enough for scraping:
+
+- only 200 responses to GET are stored, and only when they carry a validator
+  (ETag / Last-Modified) or an explicit lifetime; no-store and Vary: * are
+  never stored
+- a stored response is served without contacting the origin while it is
+  fresh: Cache-Control max-age, else Expires, else a heuristic 10% of the time
+  since Last-Modified (capped at HTTP_CACHE_HEURISTIC_MAX seconds); no-cache
+  responses are always revalidated and stale ones are never served as-is
+- a stale response is revalidated with If-None-Match / If-Modified-Since; a
+  304 refreshes the stored headers and the stored body is reused
+
+Callers can also attach their parsed result to a cached response
+(remember_parsed). When the next fetch is a hit or a 304 the parsed result
+comes back with it, so parsing is skipped as well - and because the text is
+unchanged the LLM cache answers the summarizer and classifier.
+
+Entries live under HTTP_CACHE_DIR as <sha256>.json (metadata and parsed
+results) plus <sha256>.body, and the least recently used are evicted once the
+cache grows past HTTP_CACHE_MAX_MB.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from metrics import stage
+
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', './cache/http')
+HTTP_CACHE_MAX_MB = float(os.getenv('HTTP_CACHE_MAX_MB', 512))
+HTTP_CACHE_HEURISTIC_MAX = float(os.getenv('HTTP_CACHE_HEURISTIC_MAX', 3600))
+
+# Response headers kept with a stored body (the body is stored decoded)
+STORED_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control', 'expires', 'date', 'age', 'vary')
+
+
+def parse_cache_control(value):
+    """Parse a Cache-Control header into {directive: value or True}"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else True
+    return directives
+
+
+def http_date(value):
+    """Seconds since the epoch for an HTTP date header, or None"""
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers):
+    """How long a response stays fresh after it was generated, in seconds"""
+    cache_control = parse_cache_control(headers.get('cache-control'))
+    max_age = _seconds(cache_control.get('max-age'))
+    if max_age is not None:
+        return max_age
+
+    expires = headers.get('expires')
+    if expires is not None:
+        expires_at = http_date(expires)
+        date = http_date(headers.get('date'))
+        if expires_at is None or date is None:
+            return 0  # an invalid Expires means "already expired"
+        return max(expires_at - date, 0)
+
+    # Heuristic freshness from Last-Modified
+    last_modified = http_date(headers.get('last-modified'))
+    date = http_date(headers.get('date')) or time.time()
+    if last_modified is not None and date > last_modified:
+        return min((date - last_modified) / 10, HTTP_CACHE_HEURISTIC_MAX)
+    return 0
+
+
+class CachedResponse:
+    """A stored response; exposes the same attributes the scrape paths read from requests"""
+
+    complete = True
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.url = meta['url']
+        self.status_code = meta['status_code']
+        self.headers = meta['headers']
+        self.encoding = meta['encoding']
+        self.parsed = meta.setdefault('parsed', {})
+        self._content = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            with open(self.path + '.body', 'rb') as body:
+                self._content = body.read()
+        return self._content
+
+    def current_age(self):
+        """RFC 7234 section 4.2.3, with the request time taken as the response time"""
+        apparent_age = max(self.meta['response_time'] - (http_date(self.headers.get('date')) or self.meta['response_time']), 0)
+        age = max(apparent_age, _seconds(self.headers.get('age')) or 0)
+        return age + max(time.time() - self.meta['response_time'], 0)
+
+    def is_fresh(self):
+        if 'no-cache' in parse_cache_control(self.headers.get('cache-control')):
+            return False
+        return freshness_lifetime(self.headers) > self.current_age()
+
+    def validators(self):
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if self.headers.get('etag'):
+            headers['If-None-Match'] = self.headers['etag']
+        if self.headers.get('last-modified'):
+            headers['If-Modified-Since'] = self.headers['last-modified']
+        return headers
+
+
+class HttpCache:
+    """Disk-backed response cache used in front of ConnectionPool.stream"""
+
+    def __init__(self, directory=HTTP_CACHE_DIR, max_mb=HTTP_CACHE_MAX_MB, enabled=HTTP_CACHE_ENABLED):
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.index = {}  # key -> [bytes on disk, last access]
+        self.total_bytes = 0
+        self.counters = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'parsed_reused': 0}
+        if enabled:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    def _load_index(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name[:-5])
+                    try:
+                        size = os.path.getsize(path + '.json') + os.path.getsize(path + '.body')
+                        accessed = os.path.getmtime(path + '.json')
+                    except OSError:
+                        continue
+                    self.index[name[:-5]] = [size, accessed]
+                    self.total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def lookup(self, url):
+        """The stored response for url, or None"""
+        key = self._key(url)
+        path = self._path(key)
+        try:
+            with open(path + '.json', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        with self.lock:
+            if key in self.index:
+                self.index[key][1] = time.time()
+        return CachedResponse(path, meta)
+
+    def _write(self, key, meta, content=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a per-thread temp file and rename, so readers never see a partial file
+        tmp = f'.{threading.get_ident()}.tmp'
+        if content is not None:
+            with open(path + '.body' + tmp, 'wb') as body:
+                body.write(content)
+            os.replace(path + '.body' + tmp, path + '.body')
+        data = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        with open(path + '.json' + tmp, 'wb') as meta_file:
+            meta_file.write(data)
+        os.replace(path + '.json' + tmp, path + '.json')
+
+        size = len(data) + os.path.getsize(path + '.body')
+        with self.lock:
+            previous = self.index.get(key, [0, 0])[0]
+            self.index[key] = [size, time.time()]
+            self.total_bytes += size - previous
+            self._evict()
+        return path
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self.index.items(), key=lambda item: item[1][1]):
+            path = self._path(key)
+            for suffix in ('.json', '.body'):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+            del self.index[key]
+            self.total_bytes -= size
+            self.counters['evicted'] += 1
+            if self.total_bytes <= self.max_bytes:
+                return
+
+    def store(self, url, response, response_time):
+        """Store a 200 response if it is cacheable; returns a CachedResponse or None"""
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        cache_control = parse_cache_control(headers.get('cache-control'))
+        if (response.status_code != 200 or 'no-store' in cache_control or headers.get('vary', '').strip() == '*'
+                or not (headers.get('etag') or headers.get('last-modified') or freshness_lifetime(headers) > 0)):
+            return None
+        headers.setdefault('date', formatdate(response_time, usegmt=True))
+        meta = {
+            'url': url,
+            'status_code': response.status_code,
+            'headers': headers,
+            'encoding': response.encoding,
+            'response_time': response_time,
+            'parsed': {}
+        }
+        path = self._write(self._key(url), meta, response.content)
+        self._count('stored')
+        cached = CachedResponse(path, meta)
+        cached._content = response.content
+        return cached
+
+    def refresh(self, entry, response, response_time):
+        """Merge the headers of a 304 into a stored response"""
+        for name in STORED_HEADERS:
+            if name in response.headers and name != 'content-type':
+                entry.headers[name] = response.headers[name]
+        entry.headers['date'] = response.headers.get('date') or formatdate(response_time, usegmt=True)
+        if 'age' not in response.headers:
+            entry.headers.pop('age', None)
+        entry.meta['response_time'] = response_time
+        self._write(self._key(entry.url), entry.meta)
+
+    def fetch(self, pool, url, on_chunk=None, on_headers=None, **kwargs):
+        """GET url through the cache; returns (response, cache status)
+
+        The status is 'hit' (served from disk), 'revalidated' (304 from the
+        origin, stored body reused), 'miss' or 'bypass' (caching disabled).
+        Hits and revalidations return a CachedResponse whose .parsed holds
+        results attached with remember_parsed.
+
+        Downloads go through pool.stream, so the fetch limits apply. on_chunk
+        and on_headers are handed to it, e.g. to stop a download early; a
+        response cut short that way is returned but never stored.
+        """
+        if not self.enabled:
+            response = pool.stream(url, on_chunk=on_chunk, on_headers=on_headers, **kwargs)
+            response.raise_for_status()
+            return response, 'bypass'
+
+        entry = self.lookup(url)
+        if entry is not None and entry.is_fresh():
+            self._count('hits')
+            return entry, 'hit'
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None:
+            headers.update(entry.validators())
+        response_time = time.time()
+        response = pool.stream(url, headers=headers, on_chunk=on_chunk, on_headers=on_headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            self.refresh(entry, response, response_time)
+            self._count('revalidated')
+            return entry, 'revalidated'
+
+        response.raise_for_status()
+        self._count('misses')
+        if not response.complete:
+            return response, 'miss'
+        with stage('cache_store'):
+            stored = self.store(url, response, response_time)
+        return stored or response, 'miss'
+
+    def remember_parsed(self, response, variant, result):
+        """Attach a parsed result (e.g. per parser/extractor) to a stored response"""
+        if not isinstance(response, CachedResponse):
+            return
+        response.parsed[variant] = result
+        self._write(self._key(response.url), response.meta)
+
+    def reuse_parsed(self, response, cache_status, variant):
+        """The parsed result stored for a hit or 304, or None"""
+        if cache_status in ('hit', 'revalidated') and variant in response.parsed:
+            self._count('parsed_reused')
+            return response.parsed[variant]
+        return None
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self.index)
+            stats['bytes'] = self.total_bytes
+        stats['enabled'] = self.enabled
+        return stats
+
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def http_cache():
+    """Return the process-wide HttpCache, creating it on first use"""
+    global _http_cache
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                _http_cache = HttpCache()
+    return _http_cache
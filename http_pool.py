@@ -0,0 +1,414 @@
+"""
+Shared HTTP connection pool for the scrape paths
+
+Every static scrape goes through one process-wide ConnectionPool so TCP and
+TLS connections to a host are kept alive and reused between requests instead
+of being opened per call. Each thread gets its own requests.Session (cookies
+are not shared), but all sessions mount the same adapters, so the underlying
+urllib3 connection pools - which are thread-safe - are shared.
+
+When HTTP/2 is enabled and httpx is installed with h2 support, a single
+shared httpx.Client is used instead and multiplexes requests per host.
+There HTTP_POOL_HOST_SIZES caps the requests in flight to each listed host,
+since requests to a host share one multiplexed connection.
+
+Configuration (environment):
+    HTTP_POOL_CONNECTIONS   number of per-host pools kept (default 100)
+    HTTP_POOL_MAXSIZE       connections kept alive per host (default 10)
+    HTTP_POOL_HOST_SIZES    per-host overrides, e.g. "api.example.com=32,cdn.example.com=4"
+    HTTP2_ENABLED           use HTTP/2 through httpx when available (default true)
+
+ConnectionPool.stream() reads response bodies in chunks and enforces fetch
+limits, so a huge, endless or mislabeled response cannot use unbounded
+memory or time:
+    FETCH_MAX_BYTES         largest body accepted (default 10 MB)
+    FETCH_MAX_SECONDS       longest a whole download may take (default 30)
+    FETCH_ALLOWED_TYPES     accepted content types (default HTML, XHTML, XML and plain text;
+                            responses without a Content-Type are accepted)
+A chunk callback can stop the download early, e.g. once <head> is parsed.
+
+Streamed fetches report the connect (DNS, TCP and TLS of new connections),
+ttfb (request sent to headers received) and download stages to metrics.
+"""
+
+import os
+import threading
+import time
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+
+from metrics import record_stage
+
+try:
+    import h2  # noqa: F401 - httpx needs it for HTTP/2
+    import httpx
+except ImportError:
+    httpx = None
+
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 100))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+HTTP_POOL_HOST_SIZES = os.getenv('HTTP_POOL_HOST_SIZES', '')
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', 10 * 1024 * 1024))
+FETCH_MAX_SECONDS = float(os.getenv('FETCH_MAX_SECONDS', 30))
+FETCH_ALLOWED_TYPES = tuple(
+    value.strip().lower()
+    for value in os.getenv('FETCH_ALLOWED_TYPES', 'text/html,application/xhtml+xml,text/plain,text/xml,application/xml').split(',')
+    if value.strip()
+)
+FETCH_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def parse_host_sizes(value):
+    """Parse "host=size,host2=size" into a dict"""
+    sizes = {}
+    for item in value.split(','):
+        if '=' in item:
+            host, size = item.split('=', 1)
+            sizes[host.strip()] = int(size)
+    return sizes
+
+
+class PoolStats:
+    """Thread-safe request and new-connection counters
+
+    A request that did not need a new connection was served from the pool (a hit).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self.lock:
+            self.new_connections += 1
+
+    def snapshot(self):
+        with self.lock:
+            requests_count = self.requests
+            misses = self.new_connections
+        hits = max(requests_count - misses, 0)
+        return {
+            'requests': requests_count,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / requests_count, 3) if requests_count else 0.0
+        }
+
+
+class FetchLimitExceeded(Exception):
+    """A response broke one of the fetch limits (size, time or content type)"""
+
+
+class StreamedResponse:
+    """A response whose body was read in chunks under the fetch limits
+
+    Has the attributes the scrape paths read from a requests response.
+    complete is False when the chunk callback stopped the download early, in
+    which case content holds only what was read.
+    """
+
+    def __init__(self, url, status_code, headers, encoding, content, complete):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.encoding = encoding
+        self.content = content
+        self.complete = complete
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error for url: {self.url}', response=self)
+
+
+def check_response(status_code, headers, max_bytes=FETCH_MAX_BYTES, allowed_types=FETCH_ALLOWED_TYPES):
+    """Reject a response by its headers before any of the body is read
+
+    The content type is only checked on 2xx responses, so error pages still
+    reach raise_for_status.
+    """
+    if 200 <= status_code < 300 and allowed_types:
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in allowed_types:
+            raise FetchLimitExceeded(f"Content type '{content_type}' is not allowed")
+    length = headers.get('content-length', '')
+    if length.isdigit() and int(length) > max_bytes:
+        raise FetchLimitExceeded(f'Response is {int(length)} bytes, over the {max_bytes} byte limit')
+
+
+def read_limited(url, status_code, headers, encoding, chunks, max_bytes=FETCH_MAX_BYTES, deadline=None,
+                 allowed_types=FETCH_ALLOWED_TYPES, on_chunk=None, on_headers=None):
+    """Read an iterator of body chunks into a StreamedResponse, enforcing the limits
+
+    For a 2xx response, on_headers(headers) is called before the body is
+    read and on_chunk(chunk) for each chunk; on_chunk returning True stops
+    the download.
+    """
+    check_response(status_code, headers, max_bytes, allowed_types)
+    ok = 200 <= status_code < 300
+    if ok and on_headers is not None:
+        on_headers(headers)
+    body = bytearray()
+    complete = True
+    for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise FetchLimitExceeded(f'Response is over the {max_bytes} byte limit')
+        if deadline is not None and time.monotonic() > deadline:
+            raise FetchLimitExceeded('Response took too long to download')
+        if ok and on_chunk is not None and chunk and on_chunk(chunk):
+            complete = False
+            break
+    return StreamedResponse(url, status_code, headers, encoding, bytes(body), complete)
+
+
+def _raw_chunks(response, deadline):
+    """Body chunks of a streamed requests response as they arrive
+
+    urllib3 2's read1() returns whatever is available instead of blocking
+    until a full chunk is in, so the time limit holds for slow streams too.
+    A stalled read is ended by the read timeout, which stream() caps at
+    max_seconds (_requests_timeout).
+    """
+    raw = response.raw
+    if not hasattr(raw, 'read1'):
+        yield from response.iter_content(FETCH_CHUNK_SIZE)
+        return
+    while True:
+        try:
+            chunk = raw.read1(FETCH_CHUNK_SIZE, decode_content=True)
+        except ReadTimeoutError:
+            if time.monotonic() < deadline:
+                raise
+            raise FetchLimitExceeded('Response took too long to download')
+        if not chunk:
+            return
+        yield chunk
+
+
+def _requests_timeout(timeout, max_seconds):
+    """A requests (connect, read) timeout with reads bounded by max_seconds"""
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return connect, max_seconds if read is None else min(read, max_seconds)
+
+
+def _httpx_timeout(timeout, max_seconds):
+    """An httpx.Timeout from a requests-style timeout, with reads bounded by max_seconds"""
+    timeout = httpx.Timeout(timeout)
+    read = max_seconds if timeout.read is None else min(timeout.read, max_seconds)
+    return httpx.Timeout(connect=timeout.connect, read=read, write=timeout.write, pool=timeout.pool)
+
+
+def _httpx_chunks(response, deadline):
+    """Body chunks of a streamed httpx response as they arrive
+
+    iter_bytes() with a chunk size buffers until the chunk is full, so it is
+    iterated without one and yields each network read. The deadline is
+    checked around every read. A stalled read is ended by the request's read
+    timeout, which stream() caps at max_seconds (_httpx_timeout). So a
+    trickling body stops at the time limit, and a stalled one stops at most
+    one read timeout after it.
+    """
+    chunks = response.iter_bytes()
+    while True:
+        if time.monotonic() >= deadline:
+            raise FetchLimitExceeded('Response took too long to download')
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except httpx.TimeoutException:
+            if time.monotonic() < deadline:
+                raise
+            raise FetchLimitExceeded('Response took too long to download')
+        yield chunk
+
+
+def _counting_pool_class(base, stats):
+    """Subclass a urllib3 connection pool so every new connection is counted and its setup timed"""
+
+    class TimedConnection(base.ConnectionCls):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            record_stage('connect', time.perf_counter() - start)
+
+    class CountingConnectionPool(base):
+        ConnectionCls = TimedConnection
+
+        def _new_conn(self):
+            stats.record_connection()
+            return super()._new_conn()
+
+    return CountingConnectionPool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that records requests and new connections in a PoolStats"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self.stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, self.stats)
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+class ConnectionPool:
+    """Process-wide, thread-safe HTTP client with keep-alive connection reuse"""
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 host_pool_sizes=None, http2=HTTP2_ENABLED, verify=True):
+        self.stats_counter = PoolStats()
+        self.verify = verify
+        # Start of the TCP connect / TLS handshake in progress on this thread (httpx trace)
+        self._trace_local = threading.local()
+        self.http2 = bool(http2 and httpx is not None)
+        self._local = threading.local()
+
+        if host_pool_sizes is None:
+            host_pool_sizes = parse_host_sizes(HTTP_POOL_HOST_SIZES)
+
+        if self.http2:
+            self.client = httpx.Client(
+                http2=True,
+                verify=verify,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=pool_connections * pool_maxsize,
+                                    max_keepalive_connections=pool_connections)
+            )
+            self.adapters = {}
+            # httpx.Limits is client-wide: per-host sizes bound the requests in flight instead
+            self.host_limits = {host.lower(): threading.BoundedSemaphore(size)
+                                for host, size in host_pool_sizes.items()}
+            return
+
+        # URL prefix -> adapter; requests picks the longest matching prefix
+        self.client = None
+        self.host_limits = {}
+        default_adapter = CountingHTTPAdapter(self.stats_counter, pool_connections=pool_connections,
+                                              pool_maxsize=pool_maxsize)
+        self.adapters = {'http://': default_adapter, 'https://': default_adapter}
+        for host, size in host_pool_sizes.items():
+            adapter = CountingHTTPAdapter(self.stats_counter, pool_connections=1, pool_maxsize=size)
+            self.adapters[f'http://{host}/'] = adapter
+            self.adapters[f'https://{host}/'] = adapter
+
+    def session(self):
+        """The calling thread's requests.Session, mounted on the shared adapters"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            for prefix, adapter in self.adapters.items():
+                session.mount(prefix, adapter)
+            self._local.session = session
+        return session
+
+    def _trace(self, event_name, info):
+        """httpx trace hook: count new TCP connections and time connection setup"""
+        if event_name in ('connection.connect_tcp.started', 'connection.start_tls.started'):
+            self._trace_local.started = time.perf_counter()
+        elif event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+            record_stage('connect', time.perf_counter() - self._trace_local.started)
+            if event_name == 'connection.connect_tcp.complete':
+                self.stats_counter.record_connection()
+
+    def _host_slot(self, url):
+        """A slot under the HTTP_POOL_HOST_SIZES limit of url's host (HTTP/2 only)"""
+        limit = self.host_limits.get(urlsplit(url).netloc.lower())
+        return limit if limit is not None else nullcontext()
+
+    def get(self, url, **kwargs):
+        """GET url on a pooled connection; returns a requests or httpx response"""
+        if self.client is not None:
+            self.stats_counter.record_request()
+            with self._host_slot(url):
+                return self.client.get(url, extensions={'trace': self._trace}, **kwargs)
+        # Pass verify per call: requests lets REQUESTS_CA_BUNDLE override session.verify
+        kwargs.setdefault('verify', self.verify)
+        return self.session().get(url, **kwargs)
+
+    def stream(self, url, max_bytes=FETCH_MAX_BYTES, max_seconds=FETCH_MAX_SECONDS,
+               allowed_types=FETCH_ALLOWED_TYPES, on_chunk=None, on_headers=None, **kwargs):
+        """GET url reading the body in chunks under the fetch limits; returns a StreamedResponse
+
+        Raises FetchLimitExceeded when the body is too large, takes longer
+        than max_seconds or has a content type not in allowed_types.
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + max_seconds
+        limits = {'max_bytes': max_bytes, 'deadline': deadline, 'allowed_types': allowed_types, 'on_chunk': on_chunk,
+                  'on_headers': on_headers}
+        if self.client is not None:
+            self.stats_counter.record_request()
+            kwargs['timeout'] = _httpx_timeout(kwargs.get('timeout', self.client.timeout), max_seconds)
+            with self._host_slot(url), \
+                    self.client.stream('GET', url, extensions={'trace': self._trace}, **kwargs) as response:
+                return self._read_timed(start, str(response.url), response.status_code, response.headers,
+                                        response.encoding, _httpx_chunks(response, deadline), limits)
+
+        kwargs.setdefault('verify', self.verify)
+        kwargs['timeout'] = _requests_timeout(kwargs.get('timeout'), max_seconds)
+        with self.session().get(url, stream=True, **kwargs) as response:
+            return self._read_timed(start, response.url, response.status_code, response.headers,
+                                    response.encoding, _raw_chunks(response, deadline), limits)
+
+    @staticmethod
+    def _read_timed(start, url, status_code, headers, encoding, chunks, limits):
+        """read_limited, reporting the time to headers and the body download as stages"""
+        headers_at = time.perf_counter()
+        record_stage('ttfb', headers_at - start)
+        try:
+            return read_limited(url, status_code, headers, encoding, chunks, **limits)
+        finally:
+            record_stage('download', time.perf_counter() - headers_at)
+
+    def stats(self):
+        stats = self.stats_counter.snapshot()
+        stats['transport'] = 'httpx (http2)' if self.client is not None else 'requests (http1.1)'
+        return stats
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        for adapter in set(self.adapters.values()):
+            adapter.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """Return the process-wide ConnectionPool, creating it on first use"""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = ConnectionPool()
+    return _shared_pool
@@ -0,0 +1,222 @@
+"""
+Micro-batching inference server for the Hugging Face pipelines
+
+structure_content_with_llm used to call the summarizer inline in every request
+thread, so concurrent requests fought over one pipeline a document at a time.
+InferenceServer gives each registered pipeline its own worker thread and
+queue instead. Request threads submit a text and wait on a future; the worker
+gathers whatever arrives within INFERENCE_MAX_WAIT_MS (up to
+INFERENCE_MAX_BATCH_SIZE texts) and runs it as one batch under
+torch.inference_mode().
+
+Batching is padding-aware: requests that are already queued when a batch is
+formed are drained too (up to INFERENCE_SORT_WINDOW batches' worth), sorted by
+length and cut into batches of similar-length texts, so short documents are
+not padded out to the longest one in the queue. Requests with different
+generation parameters never share a batch.
+
+InferenceServer.run() consults an LLMCache (llm_cache.py) first, so text a
+model has already processed with the same parameters never reaches the queue.
+run_many() does the same for a list of texts (the chunks of a long document)
+and queues the misses together, so they are batched with each other.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from llm_cache import cache_key
+
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', 8))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 10))
+INFERENCE_SORT_WINDOW = int(os.getenv('INFERENCE_SORT_WINDOW', 4))
+INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', 120))
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Queue and worker thread that run one pipeline in micro-batches"""
+
+    def __init__(self, name, model, max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                 max_wait_ms=INFERENCE_MAX_WAIT_MS, sort_window=INFERENCE_SORT_WINDOW):
+        self.name = name
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.sort_window = max(1, sort_window)
+        self.counters = {'requests': 0, 'batches': 0, 'errors': 0}
+        self._start()
+        # Threads do not survive fork (gunicorn --preload): forked workers get their own
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._worker, name=f'inference-{self.name}', daemon=True)
+        self.thread.start()
+
+    def submit(self, text, **params):
+        """Queue one text; the future resolves to what model(text, **params) returns"""
+        future = Future()
+        # Requests only batch with others that use the same generation parameters
+        key = tuple(sorted(params.items()))
+        self.queue.put((text, key, params, future))
+        with self.lock:
+            self.counters['requests'] += 1
+        return future
+
+    def _collect(self):
+        """Block for the first request, then gather a round of requests to run"""
+        first = self.queue.get()
+        if first is _STOP:
+            return None
+        items = [first]
+
+        # Wait up to max_wait for a full batch
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self.queue.put(_STOP)
+                break
+            items.append(item)
+
+        # Anything else already waiting joins the round so it can be length-sorted too
+        while len(items) < self.max_batch_size * self.sort_window:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self.queue.put(_STOP)
+                break
+            items.append(item)
+
+        # Drop requests whose caller gave up
+        return [item for item in items if item[3].set_running_or_notify_cancel()]
+
+    def _run_batch(self, batch, params):
+        # torch is imported with the model, on first use
+        import torch
+        texts = [text for text, _, _, _ in batch]
+        try:
+            with torch.inference_mode():
+                outputs = self.model(texts, batch_size=len(texts), **params)
+        except Exception as e:
+            with self.lock:
+                self.counters['errors'] += 1
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self.lock:
+            self.counters['batches'] += 1
+        for (_, _, _, future), output in zip(batch, outputs):
+            # Same shape as calling the pipeline on a single string
+            future.set_result(output if isinstance(output, list) else [output])
+
+    def _worker(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+
+            groups = {}
+            for item in items:
+                groups.setdefault(item[1], []).append(item)
+
+            for group in groups.values():
+                # Similar lengths in the same batch keep padding down
+                group.sort(key=lambda item: len(item[0]))
+                params = group[0][2]
+                for i in range(0, len(group), self.max_batch_size):
+                    self._run_batch(group[i:i + self.max_batch_size], params)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats['queued'] = self.queue.qsize()
+        stats['avg_batch_size'] = round(stats['requests'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
+
+    def close(self):
+        self.queue.put(_STOP)
+        self.thread.join()
+
+
+class InferenceServer:
+    """Named pipelines, each served by its own MicroBatcher"""
+
+    def __init__(self, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait_ms=INFERENCE_MAX_WAIT_MS,
+                 sort_window=INFERENCE_SORT_WINDOW, cache=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.sort_window = sort_window
+        self.cache = cache
+        self.batchers = {}
+        self.model_ids = {}
+
+    def register(self, name, model, model_id=None):
+        """Serve model (a pipeline or any callable taking a list of texts) under name
+
+        model_id identifies the weights in cache keys (defaults to name).
+        """
+        self.model_ids[name] = model_id or name
+        previous = self.batchers.get(name)
+        self.batchers[name] = MicroBatcher(name, model, self.max_batch_size, self.max_wait_ms, self.sort_window)
+        if previous is not None:
+            previous.close()
+
+    def available(self, name):
+        """True if name is registered and its model is not in a failed load (LazyModel.failed)"""
+        batcher = self.batchers.get(name)
+        return batcher is not None and not getattr(batcher.model, 'failed', False)
+
+    def submit(self, name, text, **params):
+        """Queue text for the named model and return a Future"""
+        batcher = self.batchers.get(name)
+        if batcher is None:
+            raise RuntimeError(f"Model '{name}' is not loaded")
+        return batcher.submit(text, **params)
+
+    def run(self, name, text, timeout=INFERENCE_TIMEOUT, **params):
+        """Submit and wait; returns the same result as calling the pipeline on text"""
+        return self.run_many(name, [text], timeout, **params)[0]
+
+    def run_many(self, name, texts, timeout=INFERENCE_TIMEOUT, **params):
+        """run() for several texts; the uncached ones are queued together so they share batches"""
+        texts = list(texts)
+        if self.cache is None or not self.cache.enabled:
+            futures = [self.submit(name, text, **params) for text in texts]
+            return [future.result(timeout) for future in futures]
+
+        model_id = self.model_ids.get(name, name)
+        keys = [cache_key(model_id, text, params) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        futures = {i: self.submit(name, text, **params)
+                   for i, (text, result) in enumerate(zip(texts, results)) if result is None}
+        for i, future in futures.items():
+            results[i] = future.result(timeout)
+            self.cache.put(keys[i], results[i])
+        return results
+
+    def stats(self):
+        return {name: batcher.stats() for name, batcher in self.batchers.items()}
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else {}
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,290 @@
+"""
+Background job queue for long-running scrapes
+
+POST /api/jobs hands the scrape to a JobManager and returns a job id at once,
+so a slow fetch, Selenium render or summarization never holds a web worker.
+Jobs run on a bounded thread pool (JOB_WORKERS). At most JOB_QUEUE_LIMIT jobs
+may be waiting for a worker; beyond that submit() raises QueueFull and the
+endpoint answers 429 with a Retry-After estimate.
+
+Clients poll GET /api/jobs/<id> or subscribe to /api/jobs/<id>/events
+(server-sent events). Finished jobs are kept for JOB_TTL seconds.
+
+A job runs in the process that accepted it, but under gunicorn the status
+poll or event stream can land on any worker. Every state change is therefore
+also written to a SQLite table (JOB_STORE_PATH, WAL mode) that all workers
+read: a worker that does not hold the job answers from the table and follows
+it there every JOB_POLL_INTERVAL seconds. With JOB_STORE_PATH empty, jobs
+live only in the process that runs them, which is only safe with a single
+worker.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', 100))
+JOB_TTL = float(os.getenv('JOB_TTL', 3600))
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', './cache/jobs.sqlite3')
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 0.25))
+SSE_HEARTBEAT = 15
+
+FINISHED_STATES = ('succeeded', 'failed')
+
+
+class QueueFull(Exception):
+    """Raised when JOB_QUEUE_LIMIT jobs are already waiting"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many queued jobs, try again later')
+        self.retry_after = retry_after
+
+
+class Job:
+    """One submitted unit of work and its observable state"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.http_status = None
+        self.error = None
+        # Bumped on every state change so SSE subscribers can wait for the next one
+        self.version = 0
+        self.changed = threading.Condition()
+        # Called with the job after every state change (JobStore.save)
+        self.on_change = None
+
+    def _update(self, **fields):
+        with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.changed.notify_all()
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def wait_for_change(self, version, timeout):
+        """Block until the job moves past version (or timeout); returns the current version"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        job = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'params': self.params,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.finished:
+            job['http_status'] = self.http_status
+            job['result'] = self.result
+            if self.error:
+                job['error'] = self.error
+        return job
+
+
+class JobStore:
+    """SQLite table of job state shared by every worker process"""
+
+    COLUMNS = ('id', 'kind', 'status', 'version', 'created_at', 'started_at', 'finished_at', 'http_status', 'error',
+               'params', 'result')
+
+    def __init__(self, path=JOB_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._connect()
+        # SQLite connections must not be used across fork (gunicorn --preload):
+        # forked workers open their own
+        os.register_at_fork(after_in_child=self._connect)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, '
+            'version INTEGER NOT NULL, created_at REAL NOT NULL, started_at REAL, finished_at REAL, '
+            'http_status INTEGER, error TEXT, params TEXT, result TEXT)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)')
+        self.connection.commit()
+
+    def _connect(self):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+
+    def save(self, job):
+        row = (job.id, job.kind, job.status, job.version, job.created_at, job.started_at, job.finished_at,
+               job.http_status, job.error, json.dumps(job.params, default=str),
+               json.dumps(job.result, default=str) if job.result is not None else None)
+        with self.lock:
+            self.connection.execute(f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) "
+                                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})", row)
+            self.connection.commit()
+
+    def load(self, job_id):
+        """A snapshot of the stored job, or None"""
+        with self.lock:
+            row = self.connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?",
+                                          (job_id,)).fetchone()
+        if row is None:
+            return None
+        values = dict(zip(self.COLUMNS, row))
+        job = Job(values['kind'], json.loads(values['params']))
+        for name in ('id', 'status', 'version', 'created_at', 'started_at', 'finished_at', 'http_status', 'error'):
+            setattr(job, name, values[name])
+        job.result = json.loads(values['result']) if values['result'] is not None else None
+        return job
+
+    def expire(self, cutoff):
+        """Delete jobs that finished before cutoff"""
+        with self.lock:
+            self.connection.execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,))
+            self.connection.commit()
+
+
+class JobManager:
+    """Bounded worker pool plus job registry"""
+
+    def __init__(self, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT, ttl=JOB_TTL, store_path=JOB_STORE_PATH):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        # Jobs running (or run) in this process; the store holds every process's jobs
+        self.jobs = {}
+        self.store = JobStore(store_path) if store_path else None
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.counters = {'submitted': 0, 'rejected': 0, 'succeeded': 0, 'failed': 0}
+        # Moving average of job run time, for Retry-After estimates
+        self.avg_duration = 1.0
+
+    def _expire(self):
+        """Forget finished jobs older than ttl (called with the lock held)"""
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+        if self.store is not None:
+            self.store.expire(cutoff)
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up"""
+        with self.lock:
+            waiting = self.queued - self.queue_limit + 1
+            return max(1, math.ceil(self.avg_duration * max(waiting, 1) / self.workers))
+
+    def submit(self, func, params, kind='scrape'):
+        """Queue func(params) -> (result, http_status); raises QueueFull when saturated"""
+        with self.lock:
+            self._expire()
+            if self.queued >= self.queue_limit:
+                self.counters['rejected'] += 1
+                saturated = True
+            else:
+                saturated = False
+                job = Job(kind, params)
+                if self.store is not None:
+                    job.on_change = self.store.save
+                    self.store.save(job)
+                self.jobs[job.id] = job
+                self.queued += 1
+                self.counters['submitted'] += 1
+        if saturated:
+            raise QueueFull(self.retry_after())
+
+        self.executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job, func):
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+        job._update(status='running', started_at=time.time())
+
+        try:
+            result, http_status = func(job.params)
+            error = result.get('error') if http_status >= 400 and isinstance(result, dict) else None
+        except Exception as e:
+            result, http_status, error = {'error': str(e)}, 500, str(e)
+
+        status = 'failed' if error or http_status >= 400 else 'succeeded'
+        finished_at = time.time()
+        with self.lock:
+            self.running -= 1
+            self.counters[status] += 1
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * (finished_at - job.started_at)
+        job._update(status=status, finished_at=finished_at, result=result, http_status=http_status, error=error)
+
+    def get(self, job_id):
+        """The job if this process runs it, else a snapshot from the store (None if unknown)"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    def _poll(self, job, version, timeout):
+        """The stored job once its version differs from version (the same job on timeout, None once expired)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            latest = self.store.load(job.id)
+            if latest is None or latest.version != version or time.monotonic() >= deadline:
+                return latest
+            time.sleep(JOB_POLL_INTERVAL)
+
+    def events(self, job):
+        """Server-sent event lines for job, until it finishes"""
+        with self.lock:
+            local = self.jobs.get(job.id) is job
+        version = -1
+        while True:
+            if local:
+                current = job.wait_for_change(version, SSE_HEARTBEAT)
+            else:
+                # Another worker runs the job: follow it through the store
+                job = self._poll(job, version, SSE_HEARTBEAT)
+                if job is None:
+                    return
+                current = job.version
+            if current == version:
+                yield ': keep-alive\n\n'
+                continue
+            version = current
+            event = 'done' if job.finished else 'status'
+            yield f'event: {event}\ndata: {json.dumps(job.to_dict())}\n\n'
+            if job.finished:
+                return
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats.update({
+                'queued': self.queued,
+                'running': self.running,
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'tracked': len(self.jobs)
+            })
+        return stats
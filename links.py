@@ -0,0 +1,132 @@
+"""
+URL resolution and link classification for the extractors
+
+Link-heavy pages repeat the same hrefs (navigation, pagination, tag links)
+thousands of times, so:
+
+- join_url() is urljoin behind an LRU of URL_CACHE_SIZE entries, shared by
+  every page, so a repeated href is resolved once
+- classify_url() parses each absolute URL once (also cached) for its netloc
+  and social platform
+- the platform comes from the host, looked up label by label in
+  SOCIAL_DOMAINS (www.m.youtube.com -> m.youtube.com -> youtube.com), so the
+  cost depends on the host's depth, not on how many domains are listed
+- LinkCollector keeps one entry per URL in each category with a count of
+  the anchors that pointed to it
+
+SOCIAL_DOMAINS extends the built-in host list: "mastodon.social=mastodon,tiktok.com=tiktok".
+"""
+
+import os
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit
+
+URL_CACHE_SIZE = int(os.getenv('URL_CACHE_SIZE', 65536))
+
+
+def parse_domain_platforms(value):
+    """Parse "host=platform,host2=platform" into a dict"""
+    domains = {}
+    for item in value.split(','):
+        if '=' in item:
+            host, platform = item.split('=', 1)
+            domains[host.strip().lower()] = platform.strip()
+    return domains
+
+
+# Host (or parent domain) -> platform reported for links to it
+SOCIAL_DOMAINS = {
+    'facebook.com': 'facebook',
+    'fb.com': 'facebook',
+    'fb.me': 'facebook',
+    'twitter.com': 'twitter',
+    'x.com': 'twitter',
+    't.co': 'twitter',
+    'instagram.com': 'instagram',
+    'instagr.am': 'instagram',
+    'linkedin.com': 'linkedin',
+    'lnkd.in': 'linkedin',
+    'youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'youtube-nocookie.com': 'youtube'
+}
+SOCIAL_DOMAINS.update(parse_domain_platforms(os.getenv('SOCIAL_DOMAINS', '')))
+
+
+def platform_for_host(host, domains=SOCIAL_DOMAINS):
+    """Platform of host or of its closest parent domain listed in domains, else None"""
+    while host:
+        platform = domains.get(host)
+        if platform is not None:
+            return platform
+        _, _, host = host.partition('.')
+    return None
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def join_url(base_url, href):
+    """urljoin(base_url, href), cached"""
+    return urljoin(base_url, href)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def classify_url(url):
+    """(netloc, social platform or None) of an absolute URL, cached"""
+    parts = urlsplit(url)
+    return parts.netloc, platform_for_host(parts.hostname or '')
+
+
+def url_cache_stats():
+    stats = {}
+    for name, func in (('join', join_url), ('classify', classify_url)):
+        info = func.cache_info()
+        lookups = info.hits + info.misses
+        stats[f'{name}_hits'] = info.hits
+        stats[f'{name}_misses'] = info.misses
+        stats[f'{name}_hit_rate'] = round(info.hits / lookups, 3) if lookups else 0.0
+    return stats
+
+
+class LinkCollector:
+    """Fills a links section ('internal', 'external', 'social') for one page, one entry per URL"""
+
+    def __init__(self, base_url, links):
+        self.base_url = base_url
+        # The base URL is split once per page
+        self.base_netloc = urlsplit(base_url).netloc
+        self.links = links
+        self.seen = {}
+        self.seen_social = {}
+
+    def add(self, href, title=''):
+        """Record one anchor; returns its entries (one, or two for a social link)
+
+        A URL seen before gets its count bumped and keeps its first title and
+        text; entries whose text is still empty can be filled in by the caller.
+        """
+        full_url = join_url(self.base_url, href)
+        netloc, platform = classify_url(full_url)
+
+        link = self.seen.get(full_url)
+        if link is None:
+            link = self.seen[full_url] = {'url': full_url, 'text': '', 'title': title, 'count': 0}
+            self.links['internal' if netloc == self.base_netloc else 'external'].append(link)
+        elif title and not link['title']:
+            link['title'] = title
+        link['count'] += 1
+        if platform is None:
+            return [link]
+
+        social = self.seen_social.get(full_url)
+        if social is None:
+            social = self.seen_social[full_url] = {'url': full_url, 'text': '', 'platform': platform, 'count': 0}
+            self.links['social'].append(social)
+        social['count'] += 1
+        return [link, social]
+
+    @staticmethod
+    def set_text(entries, text):
+        """Give entries that have no text yet the anchor's text"""
+        for entry in entries:
+            if not entry['text']:
+                entry['text'] = text
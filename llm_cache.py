@@ -0,0 +1,167 @@
+"""
+Content-hash cache for summarizer and classifier results
+
+Re-scrapes of unchanged pages and mirrored content would otherwise repeat a
+multi-second model call for text that has already been processed. Results are
+keyed on a SHA-256 of the model id, the generation parameters and the
+whitespace-normalized (already truncated) input text, and kept in two tiers:
+
+- an in-memory LRU of LLM_CACHE_SIZE entries
+- an optional SQLite file (LLM_CACHE_PATH) that survives restarts and is
+  trimmed least-recently-used first once it grows past LLM_CACHE_MAX_MB
+
+Leave LLM_CACHE_PATH empty to keep the cache in memory only; set
+LLM_CACHE_SIZE=0 to disable caching.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from textnorm import normalize_whitespace
+
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', 1024))
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '')
+LLM_CACHE_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', 256))
+
+
+def cache_key(model_id, text, params):
+    """Hash of model, generation parameters and normalized text"""
+    normalized = normalize_whitespace(text)
+    payload = json.dumps([model_id, sorted(params.items()), normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """SQLite-backed key/value tier with least-recently-used size eviction"""
+
+    def __init__(self, path, max_bytes):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connect()
+        # SQLite connections must not be used across fork (gunicorn --preload):
+        # forked workers open their own
+        os.register_at_fork(after_in_child=self._connect)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self.connection.commit()
+        self.total_bytes = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _connect(self):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+            self.connection.commit()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        with self.lock:
+            row = self.connection.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+            self.connection.execute('INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                                    (key, data, size, time.time()))
+            self.total_bytes += size - (row[0] if row else 0)
+            self._evict()
+            self.connection.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the tier fits in max_bytes"""
+        while self.total_bytes > self.max_bytes:
+            rows = self.connection.execute('SELECT key, size FROM entries ORDER BY accessed LIMIT 64').fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for key, size in rows:
+                self.connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    return
+
+    def stats(self):
+        with self.lock:
+            entries = self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            return {'entries': entries, 'bytes': self.total_bytes}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class LLMCache:
+    """In-memory LRU in front of an optional DiskCache, with hit/miss counters"""
+
+    def __init__(self, max_entries=LLM_CACHE_SIZE, path=LLM_CACHE_PATH, max_mb=LLM_CACHE_MAX_MB):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.disk = DiskCache(path, int(max_mb * 1024 * 1024)) if path and max_entries > 0 else None
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self._remember(key, value)
+                with self.lock:
+                    self.counters['disk_hits'] += 1
+                return value
+
+        with self.lock:
+            self.counters['misses'] += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self.entries)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 3) if lookups else 0.0
+        if self.disk is not None:
+            stats['disk'] = self.disk.stats()
+        return stats
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,247 @@
+"""
+Main-content detection: the article body of a page, for the summarizer
+
+On many pages most of the text is navigation, cookie banners, sidebars,
+related-article boxes, comments and footers. MainContentHandler (extractor.py)
+records where every container element (div, article, section, td, ...) and
+every anchor starts and ends in the page text during the same parse, and
+select_main_content() scores the containers afterwards, in the style of
+Readability:
+
+- every text block of at least MIN_BLOCK_CHARS characters scores 1, plus 1
+  per comma, plus 1 per 100 characters (at most 3). The score goes to the
+  block's container, half of it to the parent and less to the ancestors above
+- each container gets a bonus or penalty for its tag and for class, id and
+  role values that look like content (article, post, entry, ...) or
+  boilerplate (nav, sidebar, comment, cookie, ...), and is scaled by
+  1 - its link density (characters inside anchors / characters)
+- the best container wins. When several containers score close to it (the
+  posts of a thread), their nearest common container wins instead, and a
+  parent that scores higher than the winner replaces it. Sibling containers
+  scoring at least a fifth of the winner join it (articles split over several
+  divs)
+- inside the winner, text under boilerplate-looking containers (share bars,
+  related links, comment forms) or under containers that are mostly links is
+  dropped
+
+When the winner has fewer than MAIN_CONTENT_MIN_CHARS characters, the whole
+page minus its boilerplate containers is used instead, and pages with no
+article-like text at all (link directories, timetables) keep all their text.
+MAIN_CONTENT=false turns detection off, and summaries cover the whole page
+text again.
+"""
+
+import os
+import re
+from functools import lru_cache
+from itertools import accumulate
+
+MAIN_CONTENT = os.getenv('MAIN_CONTENT', 'true').lower() in ('1', 'true', 'yes')
+MAIN_CONTENT_MIN_CHARS = int(os.getenv('MAIN_CONTENT_MIN_CHARS', 250))
+
+# Blocks shorter than this (menu items, buttons, labels) score nothing
+MIN_BLOCK_CHARS = 25
+
+# Best-scoring containers compared when looking for a common ancestor
+TOP_CANDIDATES = 5
+
+# Containers the text is credited to; all of them are block elements, so a
+# text block never straddles a container boundary
+CONTAINER_TAGS = ('main', 'article', 'section', 'div', 'td', 'blockquote', 'aside', 'nav', 'header', 'footer', 'form')
+
+TAG_WEIGHTS = {
+    'article': 10,
+    'main': 10,
+    'div': 5,
+    'td': 3,
+    'blockquote': 3,
+    'form': -3,
+    'header': -25,
+    'aside': -25,
+    'nav': -25,
+    'footer': -25
+}
+
+# Containers whose text is left out of the main content when nested in it
+# (an article's own <header> holds its headline, so it stays)
+BOILERPLATE_TAGS = frozenset(['aside', 'nav', 'footer', 'form'])
+
+POSITIVE_NAMES = re.compile(r'article|body|content|entry|h-?entry|main|page|post|text|blog|story|prose', re.I)
+NEGATIVE_NAMES = re.compile(
+    r'-ad-|^ads?$|advert|banner|breadcrumb|combx|comment|community|consent|contact|cookie|disqus|extra|foot'
+    r'|gdpr|header|masthead|menu|meta|modal|nav|newsletter|outbrain|pager|pagination|popup|promo|related'
+    r'|remark|replies|reviews|rss|share|shoutbox|sidebar|skyscraper|social|sponsor|subscribe|taboola|tags|tool|widget',
+    re.I
+)
+ROLE_WEIGHTS = {
+    'main': 25,
+    'article': 25,
+    'navigation': -25,
+    'banner': -25,
+    'contentinfo': -25,
+    'complementary': -25,
+    'search': -25,
+    'dialog': -25
+}
+
+
+@lru_cache(maxsize=4096)
+def name_weight(value):
+    """+25 for a class or id value that looks like content, -25 for boilerplate (both can apply)"""
+    weight = 0
+    if NEGATIVE_NAMES.search(value):
+        weight -= 25
+    if POSITIVE_NAMES.search(value):
+        weight += 25
+    return weight
+
+
+def attribute_weight(attrs):
+    """Weight of an element's class, id and role attributes"""
+    weight = 0
+    for name in ('class', 'id'):
+        value = attrs.get(name)
+        if value:
+            weight += name_weight(' '.join(value) if isinstance(value, list) else value)
+    role = attrs.get('role')
+    if role:
+        weight += ROLE_WEIGHTS.get(role, 0)
+    return weight
+
+
+def describe(tag, attrs):
+    """'article#post.entry.full' - a CSS-like label for the winning container"""
+    label = tag
+    if attrs.get('id'):
+        label += '#' + attrs['id']
+    classes = attrs.get('class')
+    if classes:
+        label += ''.join('.' + name for name in (classes if isinstance(classes, list) else classes.split()))
+    return label
+
+
+def select_main_content(parts, breaks, containers, anchors, min_chars=None):
+    """{'container', 'text_blocks'} for the main content of a page
+
+    parts are the collected text strings and breaks the indexes into parts
+    where block elements start or end (ExtractionRun.text_parts and
+    block_breaks). containers are (tag, attrs, start, end, parent) in
+    document order, with start/end indexes into parts and parent the index
+    of the enclosing container (-1 for none). anchors are (start, end)
+    ranges of link text. container is None when no container was picked.
+    """
+    if min_chars is None:
+        min_chars = MAIN_CONTENT_MIN_CHARS
+
+    # Per-part character counts, summed so any range is two lookups
+    in_link = bytearray(len(parts))
+    for start, end in anchors:
+        in_link[start:end] = b'\x01' * (end - start)
+    part_chars = [len(part.strip()) for part in parts]
+    chars = [0, *accumulate(part_chars)]
+    link_chars = [0, *accumulate(count if linked else 0 for count, linked in zip(part_chars, in_link))]
+
+    count = len(containers)
+    parents = [container[4] for container in containers]
+    starts = [container[2] for container in containers]
+    ends = [container[3] for container in containers]
+
+    def density(index):
+        """Share of a container's text inside anchors"""
+        start, end = starts[index], ends[index]
+        if chars[end] == chars[start]:
+            return 0.0
+        return (link_chars[end] - link_chars[start]) / (chars[end] - chars[start])
+
+    # Blocks as (text, innermost container); containers nest and never end
+    # inside a block, so the owner is found by walking up from the last
+    # container opened before the block. Each block long enough to count
+    # scores 1 + its commas + 1 per 100 characters (at most 3)
+    blocks = []
+    owner_scores = {}
+    owner = -1
+    following = 0
+    previous = 0
+    for position in breaks + [len(parts)]:
+        if position > previous:
+            while following < count and starts[following] <= previous:
+                owner = following
+                following += 1
+            while owner >= 0 and ends[owner] <= previous:
+                owner = parents[owner]
+            block_chars = chars[position] - chars[previous]
+            if block_chars:
+                text = ''.join(parts[previous:position])
+                blocks.append((text, owner))
+                if block_chars >= MIN_BLOCK_CHARS and owner >= 0:
+                    owner_scores[owner] = (owner_scores.get(owner, 0) + 1 + text.count(',')
+                                           + min(block_chars // 100, 3))
+            previous = position
+
+    # Readability-style propagation: a block's container gets its full score,
+    # the parent half, and the ancestors above a third of it divided by their level
+    scores = {}
+    for node, score in owner_scores.items():
+        level = 0
+        while node >= 0 and level < 5:
+            scores[node] = scores.get(node, 0.0) + (score if level == 0 else score / 2 if level == 1 else score / (level * 3))
+            node = parents[node]
+            level += 1
+
+    finals = {}
+    for index, score in scores.items():
+        tag, attrs = containers[index][0], containers[index][1]
+        finals[index] = (score + TAG_WEIGHTS.get(tag, 0) + attribute_weight(attrs)) * (1 - density(index))
+    ranked = sorted(finals, key=finals.get, reverse=True)[:TOP_CANDIDATES]
+    top = ranked[0] if ranked else None
+    roots = set()
+    if top is not None:
+        # Several close runners-up (posts of a thread, cards of a listing):
+        # take the nearest container holding at least three of them
+        close = [index for index in ranked[1:] if finals[index] >= finals[top] * 0.75]
+        node = parents[top]
+        while len(close) >= 3 and node >= 0:
+            if sum(starts[node] <= starts[index] and ends[index] <= ends[node] for index in close) >= 3:
+                top = node
+                break
+            node = parents[node]
+        # A parent scoring higher than its best child holds more of the article
+        last = finals.get(top, 0.0)
+        node = parents[top]
+        while node >= 0:
+            if node in finals:
+                if finals[node] < last / 3:
+                    break
+                if finals[node] > last:
+                    top = node
+                    break
+                last = finals[node]
+            node = parents[node]
+
+        # Siblings that score close enough belong to the same article
+        threshold = max(10, finals.get(top, 0.0) * 0.2)
+        roots = {index for index, final in finals.items() if parents[index] == parents[top] and final >= threshold}
+        roots.add(top)
+        if sum(chars[ends[index]] - chars[starts[index]] for index in roots) < min_chars:
+            top = None
+            roots = set()
+
+    # Containers whose text is kept: the roots and what is nested in them (or,
+    # with no root, the whole page), minus boilerplate and link lists
+    included = [False] * count
+    for index in range(count):
+        if index in roots:
+            included[index] = True
+            continue
+        parent = parents[index]
+        if parent >= 0 and not included[parent] or parent < 0 and roots:
+            continue
+        tag, attrs = containers[index][0], containers[index][1]
+        included[index] = not (tag in BOILERPLATE_TAGS or attrs and attribute_weight(attrs) < 0 or density(index) > 0.5)
+
+    text_blocks = [text for text, node in blocks if (included[node] if node >= 0 else not roots)]
+    if top is None and sum(map(len, text_blocks)) < min_chars:
+        # Nothing that looks like an article (a link directory, a timetable)
+        text_blocks = [text for text, _ in blocks]
+    container = describe(containers[top][0], containers[top][1]) if top is not None else None
+    return {'container': container, 'text_blocks': text_blocks}
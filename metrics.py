@@ -0,0 +1,205 @@
+"""
+Prometheus-style metrics and per-request stage timings for the scrape pipeline
+
+Every step of a scrape runs inside stage('<name>'): the fetch (connect,
+ttfb, download), the browser steps of Selenium scrapes, parse, extract,
+text cleanup, summarization and sentiment. Each stage is observed into the
+scrape_stage_seconds histogram and, when the request is being timed, added to
+its Timings, which a debug request returns as a per-stage breakdown.
+
+The histograms, plus gauges read from the components' stats() whenever the
+metrics are read (jobs, inference queues, HTTP and LLM caches, pools), are
+rendered in the Prometheus text format by Registry.render() for /metrics.
+Metrics are per process: under gunicorn each worker reports its own.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; from a cache lookup to a slow summarization
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current_timings = contextvars.ContextVar('scrape_timings', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, *labelvalues):
+        with self.lock:
+            series = self.series.get(labelvalues)
+            if series is None:
+                series = self.series[labelvalues] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = {labels: list(values) for labels, values in self.series.items()}
+        for labels, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, [("le", bound)])} {count}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, [("le", "+Inf")])} {values[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {values[-2]!r}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {values[-1]}')
+        return lines
+
+
+class Registry:
+    """Histograms plus gauges read from callbacks when the metrics are rendered"""
+
+    def __init__(self):
+        self.histograms = []
+        self.gauges = []  # (name, documentation, func)
+        self.stats = {}  # prefix -> (func, label name)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=STAGE_BUCKETS):
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self.histograms.append(histogram)
+        return histogram
+
+    def gauge(self, name, documentation, func):
+        """A gauge whose value is func() at render time"""
+        self.gauges.append((name, documentation, func))
+
+    def register_stats(self, prefix, func, label=None):
+        """Export the numeric values of a stats() dict as <prefix>_<key>
+
+        With label, func returns {label value: stats dict} (e.g. one dict per
+        model) and every value carries that label. Registering a prefix again
+        replaces the earlier callback.
+        """
+        self.stats[prefix] = (func, label)
+
+    def _render_stats(self, prefix, func, label):
+        samples = {}  # metric name -> [(labels, value)]
+        stats = func()
+        groups = stats.items() if label else [(None, stats)]
+        for label_value, group in groups:
+            for key, value in group.items():
+                if isinstance(value, (int, float)):
+                    labels = _format_labels((label,), (label_value,)) if label else ''
+                    samples.setdefault(f'{prefix}_{key}', []).append((labels, value))
+        lines = []
+        for name, values in sorted(samples.items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.extend(f'{name}{labels} {_format_value(value)}' for labels, value in values)
+        return lines
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        for name, documentation, func in self.gauges:
+            lines.extend([f'# HELP {name} {documentation}', f'# TYPE {name} gauge', f'{name} {_format_value(func())}'])
+        for prefix, (func, label) in self.stats.items():
+            try:
+                lines.extend(self._render_stats(prefix, func, label))
+            except Exception:
+                # One broken component must not take the whole endpoint down
+                continue
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'scrape_stage_seconds', 'Time spent in each step of the scrape pipeline', ('stage',)
+)
+REQUEST_SECONDS = registry.histogram(
+    'scrape_request_seconds', 'End-to-end scrape time, by method and outcome', ('method', 'status')
+)
+
+
+class Timings:
+    """Stage durations of one request, collected while it is the current one"""
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.perf_counter()
+        # Outcome label of the request observation; set to 'ok' on success
+        self.status = 'error'
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        """Milliseconds per stage, in the order the stages first ran, plus the total"""
+        timings = {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+        timings['total'] = round((time.perf_counter() - self.started) * 1000, 2)
+        return timings
+
+
+def record_stage(name, seconds):
+    """Observe a stage duration measured elsewhere"""
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as pipeline stage name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+class RequestTracker:
+    """Counts scrapes in flight and observes their duration"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+    @contextmanager
+    def track(self, method):
+        """Time one scrape; yields its Timings"""
+        timings = Timings()
+        token = _current_timings.set(timings)
+        with self.lock:
+            self.in_flight += 1
+        try:
+            yield timings
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            _current_timings.reset(token)
+            REQUEST_SECONDS.observe(time.perf_counter() - timings.started, method, timings.status)
+
+
+requests_tracker = RequestTracker()
+registry.gauge('scrape_in_flight', 'Scrapes currently running', lambda: requests_tracker.in_flight)
@@ -0,0 +1,266 @@
+"""
+On-demand loading of the Hugging Face models
+
+Importing transformers and torch and loading BART and the sentiment model
+used to happen at start-up, which made process start and gunicorn worker boot
+take tens of seconds. A LazyModel only imports transformers and loads its
+weights the first time it is called; the inference worker makes that call,
+so the first summarization waits for the load and later ones don't.
+
+Set MODEL_PRELOAD=true to start loading in the background at start-up
+instead (initialize_models in the apps). A load that fails is not retried
+until MODEL_RETRY_INTERVAL seconds have passed (or reload() is called);
+calls in between fail straight away.
+
+INFERENCE_BACKEND picks how the models run on CPU (SUMMARIZER_BACKEND and
+CLASSIFIER_BACKEND override it per model):
+
+- pytorch: full-precision PyTorch, as loaded
+- int8: PyTorch dynamic quantization; nn.Linear weights are stored as int8
+  and activations quantized on the fly
+- onnx: exported once to ONNX_CACHE_DIR and run on ONNX Runtime; later
+  starts load the cached export. Classifiers are exported here;
+  summarization models need optimum (pip install "optimum[onnxruntime]")
+
+Summarization does not go through pipeline("summarization"), which
+transformers 5 removed: Seq2SeqSummarizer runs the model's generate() behind
+the same call interface, on transformers 4 and 5 alike.
+"""
+
+import os
+import re
+import threading
+import time
+
+SUMMARIZER_MODEL = os.getenv('SUMMARIZER_MODEL', 'facebook/bart-large-cnn')
+CLASSIFIER_MODEL = os.getenv('CLASSIFIER_MODEL', 'cardiffnlp/twitter-roberta-base-sentiment')
+MODEL_PRELOAD = os.getenv('MODEL_PRELOAD', 'false').lower() in ('1', 'true', 'yes')
+# Seconds a failed model load is remembered before the next call tries again
+MODEL_RETRY_INTERVAL = float(os.getenv('MODEL_RETRY_INTERVAL', 300))
+
+BACKENDS = ('pytorch', 'int8', 'onnx')
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'pytorch')
+SUMMARIZER_BACKEND = os.getenv('SUMMARIZER_BACKEND', INFERENCE_BACKEND)
+CLASSIFIER_BACKEND = os.getenv('CLASSIFIER_BACKEND', INFERENCE_BACKEND)
+ONNX_CACHE_DIR = os.getenv('ONNX_CACHE_DIR', './cache/onnx')
+ONNX_OPSET = 18
+
+
+def model_key(model, backend):
+    """Model id for the LLM cache: results from different backends are not interchangeable"""
+    return model if backend == 'pytorch' else f'{model}@{backend}'
+
+
+def onnx_cache_path(model):
+    """Directory holding the ONNX export of model"""
+    return os.path.join(ONNX_CACHE_DIR, re.sub(r'[^A-Za-z0-9_.-]+', '--', model.strip('/')))
+
+
+def load_pipeline(task, model, backend='pytorch'):
+    """Build a transformers pipeline on backend; transformers is imported here, on first use"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    if task == 'summarization':
+        if backend == 'onnx':
+            return load_onnx_seq2seq(model)
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        summarizer = Seq2SeqSummarizer(AutoModelForSeq2SeqLM.from_pretrained(model).eval(),
+                                       AutoTokenizer.from_pretrained(model))
+        return apply_backend(summarizer, backend)
+
+    from transformers import pipeline
+    return apply_backend(pipeline(task, model=model), backend, onnx_cache_path(model))
+
+
+def apply_backend(pipe, backend, onnx_path=None):
+    """Run a loaded PyTorch pipeline (or anything with .model and .tokenizer) on backend"""
+    if backend == 'int8':
+        import torch
+        pipe.model = torch.ao.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == 'onnx':
+        return OnnxTextClassifier(pipe.model, pipe.tokenizer, onnx_path)
+    return pipe
+
+
+def load_onnx_seq2seq(model):
+    """Summarization pipeline on an ONNX Runtime export of model, made with optimum"""
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError:
+        raise RuntimeError('The onnx backend for summarization needs optimum: pip install "optimum[onnxruntime]"')
+    from transformers import AutoTokenizer
+
+    path = onnx_cache_path(model)
+    if os.path.isdir(path):
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(path)
+    else:
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(model, export=True)
+        ort_model.save_pretrained(path)
+    return Seq2SeqSummarizer(ort_model, AutoTokenizer.from_pretrained(model))
+
+
+class Seq2SeqSummarizer:
+    """Callable with the summarization pipeline's interface, running model.generate()
+
+    Generation settings default to the model config's summarization
+    task_specific_params (beam count, length penalty, ...), as the pipeline
+    applied them; keyword arguments of a call override them.
+    """
+
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+        params = dict((getattr(model.config, 'task_specific_params', None) or {}).get('summarization', {}))
+        # e.g. T5's "summarize: "
+        self.prefix = params.pop('prefix', '')
+        self.params = params
+
+    def __call__(self, texts, batch_size=None, truncation=True, **kwargs):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        batch_size = batch_size or 1
+        params = dict(self.params, **kwargs)
+        summaries = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer([self.prefix + text for text in texts[i:i + batch_size]],
+                                     return_tensors='pt', padding=True, truncation=truncation)
+            output = self.model.generate(**encoded, **params)
+            summaries.extend({'summary_text': text}
+                             for text in self.tokenizer.batch_decode(output, skip_special_tokens=True,
+                                                                     clean_up_tokenization_spaces=True))
+        return summaries
+
+
+def export_onnx(model, tokenizer, path):
+    """Export a sequence-classification model to path/model.onnx (batch and sequence length dynamic)"""
+    import torch
+
+    sample = tokenizer(['An example sentence.', 'Another, slightly longer example sentence.'],
+                       padding=True, return_tensors='pt')
+    names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+    class Logits(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(names, inputs))).logits
+
+    batch = torch.export.Dim('batch')
+    # Tokenizers without a length limit report a huge model_max_length
+    sequence = torch.export.Dim('sequence', max=min(tokenizer.model_max_length, 4096))
+    os.makedirs(path, exist_ok=True)
+    # Export under a temporary name so a crash never leaves a half-written model behind
+    tmp_file = os.path.join(path, f'model.onnx.{os.getpid()}.tmp')
+    torch.onnx.export(
+        Logits().eval(), tuple(sample[name] for name in names), tmp_file,
+        input_names=names, output_names=['logits'], opset_version=ONNX_OPSET,
+        dynamic_shapes={'inputs': tuple({0: batch, 1: sequence} for _ in names)}, dynamo=True, external_data=False
+    )
+    os.replace(tmp_file, os.path.join(path, 'model.onnx'))
+
+
+class OnnxTextClassifier:
+    """Callable with the text-classification pipeline's interface, running on ONNX Runtime"""
+
+    def __init__(self, model, tokenizer, path):
+        import onnxruntime
+
+        self.tokenizer = tokenizer
+        self.id2label = model.config.id2label
+        exported = os.path.join(path, 'model.onnx')
+        if not os.path.exists(exported):
+            export_onnx(model, tokenizer, path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(exported, options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def __call__(self, texts, batch_size=None, truncation=True, **kwargs):
+        import numpy as np
+
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        batch_size = batch_size or 1
+        results = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(texts[i:i + batch_size], padding=True, truncation=truncation, return_tensors='np')
+            logits = self.session.run(['logits'], {name: encoded[name].astype(np.int64) for name in self.input_names})[0]
+            # Softmax, as the text-classification pipeline does for single-label models
+            scores = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            scores /= scores.sum(axis=-1, keepdims=True)
+            for row in scores:
+                best = int(row.argmax())
+                results.append({'label': self.id2label[best], 'score': float(row[best])})
+        return results
+
+
+class LazyModel:
+    """A callable model that is loaded on its first call, once, even with concurrent callers"""
+
+    def __init__(self, name, loader, retry_interval=MODEL_RETRY_INTERVAL):
+        self.name = name
+        self.loader = loader
+        self.retry_interval = retry_interval
+        self.model = None
+        self.error = None
+        self.failed_at = None
+        self.load_time = None
+        self.loading = False
+        self.lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    @property
+    def failed(self):
+        """True while a failed load is within its retry interval"""
+        return self.failed_at is not None and time.monotonic() - self.failed_at < self.retry_interval
+
+    def get(self):
+        """The loaded model; loads it if needed
+
+        Raises RuntimeError without trying again while an earlier load is failed.
+        """
+        if self.model is None:
+            if self.failed:
+                raise RuntimeError(f"{self.name} model failed to load: {self.error}")
+            with self.lock:
+                if self.model is None:
+                    # Callers that waited on the lock see the load that just failed
+                    if self.failed:
+                        raise RuntimeError(f"{self.name} model failed to load: {self.error}")
+                    self.loading = True
+                    start = time.perf_counter()
+                    try:
+                        print(f"Loading {self.name} model...")
+                        self.model = self.loader()
+                        self.error = None
+                        self.failed_at = None
+                        self.load_time = round(time.perf_counter() - start, 2)
+                        print(f"{self.name} model loaded in {self.load_time}s")
+                    except Exception as e:
+                        self.error = str(e)
+                        self.failed_at = time.monotonic()
+                        raise
+                    finally:
+                        self.loading = False
+        return self.model
+
+    def reload(self):
+        """Forget a failed load so the next call tries again"""
+        with self.lock:
+            self.failed_at = None
+
+    def __call__(self, *args, **kwargs):
+        return self.get()(*args, **kwargs)
+
+    def status(self):
+        if self.model is not None:
+            return 'loaded'
+        if self.loading:
+            return 'loading'
+        if self.error:
+            return f'failed: {self.error}'
+        return 'not loaded'
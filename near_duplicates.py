@@ -0,0 +1,316 @@
+"""
+Near-duplicate page detection ahead of the LLM stage
+
+Large sites serve many variants of the same page (pagination, tag pages,
+printer views) that would each pay for summarization. Once a page's clean
+text is built, simhash() reduces it to a 64-bit SimHash of its 3-word
+shingles. Pages whose fingerprints differ in at most NEAR_DUP_DISTANCE bits
+are near-duplicates. The first page analyzed goes into a NearDuplicateIndex
+with its summary and sentiment, and later near-duplicates reuse them
+instead of running the models.
+
+The index is banded LSH: every fingerprint is split into NEAR_DUP_DISTANCE + 1
+bands, and two fingerprints within the distance share at least one band
+exactly. A lookup is one dict probe per band plus a popcount for each
+fingerprint in those buckets. Fingerprints and bucket entries live in compact
+arrays (about 75 bytes per page at the default distance), so a million pages
+take some 70 MB and a lookup stays in the tens of microseconds.
+
+Configuration:
+    NEAR_DUP_MODE         reuse (default): reuse the summary of a near-duplicate
+                          skip: return near-duplicates without a summary
+                          off: run the models for every page
+    NEAR_DUP_DISTANCE     largest Hamming distance that counts as a near-duplicate (default 3)
+    NEAR_DUP_MIN_WORDS    pages with fewer words are not fingerprinted (default 50)
+    NEAR_DUP_PATH         SQLite file that keeps fingerprints and results across restarts
+    NEAR_DUP_MAX_RESULTS  results kept in memory (least recently used dropped first) without
+                          NEAR_DUP_PATH (default 10000); a dropped result's fingerprint
+                          leaves the index with it
+
+numpy, when installed, computes the shingle hashes and bit votes in bulk.
+Both paths produce the same fingerprints.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NEAR_DUP_MODE = os.getenv('NEAR_DUP_MODE', 'reuse').lower()
+NEAR_DUP_DISTANCE = int(os.getenv('NEAR_DUP_DISTANCE', 3))
+NEAR_DUP_MIN_WORDS = int(os.getenv('NEAR_DUP_MIN_WORDS', 50))
+NEAR_DUP_PATH = os.getenv('NEAR_DUP_PATH', '')
+NEAR_DUP_MAX_RESULTS = int(os.getenv('NEAR_DUP_MAX_RESULTS', 10000))
+
+NEAR_DUP_MODES = ('reuse', 'skip', 'off')
+SHINGLE_WORDS = 3
+MASK64 = (1 << 64) - 1
+
+
+def _word_hash(word):
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _rotl(value, bits):
+    return ((value << bits) | (value >> (64 - bits))) & MASK64
+
+
+def _mix(value):
+    """splitmix64 finalizer, so neighbouring shingles get unrelated hashes"""
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & MASK64
+    return value ^ (value >> 31)
+
+
+def _simhash_numpy(word_hashes, ids, count):
+    hashes = np.array(word_hashes, dtype=np.uint64)[np.array(ids, dtype=np.intp)]
+    shingles = hashes[:count].copy()
+    for k in range(1, SHINGLE_WORDS):
+        shifted = hashes[k:k + count]
+        if len(shifted) < count:
+            break
+        shingles ^= (shifted << np.uint64(21 * k)) | (shifted >> np.uint64(64 - 21 * k))
+    shingles ^= shingles >> np.uint64(30)
+    shingles *= np.uint64(0xbf58476d1ce4e5b9)
+    shingles ^= shingles >> np.uint64(27)
+    shingles *= np.uint64(0x94d049bb133111eb)
+    shingles ^= shingles >> np.uint64(31)
+    # Bit votes: +1 for every shingle with the bit set, -1 otherwise
+    bits = np.unpackbits(shingles.astype('<u8').view(np.uint8)).reshape(count, 64)
+    winners = bits.sum(axis=0, dtype=np.int64) * 2 > count
+    return int.from_bytes(np.packbits(winners).tobytes(), 'little')
+
+
+def _simhash_python(word_hashes, ids, count):
+    hashes = [word_hashes[i] for i in ids]
+    votes = [0] * 64
+    for start in range(count):
+        shingle = hashes[start]
+        for k in range(1, SHINGLE_WORDS):
+            if start + k < len(hashes):
+                shingle ^= _rotl(hashes[start + k], 21 * k)
+        shingle = _mix(shingle)
+        for bit in range(64):
+            votes[bit] += (shingle >> bit) & 1
+    return sum(1 << bit for bit in range(64) if votes[bit] * 2 > count)
+
+
+def simhash(text):
+    """64-bit SimHash of text's lowercased 3-word shingles (0 for empty text)"""
+    words = text.lower().split()
+    if not words:
+        return 0
+    # One hash per distinct word; shingle hashes combine them
+    vocabulary = {}
+    ids = [vocabulary.setdefault(word, len(vocabulary)) for word in words]
+    word_hashes = [_word_hash(word) for word in vocabulary]
+    count = max(len(words) - SHINGLE_WORDS + 1, 1)
+    if np is not None:
+        return _simhash_numpy(word_hashes, ids, count)
+    return _simhash_python(word_hashes, ids, count)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _signed(fingerprint):
+    """SQLite integers are signed 64-bit"""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+class NearDuplicateIndex:
+    """Banded SimHash index mapping fingerprints to the analysis of the page they came from"""
+
+    def __init__(self, distance=NEAR_DUP_DISTANCE, path=NEAR_DUP_PATH, max_results=NEAR_DUP_MAX_RESULTS,
+                 mode=NEAR_DUP_MODE, min_words=NEAR_DUP_MIN_WORDS):
+        if mode not in NEAR_DUP_MODES:
+            raise ValueError(f"NEAR_DUP_MODE must be one of {', '.join(NEAR_DUP_MODES)}")
+        if not 0 <= distance < 32:
+            raise ValueError('NEAR_DUP_DISTANCE must be between 0 and 31')
+        self.mode = mode
+        self.distance = distance
+        self.min_words = min_words
+        self.max_results = max_results
+
+        # distance + 1 bands covering all 64 bits
+        bands = distance + 1
+        widths = [64 // bands + (1 if i < 64 % bands else 0) for i in range(bands)]
+        self.bands = []
+        shift = 0
+        for width in widths:
+            self.bands.append((shift, (1 << width) - 1))
+            shift += width
+
+        self.lock = threading.Lock()
+        self.fingerprints = array('Q')
+        self.keys = array('q')  # position -> result key (SQLite rowid, or the position itself)
+        self.buckets = [{} for _ in self.bands]
+        self.results = OrderedDict()
+        self.counters = {'lookups': 0, 'matches': 0, 'reused': 0, 'skipped': 0, 'added': 0, 'dropped': 0}
+
+        self.path = path
+        self.connection = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connect()
+            os.register_at_fork(after_in_child=self._connect)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS pages '
+                '(id INTEGER PRIMARY KEY, fingerprint INTEGER NOT NULL, url TEXT NOT NULL, result TEXT)'
+            )
+            self.connection.commit()
+            for key, fingerprint in self.connection.execute('SELECT id, fingerprint FROM pages ORDER BY id'):
+                self._insert(fingerprint & MASK64, key)
+
+    def _connect(self):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def _insert(self, fingerprint, key):
+        position = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        self.keys.append(key)
+        for buckets, (shift, mask) in zip(self.buckets, self.bands):
+            band = (fingerprint >> shift) & mask
+            bucket = buckets.get(band)
+            if bucket is None:
+                bucket = buckets[band] = array('I')
+            bucket.append(position)
+
+    def _remove(self, position):
+        """Take position out of its band buckets so lookups no longer find it"""
+        fingerprint = self.fingerprints[position]
+        for buckets, (shift, mask) in zip(self.buckets, self.bands):
+            band = (fingerprint >> shift) & mask
+            bucket = buckets.get(band)
+            if bucket is not None and position in bucket:
+                bucket.remove(position)
+                if not bucket:
+                    del buckets[band]
+        self.counters['dropped'] += 1
+
+    def add(self, fingerprint, url, result=None):
+        """Index fingerprint for url, with the result to hand to its near-duplicates"""
+        with self.lock:
+            if self.connection is not None:
+                cursor = self.connection.execute(
+                    'INSERT INTO pages (fingerprint, url, result) VALUES (?, ?, ?)',
+                    (_signed(fingerprint), url, json.dumps(result, ensure_ascii=False) if result is not None else None)
+                )
+                self.connection.commit()
+                self._insert(fingerprint, cursor.lastrowid)
+            else:
+                key = len(self.fingerprints)
+                self._insert(fingerprint, key)
+                self.results[key] = (url, result)
+                while len(self.results) > self.max_results:
+                    evicted, _ = self.results.popitem(last=False)
+                    self._remove(evicted)
+            self.counters['added'] += 1
+
+    def nearest(self, fingerprint):
+        """(position, distance) of the closest indexed fingerprint within the distance, or None"""
+        fingerprints = self.fingerprints
+        best = None
+        seen = set()
+        for buckets, (shift, mask) in zip(self.buckets, self.bands):
+            for position in buckets.get((fingerprint >> shift) & mask, ()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                distance = bin(fingerprints[position] ^ fingerprint).count('1')
+                if distance <= self.distance and (best is None or distance < best[1]):
+                    best = (position, distance)
+                    if distance == 0:
+                        return best
+        return best
+
+    def _result(self, key):
+        """(url, result) stored under key, or None once evicted"""
+        if self.connection is None:
+            stored = self.results.get(key)
+            if stored is not None:
+                self.results.move_to_end(key)
+            return stored
+        row = self.connection.execute('SELECT url, result FROM pages WHERE id = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]) if row[1] is not None else None
+
+    def check(self, text):
+        """(fingerprint, match) for a page's clean text
+
+        fingerprint is None when the index is off or the text is too short to
+        fingerprint. match is None, or a dict with the 'url', 'distance' and
+        stored 'result' (None if it was indexed without one) of the closest
+        near-duplicate. Entries whose stored page is gone are dropped from the
+        index and never matched.
+        """
+        if not self.enabled or len(text.split(None, self.min_words)) < self.min_words:
+            return None, None
+        fingerprint = simhash(text)
+        with self.lock:
+            self.counters['lookups'] += 1
+            while True:
+                found = self.nearest(fingerprint)
+                if found is None:
+                    return fingerprint, None
+                position, distance = found
+                stored = self._result(self.keys[position])
+                if stored is not None:
+                    break
+                self._remove(position)
+            self.counters['matches'] += 1
+        url, result = stored
+        return fingerprint, {'url': url, 'distance': distance, 'result': result}
+
+    def count(self, outcome):
+        """Count a 'reused' or 'skipped' near-duplicate"""
+        with self.lock:
+            self.counters[outcome] += 1
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats.update({
+                'mode': self.mode,
+                'distance': self.distance,
+                'entries': len(self.fingerprints) - self.counters['dropped'],
+                'results_in_memory': len(self.results)
+            })
+        return stats
+
+    def close(self):
+        if self.connection is not None:
+            with self.lock:
+                self.connection.close()
+
+
+_near_duplicate_index = None
+_near_duplicate_index_lock = threading.Lock()
+
+
+def near_duplicate_index():
+    """Return the process-wide NearDuplicateIndex, creating it on first use"""
+    global _near_duplicate_index
+    if _near_duplicate_index is None:
+        with _near_duplicate_index_lock:
+            if _near_duplicate_index is None:
+                _near_duplicate_index = NearDuplicateIndex()
+    return _near_duplicate_index
@@ -0,0 +1,345 @@
+"""
+Pluggable HTML parser backends for the scrape paths
+
+Every backend turns raw HTML into the start/data/end/close event stream that
+extractor.ExtractionRun consumes, so extraction code is the same whichever
+parser is used:
+
+- html.parser: BeautifulSoup with the standard library parser (the original behaviour)
+- lxml:        libxml2 SAX events through an lxml parser target, no tree is built
+- selectolax:  Lexbor (C) parse, walked directly without any BeautifulSoup objects
+
+The default comes from the HTML_PARSER environment variable and can be
+overridden per call. Building a parse tree (html.parser, selectolax) is
+timed as the parse stage and the extractor walk as extract; lxml parses
+while it extracts, so its whole pass is extract.
+
+Raw bytes are decoded from the BOM, then the HTTP Content-Type charset, then
+<meta charset>, then UTF-8 (decode_html). When the bytes do not fit that
+encoding, lxml and selectolax get BeautifulSoup's own guess (UnicodeDammit),
+so all three backends see the same text.
+
+IncrementalParser drives the same event stream from lxml's feed parser one
+downloaded chunk at a time, so a metadata-only scrape can stop the download
+as soon as <head> has been parsed.
+"""
+
+import codecs
+import os
+import re
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+from extractor import SKIPPED_TAGS, PageExtractor, walk_soup
+from metrics import stage
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    etree = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+DEFAULT_PARSER = os.getenv('HTML_PARSER', 'html.parser')
+
+# Attributes BeautifulSoup splits into lists; the other backends match that
+LIST_ATTRIBUTES = ('class', 'rel')
+
+PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([a-zA-Z0-9_-]+)', re.I)
+CONTENT_TYPE_CHARSET_RE = re.compile(r'charset=["\']?([a-zA-Z0-9_-]+)', re.I)
+# How much of a document is searched for <meta charset>
+SNIFF_BYTES = 2048
+
+
+def _codec_name(label):
+    """Python's name for a charset label, or None when it is unknown"""
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def content_type_charset(content_type):
+    """The charset declared in a Content-Type header value, or None"""
+    match = CONTENT_TYPE_CHARSET_RE.search(content_type or '')
+    return _codec_name(match.group(1)) if match else None
+
+
+def sniff_encoding(html, encoding=None):
+    """Encoding of raw HTML bytes from the BOM, the transport encoding or <meta charset>, falling back to UTF-8"""
+    if html.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if encoding and _codec_name(encoding):
+        return _codec_name(encoding)
+    match = CHARSET_RE.search(html[:SNIFF_BYTES])
+    if match:
+        name = _codec_name(match.group(1).decode('ascii'))
+        if name:
+            return name
+    return 'utf-8'
+
+
+def decode_html(html, encoding=None):
+    """Decode raw HTML bytes as sniff_encoding() says
+
+    encoding is the charset from the HTTP Content-Type, if any. Bytes that are
+    not valid in the chosen encoding (cp1252 text under a utf-8 label is
+    common) are decoded the way BeautifulSoup does, so every backend sees the
+    same text as html.parser.
+    """
+    if isinstance(html, str):
+        return html
+    try:
+        return html.decode(sniff_encoding(html, encoding))
+    except UnicodeDecodeError:
+        return UnicodeDammit(html, [encoding] if encoding else [], is_html=True).unicode_markup
+
+
+def split_list_attributes(attrs):
+    """Split class/rel values into lists the way BeautifulSoup does"""
+    for key in LIST_ATTRIBUTES:
+        value = attrs.get(key)
+        if value is not None:
+            attrs[key] = value.split()
+    return attrs
+
+
+class HtmlParserBackend:
+    """BeautifulSoup + html.parser, replayed through walk_soup"""
+
+    name = 'html.parser'
+
+    def feed(self, html, target, encoding=None):
+        # from_encoding (bytes only) would win over a BOM, so pass what sniff_encoding picks
+        options = {'from_encoding': sniff_encoding(html, encoding)} if encoding and isinstance(html, bytes) else {}
+        with stage('parse'):
+            soup = BeautifulSoup(html, 'html.parser', **options)
+        with stage('extract'):
+            return walk_soup(soup, target)
+
+
+class _SoupCompatibleTarget:
+    """Adapt raw parser events to the ones walk_soup emits for a BeautifulSoup tree
+
+    Adjacent text chunks are merged into one string per text node,
+    whitespace-only strings collapse to a single newline or space outside
+    <pre>/<textarea> (as BeautifulSoup does), and class/rel become lists.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.buffer = []
+        self.preserve_depth = 0
+
+    def start(self, tag, attrib):
+        if self.buffer:
+            self.flush()
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth += 1
+        self.target.start(tag, split_list_attributes(dict(attrib)))
+
+    def data(self, text):
+        self.buffer.append(text)
+
+    def end(self, tag):
+        if self.buffer:
+            self.flush()
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth -= 1
+        self.target.end(tag)
+
+    def close(self):
+        if self.buffer:
+            self.flush()
+        return self.target.close()
+
+    def flush(self):
+        text = ''.join(self.buffer)
+        self.buffer.clear()
+        if not self.preserve_depth and not text.strip(ASCII_SPACES):
+            text = '\n' if '\n' in text else ' '
+        self.target.data(text)
+
+
+class _HeadTrackingTarget(_SoupCompatibleTarget):
+    """_SoupCompatibleTarget that notes when the document <head> is over"""
+
+    head_done = False
+
+    def start(self, tag, attrib):
+        if tag == 'body':
+            self.head_done = True
+        super().start(tag, attrib)
+
+    def end(self, tag):
+        super().end(tag)
+        if tag == 'head':
+            self.head_done = True
+
+
+class IncrementalParser:
+    """Parse raw HTML bytes chunk by chunk with lxml's feed parser
+
+    The first SNIFF_BYTES are held back to find the charset (encoding is the
+    Content-Type charset, as for decode_html), then every chunk is decoded and
+    fed straight to libxml2, which emits the extractor events as it goes.
+    Bytes that are not valid in that charset switch the decoder to
+    BeautifulSoup's guess (UnicodeDammit) over what has arrived so far. With
+    stop_after_head, feed() returns True once <head> is complete, telling the
+    caller it can stop downloading; close() finishes the document (closing any
+    open elements) and returns the extractor's result.
+    """
+
+    def __init__(self, target, stop_after_head=False, encoding=None):
+        if etree is None:
+            raise ValueError("Parser 'lxml' is not installed")
+        self.target = _HeadTrackingTarget(target)
+        self.parser = etree.HTMLParser(target=self.target)
+        self.stop_after_head = stop_after_head
+        self.encoding = encoding
+        self.pending = b''
+        self.received = bytearray()
+        self.decoder = None
+        self.fed = False
+
+    @property
+    def done(self):
+        return self.stop_after_head and self.target.head_done
+
+    def feed(self, chunk):
+        """Parse the next chunk of bytes; returns True when the caller can stop"""
+        if self.decoder is None:
+            self.pending += chunk
+            if len(self.pending) < SNIFF_BYTES:
+                return False
+            self._start_decoding()
+        else:
+            self._decode(chunk)
+        return self.done
+
+    def _start_decoding(self):
+        self.decoder = codecs.getincrementaldecoder(sniff_encoding(self.pending, self.encoding))()
+        pending, self.pending = self.pending, b''
+        self._decode(pending)
+
+    def _decode(self, chunk, final=False):
+        self.received += chunk
+        buffered = self.decoder.getstate()[0]
+        try:
+            text = self.decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            # Re-decode from the first byte not yet decoded with the guess over everything so far
+            guess = UnicodeDammit(bytes(self.received), [self.encoding] if self.encoding else [],
+                                  is_html=True).original_encoding
+            self.decoder = codecs.getincrementaldecoder(_codec_name(guess or 'utf-8') or 'utf-8')(errors='replace')
+            text = self.decoder.decode(buffered + chunk, final)
+        self._feed_text(text)
+
+    def _feed_text(self, text):
+        if text:
+            self.parser.feed(text)
+            self.fed = True
+
+    def close(self):
+        if self.decoder is None:
+            self._start_decoding()
+        self._decode(b'', final=True)
+        if not self.fed:
+            # libxml2 refuses to close an empty document
+            self.parser.feed(' ')
+        return self.parser.close()
+
+
+class LxmlBackend:
+    """libxml2 HTML parser driving the extractor target directly"""
+
+    name = 'lxml'
+
+    def feed(self, html, target, encoding=None):
+        with stage('extract'):
+            parser = etree.HTMLParser(target=_SoupCompatibleTarget(target))
+            parser.feed(decode_html(html, encoding))
+            return parser.close()
+
+
+class SelectolaxBackend:
+    """Lexbor HTML5 parser, walked node by node"""
+
+    name = 'selectolax'
+
+    def feed(self, html, target, encoding=None):
+        with stage('parse'):
+            tree = LexborHTMLParser(decode_html(html, encoding))
+        with stage('extract'):
+            return self._walk(tree, _SoupCompatibleTarget(target))
+
+    @staticmethod
+    def _walk(tree, target):
+        node = tree.root
+        parents = []
+        while node is not None:
+            tag = node.tag
+            if tag == '-text':
+                target.data(node.text_content)
+            elif tag[0] not in '-_!' and tag not in SKIPPED_TAGS:
+                # Boolean attributes come back as None; BeautifulSoup uses ''
+                target.start(tag, {key: '' if value is None else value for key, value in node.attributes.items()})
+                child = node.child
+                if child is not None:
+                    parents.append(node)
+                    node = child
+                    continue
+                target.end(tag)
+
+            # Climb back up until there is a next sibling to visit
+            while node.next is None and parents:
+                node = parents.pop()
+                target.end(node.tag)
+            node = node.next
+        return target.close()
+
+
+PARSER_BACKENDS = {
+    'html.parser': HtmlParserBackend,
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend
+}
+
+
+def available_parsers():
+    """Names of the backends whose libraries are installed"""
+    names = ['html.parser']
+    if etree is not None:
+        names.append('lxml')
+    if LexborHTMLParser is not None:
+        names.append('selectolax')
+    return names
+
+
+def get_parser(name=None):
+    """Return the backend for name (or the configured default)
+
+    Raises ValueError for unknown backends or ones whose library is missing.
+    """
+    name = name or DEFAULT_PARSER
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser '{name}'. Choose one of: {', '.join(PARSER_BACKENDS)}")
+    if name not in available_parsers():
+        raise ValueError(f"Parser '{name}' is not installed")
+    return PARSER_BACKENDS[name]()
+
+
+def extract_page(html, url, extractor=None, parser=None, encoding=None):
+    """Parse html with the chosen backend and run extractor over it in one pass
+
+    encoding is the charset of the HTTP Content-Type (see content_type_charset);
+    raw bytes are decoded with it in preference to <meta charset>.
+    """
+    extractor = extractor or PageExtractor()
+    return get_parser(parser).feed(html, extractor.start(url), encoding)
@@ -0,0 +1,171 @@
+"""
+Readiness-based waiting for Selenium scrapes
+
+Replaces the fixed time.sleep(3) after driver.get(). Each strategy returns as
+soon as its signal fires and gives up at a hard ceiling (SELENIUM_WAIT_TIME
+seconds by default), after which the page is scraped as-is:
+
+- load:         document.readyState == 'complete'
+- network_idle: no more than NETWORK_IDLE_MAX_INFLIGHT requests in flight for
+                NETWORK_IDLE_TIME seconds, tracked through Chrome's performance log
+- selector:     a caller-supplied CSS selector is present in the DOM
+- mutation:     no DOM mutations for MUTATION_QUIET_TIME seconds
+
+Callers may pass their own ceiling, capped at SELENIUM_MAX_WAIT_TIME.
+"""
+
+import json
+import math
+import os
+import time
+
+# WebDriverWait and expected_conditions pull in most of selenium.webdriver, so
+# they are imported by the waiters on first use rather than at app start-up
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+SELENIUM_WAIT_TIME = float(os.getenv('SELENIUM_WAIT_TIME', 3))
+SELENIUM_MAX_WAIT_TIME = float(os.getenv('SELENIUM_MAX_WAIT_TIME', 30))
+SELENIUM_WAIT_STRATEGY = os.getenv('SELENIUM_WAIT_STRATEGY', 'load')
+NETWORK_IDLE_TIME = float(os.getenv('NETWORK_IDLE_TIME', 0.5))
+NETWORK_IDLE_MAX_INFLIGHT = int(os.getenv('NETWORK_IDLE_MAX_INFLIGHT', 2))
+MUTATION_QUIET_TIME = float(os.getenv('MUTATION_QUIET_TIME', 0.3))
+POLL_INTERVAL = 0.05
+
+WAIT_STRATEGIES = ('load', 'network_idle', 'selector', 'mutation')
+
+# Resolves once the DOM has been quiet for arguments[0] ms, or after arguments[1] ms
+MUTATION_QUIESCENCE_JS = """
+const quietMs = arguments[0], capMs = arguments[1], done = arguments[arguments.length - 1];
+const start = performance.now();
+let last = start;
+const observer = new MutationObserver(() => { last = performance.now(); });
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+(function check() {
+    const now = performance.now();
+    if (now - last >= quietMs || now - start >= capMs) {
+        observer.disconnect();
+        done(now - last >= quietMs);
+    } else {
+        setTimeout(check, 50);
+    }
+})();
+"""
+
+
+def _document_complete(driver):
+    return driver.execute_script('return document.readyState') == 'complete'
+
+
+def _wait_load(driver, timeout, selector):
+    from selenium.webdriver.support.ui import WebDriverWait
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(_document_complete)
+    return True
+
+
+def _wait_selector(driver, timeout, selector):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+    )
+    return True
+
+
+def _wait_network_idle(driver, timeout, selector):
+    deadline = time.monotonic() + timeout
+    inflight = set()
+    last_activity = time.monotonic()
+    while True:
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method = message.get('method')
+            if method == 'Network.requestWillBeSent':
+                inflight.add(message['params']['requestId'])
+                last_activity = time.monotonic()
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                inflight.discard(message['params']['requestId'])
+                last_activity = time.monotonic()
+
+        now = time.monotonic()
+        if (len(inflight) <= NETWORK_IDLE_MAX_INFLIGHT and now - last_activity >= NETWORK_IDLE_TIME
+                and driver.execute_script('return document.readyState') != 'loading'):
+            return True
+        if now >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+def _wait_mutation(driver, timeout, selector):
+    from selenium.webdriver.support.ui import WebDriverWait
+    start = time.monotonic()
+    # readyState first so the observer attaches to the real document
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+        lambda d: d.execute_script('return document.readyState') != 'loading'
+    )
+    remaining = max(timeout - (time.monotonic() - start), 0)
+    driver.set_script_timeout(remaining + 1)
+    return bool(driver.execute_async_script(MUTATION_QUIESCENCE_JS, MUTATION_QUIET_TIME * 1000, remaining * 1000))
+
+
+WAITERS = {
+    'load': _wait_load,
+    'network_idle': _wait_network_idle,
+    'selector': _wait_selector,
+    'mutation': _wait_mutation
+}
+
+
+def resolve_strategy(strategy=None, selector=None):
+    """Pick the wait strategy for a request; raises ValueError if it is unknown"""
+    strategy = strategy or ('selector' if selector else SELENIUM_WAIT_STRATEGY)
+    if strategy not in WAITERS:
+        raise ValueError(f"Unknown wait strategy '{strategy}'. Choose one of: {', '.join(WAIT_STRATEGIES)}")
+    if strategy == 'selector' and not selector:
+        raise ValueError("The 'selector' wait strategy needs wait_selector")
+    return strategy
+
+
+def resolve_timeout(timeout=None):
+    """Seconds to wait at most for a request; raises ValueError unless timeout is a positive number
+
+    None means SELENIUM_WAIT_TIME; larger values are capped at SELENIUM_MAX_WAIT_TIME.
+    """
+    if timeout is None:
+        return SELENIUM_WAIT_TIME
+    try:
+        seconds = float(timeout)
+    except (TypeError, ValueError):
+        raise ValueError('wait_timeout must be a number of seconds')
+    if not math.isfinite(seconds) or seconds <= 0:
+        raise ValueError('wait_timeout must be a positive number of seconds')
+    return min(seconds, SELENIUM_MAX_WAIT_TIME)
+
+
+def wait_for_page(driver, strategy=None, selector=None, timeout=None):
+    """Block until the page is ready or the ceiling is hit
+
+    Returns {'strategy', 'waited', 'timed_out'}; a timeout is not an error,
+    the caller scrapes whatever has rendered by then.
+    """
+    strategy = resolve_strategy(strategy, selector)
+    timeout = resolve_timeout(timeout)
+    start = time.monotonic()
+    try:
+        ready = WAITERS[strategy](driver, timeout, selector)
+    except TimeoutException:
+        ready = False
+    except WebDriverException as e:
+        # e.g. performance logging unavailable; fall back to readyState
+        if strategy == 'load':
+            raise
+        print(f"Wait strategy '{strategy}' failed ({e.msg}), falling back to 'load'")
+        try:
+            ready = _wait_load(driver, max(timeout - (time.monotonic() - start), 0), selector)
+        except TimeoutException:
+            ready = False
+    return {
+        'strategy': strategy,
+        'waited': round(time.monotonic() - start, 3),
+        'timed_out': not ready
+    }
@@ -0,0 +1,331 @@
+"""
+Persistent store of scrape results, queryable through /api/results
+
+Scrape responses used to be returned once and discarded. Every successful
+scrape (/api/scrape, /api/jobs, /api/scrape/batch and /api/crawl) is now also
+written to a SQLite database in WAL mode, so readers never wait for the
+writer and gunicorn workers can share one file. Each row keeps the page's
+raw_data (zlib-compressed JSON) and structured_data next to indexed columns:
+
+- url (normalized like the crawler does) and domain
+- content_hash, a SHA-256 of the page text, so unchanged pages and copies of
+  the same content can be found across URLs and scrapes
+- scraped_at, seconds since the epoch
+
+Writes are queued and a writer thread inserts whatever has accumulated, up
+to RESULT_STORE_BATCH_SIZE rows per transaction, so a batch or crawl is
+stored in bulk and encoding and compression stay off the request threads.
+Queries page by keyset (id < cursor) rather than OFFSET, so deep pages cost
+the same as the first.
+
+Configuration:
+    RESULT_STORE_PATH        SQLite file (default ./cache/results.sqlite3); empty disables the store
+    RESULT_STORE_BATCH_SIZE  most rows inserted per transaction (default 500)
+    RESULT_STORE_QUEUE_SIZE  writes queued before scrapes wait for the writer (default 10000)
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from crawler import normalize_url
+from serialization import dumps_json
+
+RESULT_STORE_PATH = os.getenv('RESULT_STORE_PATH', './cache/results.sqlite3')
+RESULT_STORE_BATCH_SIZE = int(os.getenv('RESULT_STORE_BATCH_SIZE', 500))
+RESULT_STORE_QUEUE_SIZE = int(os.getenv('RESULT_STORE_QUEUE_SIZE', 10000))
+
+# Page size limits of /api/results
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+# zlib level for raw_data: level 1 already shrinks page JSON 3-5x at a
+# fraction of the cost of the default level
+COMPRESS_LEVEL = 1
+
+SUMMARY_COLUMNS = 'id, url, domain, content_hash, scraped_at, source, status_code, title, word_count, structured_data'
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS results ('
+    'id INTEGER PRIMARY KEY, url TEXT NOT NULL, domain TEXT NOT NULL, content_hash TEXT, '
+    'scraped_at REAL NOT NULL, source TEXT NOT NULL, status_code INTEGER, title TEXT, word_count INTEGER, '
+    'raw_data BLOB NOT NULL, structured_data TEXT)',
+    # Every lookup lists newest first, so each index ends in id
+    'CREATE INDEX IF NOT EXISTS results_url ON results (url, id)',
+    'CREATE INDEX IF NOT EXISTS results_domain ON results (domain, id)',
+    'CREATE INDEX IF NOT EXISTS results_content_hash ON results (content_hash, id)',
+    'CREATE INDEX IF NOT EXISTS results_scraped_at ON results (scraped_at)'
+)
+
+# Ids follow the order results are written in, which is scrape order give or
+# take how long a result waits to be written (and across workers); time
+# bounds are widened by this many seconds before they are turned into ids
+WRITE_DELAY = 60
+
+_STOP = object()
+
+
+def content_hash(raw_data):
+    """SHA-256 of the page text, or None for results without text"""
+    text = raw_data.get('text')
+    if not text:
+        return None
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def iso_time(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_time(value):
+    """Seconds since the epoch from a number or an ISO 8601 timestamp (UTC unless it says otherwise)"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Invalid timestamp: {value}')
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def parse_results_query(args):
+    """Keyword arguments for ResultStore.query from /api/results query parameters; raises ValueError"""
+    query = {'include_raw': args.get('include_raw', '').lower() in ('1', 'true', 'yes')}
+    for name in ('url', 'domain', 'content_hash'):
+        if args.get(name):
+            query[name] = args[name]
+    for name in ('since', 'until'):
+        if args.get(name):
+            query[name] = parse_time(args[name])
+    try:
+        query['limit'] = int(args.get('limit', DEFAULT_LIMIT))
+        if args.get('cursor'):
+            query['cursor'] = int(args['cursor'])
+    except ValueError:
+        raise ValueError('limit and cursor must be integers')
+    if not 1 <= query['limit'] <= MAX_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_LIMIT}')
+    return query
+
+
+class ResultStore:
+    """SQLite (WAL) table of scrape results with a background bulk writer"""
+
+    def __init__(self, path=RESULT_STORE_PATH, batch_size=RESULT_STORE_BATCH_SIZE, queue_size=RESULT_STORE_QUEUE_SIZE):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.queue_size = queue_size
+        self.counters = {'queued': 0, 'stored': 0, 'transactions': 0, 'errors': 0}
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._open()
+        connection.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+        connection.close()
+        self._start()
+        # Connections and threads do not survive fork (gunicorn --preload):
+        # forked workers open their own
+        os.register_at_fork(after_in_child=self._start)
+        atexit.register(self.close)
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # With WAL, NORMAL only syncs at checkpoints: a power cut can lose the
+        # last transactions but never corrupts the file
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _start(self):
+        self.lock = threading.Lock()
+        self.connection = self._open()
+        self.queue = queue.Queue(self.queue_size)
+        self.thread = threading.Thread(target=self._writer, name='result-store', daemon=True)
+        self.thread.start()
+
+    def add(self, raw_data, structured_data=None, source='scrape'):
+        """Queue one scrape result to be stored"""
+        if not self.enabled:
+            return
+        self.queue.put((raw_data, structured_data, source, time.time()))
+        with self.lock:
+            self.counters['queued'] += 1
+
+    def _row(self, raw_data, structured_data, source, scraped_at):
+        url = raw_data.get('url', '')
+        title = (raw_data.get('metadata') or {}).get('title') or raw_data.get('title')
+        if not title and structured_data:
+            title = structured_data.get('title')
+        word_count = raw_data.get('word_count')
+        if word_count is None and structured_data:
+            word_count = (structured_data.get('statistics') or {}).get('word_count')
+        return (
+            normalize_url(url) or url, (urlparse(url).hostname or '').lower(), content_hash(raw_data), scraped_at,
+            source, raw_data.get('status_code'), title, word_count,
+            zlib.compress(dumps_json(raw_data), COMPRESS_LEVEL),
+            dumps_json(structured_data).decode('utf-8') if structured_data is not None else None
+        )
+
+    def insert_many(self, results, connection=None):
+        """Insert (raw_data, structured_data, source, scraped_at) tuples in one transaction"""
+        rows = [self._row(*result) for result in results]
+        connection = connection or self.connection
+        with self.lock if connection is self.connection else nullcontext():
+            with connection:
+                connection.executemany(
+                    'INSERT INTO results (url, domain, content_hash, scraped_at, source, status_code, title, '
+                    'word_count, raw_data, structured_data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+                )
+        return len(rows)
+
+    def _writer(self):
+        # The writer keeps its own connection; reads go through self.connection
+        connection = self._open()
+        while True:
+            items = [self.queue.get()]
+            # Whatever else is already waiting goes into the same transaction
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in items
+            results = [item for item in items if item is not _STOP]
+            try:
+                if results:
+                    self.insert_many(results, connection)
+                    with self.lock:
+                        self.counters['stored'] += len(results)
+                        self.counters['transactions'] += 1
+            except Exception as e:
+                with self.lock:
+                    self.counters['errors'] += len(results)
+                print(f"Result store write failed: {e}")
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+            if stop:
+                connection.close()
+                return
+
+    def flush(self):
+        """Wait until every queued result is written"""
+        if self.enabled:
+            self.queue.join()
+
+    def _record(self, row, include_raw):
+        record = {
+            'id': row[0],
+            'url': row[1],
+            'domain': row[2],
+            'content_hash': row[3],
+            'scraped_at': iso_time(row[4]),
+            'source': row[5],
+            'status_code': row[6],
+            'title': row[7],
+            'word_count': row[8],
+            'structured_data': json.loads(row[9]) if row[9] is not None else None
+        }
+        if include_raw:
+            record['raw_data'] = json.loads(zlib.decompress(row[10]))
+        return record
+
+    def query(self, url=None, domain=None, content_hash=None, since=None, until=None, cursor=None,
+              limit=DEFAULT_LIMIT, include_raw=False):
+        """{'results', 'next_cursor'}: matching results, newest first
+
+        Pass next_cursor back as cursor for the next page; it is None on the
+        last page.
+        """
+        conditions, params = [], []
+        if url is not None:
+            conditions.append('url = ?')
+            params.append(normalize_url(url) or url)
+        if domain is not None:
+            conditions.append('domain = ?')
+            params.append(domain.lower())
+        if content_hash is not None:
+            conditions.append('content_hash = ?')
+            params.append(content_hash)
+        # Time bounds also become id bounds, found through the scraped_at
+        # index, so a window far back is not reached by walking every newer id
+        if since is not None:
+            conditions.append('scraped_at >= ? AND id > COALESCE((SELECT id FROM results WHERE scraped_at < ? '
+                              'ORDER BY scraped_at DESC LIMIT 1), 0)')
+            params.extend((since, since - WRITE_DELAY))
+        if until is not None:
+            conditions.append('scraped_at < ? AND id < COALESCE((SELECT id FROM results WHERE scraped_at >= ? '
+                              'ORDER BY scraped_at LIMIT 1), 9223372036854775807)')
+            params.extend((until, until + WRITE_DELAY))
+        if cursor is not None:
+            conditions.append('id < ?')
+            params.append(cursor)
+        sql = f"SELECT {SUMMARY_COLUMNS}{', raw_data' if include_raw else ''} FROM results"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        # One extra row tells whether there is a next page
+        sql += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit + 1)
+        with self.lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        results = [self._record(row, include_raw) for row in rows[:limit]]
+        next_cursor = results[-1]['id'] if len(rows) > limit else None
+        return {'results': results, 'next_cursor': next_cursor}
+
+    def get(self, result_id):
+        """One stored result with its raw_data, or None"""
+        with self.lock:
+            row = self.connection.execute(f'SELECT {SUMMARY_COLUMNS}, raw_data FROM results WHERE id = ?',
+                                          (result_id,)).fetchone()
+        return self._record(row, True) if row is not None else None
+
+    def stats(self):
+        if not self.enabled:
+            return {'enabled': False}
+        with self.lock:
+            stats = dict(self.counters)
+            page_count = self.connection.execute('PRAGMA page_count').fetchone()[0]
+            page_size = self.connection.execute('PRAGMA page_size').fetchone()[0]
+        stats.update({'enabled': True, 'pending': self.queue.qsize(), 'bytes': page_count * page_size})
+        return stats
+
+    def close(self):
+        """Write what is queued, then stop the writer"""
+        if self.enabled and self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join(timeout=30)
+
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+
+def result_store():
+    """Return the process-wide ResultStore, creating it on first use"""
+    global _result_store
+    if _result_store is None:
+        with _result_store_lock:
+            if _result_store is None:
+                _result_store = ResultStore()
+    return _result_store
@@ -0,0 +1,131 @@
+"""
+Response encoding for the scrape endpoints
+
+Scrape results can reach several MB of JSON, so api_response() encodes them
+more cheaply than jsonify:
+
+- JSON through orjson when it is installed (the standard library otherwise)
+- MessagePack instead when the client sends Accept: application/msgpack
+  (needs msgpack)
+- the body compressed with brotli or gzip when the client's Accept-Encoding
+  allows it and the body is at least RESPONSE_COMPRESS_MIN_BYTES; brotli
+  needs the brotli package and is preferred when the client accepts both
+
+Configuration:
+    RESPONSE_COMPRESSION          compress responses (default true)
+    RESPONSE_COMPRESS_MIN_BYTES   smallest body worth compressing (default 1024)
+    RESPONSE_GZIP_LEVEL           gzip level, 1-9 (default 6)
+    RESPONSE_BROTLI_QUALITY       brotli quality, 0-11 (default 4)
+"""
+
+import gzip
+import json
+import os
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', 6))
+RESPONSE_BROTLI_QUALITY = int(os.getenv('RESPONSE_BROTLI_QUALITY', 4))
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def dumps_json(body):
+    """body as UTF-8 JSON bytes, with orjson when it can encode it"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(body)
+        except TypeError:
+            # Values orjson does not handle (non-str keys, big integers, ...)
+            pass
+    return json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_msgpack(body):
+    return msgpack.packb(body, use_bin_type=True)
+
+
+def parse_quality_list(value):
+    """Accept-style header -> {lowercased token: q}"""
+    tokens = {}
+    for part in (value or '').split(','):
+        token, *params = part.strip().split(';')
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, argument = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(argument)
+                except ValueError:
+                    quality = 0.0
+        tokens[token.strip().lower()] = quality
+    return tokens
+
+
+def wants_msgpack(accept):
+    """Whether the Accept header asks for MessagePack and msgpack is installed"""
+    if msgpack is None:
+        return False
+    accepted = parse_quality_list(accept)
+    return any(accepted.get(media_type, 0) > 0 for media_type in MSGPACK_TYPES)
+
+
+def choose_encoding(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header"""
+    accepted = parse_quality_list(accept_encoding)
+    wildcard = accepted.get('*', 0)
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def compress(data, coding):
+    if coding == 'br':
+        return brotli.compress(data, quality=RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def encode(body, accept='', accept_encoding=''):
+    """(bytes, content type, content encoding or None) for body under the given request headers"""
+    if wants_msgpack(accept):
+        data, content_type = dumps_msgpack(body), MSGPACK_TYPES[0]
+    else:
+        data, content_type = dumps_json(body), 'application/json'
+
+    coding = None
+    if RESPONSE_COMPRESSION and len(data) >= RESPONSE_COMPRESS_MIN_BYTES:
+        coding = choose_encoding(accept_encoding)
+        if coding is not None:
+            data = compress(data, coding)
+    return data, content_type, coding
+
+
+def api_response(body, status=200):
+    """A Flask response for body, encoded and compressed as the current request allows"""
+    data, content_type, coding = encode(body, request.headers.get('Accept', ''),
+                                        request.headers.get('Accept-Encoding', ''))
+    response = Response(data, status=status, content_type=content_type)
+    if coding is not None:
+        response.headers['Content-Encoding'] = coding
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
@@ -73,10 +73,67 @@ FLASK_DEBUG=True
 # Model Configuration
 MODEL_CACHE_DIR=./models
 MAX_TEXT_LENGTH=1000
+SUMMARIZER_MODEL=facebook/bart-large-cnn
+CLASSIFIER_MODEL=cardiffnlp/twitter-roberta-base-sentiment
+MODEL_PRELOAD=false
+MODEL_RETRY_INTERVAL=300
+INFERENCE_BACKEND=pytorch
+SUMMARY_CHUNK_TOKENS=900
+SUMMARY_TOKEN_BUDGET=8192
+INFERENCE_MAX_BATCH_SIZE=8
+INFERENCE_MAX_WAIT_MS=10
+LLM_CACHE_SIZE=1024
+LLM_CACHE_PATH=./cache/llm_cache.sqlite3
+LLM_CACHE_MAX_MB=256
+NEAR_DUP_MODE=reuse
+NEAR_DUP_DISTANCE=3
+RESULT_STORE_PATH=./cache/results.sqlite3
 
 # Scraping Configuration
 REQUEST_TIMEOUT=15
 SELENIUM_WAIT_TIME=3
+SELENIUM_WAIT_STRATEGY=load
+HTML_PARSER=html.parser
+TEXT_PARAGRAPHS=false
+MAIN_CONTENT=true
+URL_CACHE_SIZE=65536
+
+# Connection Pool Configuration
+HTTP_POOL_CONNECTIONS=100
+HTTP_POOL_MAXSIZE=10
+HTTP2_ENABLED=true
+
+# Fetch Limits
+FETCH_MAX_BYTES=10485760
+FETCH_MAX_SECONDS=30
+
+# HTTP Response Cache
+HTTP_CACHE_ENABLED=true
+HTTP_CACHE_DIR=./cache/http
+HTTP_CACHE_MAX_MB=512
+
+# Response Encoding
+RESPONSE_COMPRESSION=true
+RESPONSE_COMPRESS_MIN_BYTES=1024
+
+# Background Jobs
+JOB_WORKERS=4
+JOB_QUEUE_LIMIT=100
+JOB_STORE_PATH=./cache/jobs.sqlite3
+
+# Crawler Configuration
+CRAWL_MAX_PAGES=1000
+CRAWL_CONCURRENCY=16
+CRAWL_HOST_DELAY=0.1
+
+# gunicorn (gunicorn.conf.py)
+WEB_CONCURRENCY=1
+GUNICORN_THREADS=8
+GUNICORN_PRELOAD=true
+
+# Browser Pool Configuration
+BROWSER_POOL_SIZE=2
+BROWSER_MAX_USES=50
 
 # Optional: Hugging Face API Token (for private models)
 # HUGGINGFACE_TOKEN=your_token_here
@@ -102,25 +102,38 @@ class WebScraperApp {
         this.hideResults();
 
         try {
-            const response = await fetch('/api/scrape', {
+            // Queue the scrape as a background job, then follow it until it finishes
+            const response = await fetch('/api/jobs', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
                     url: url,
-                    method: method
+                    method: method,
+                    include_raw: true
                 })
             });
 
-            const data = await response.json();
+            const job = await response.json();
+
+            if (response.status === 429) {
+                const retryAfter = response.headers.get('Retry-After') || job.retry_after;
+                throw new Error(`Server is busy, please retry in ${retryAfter}s`);
+            }
+            if (!response.ok) {
+                throw new Error(job.error || 'Scraping failed');
+            }
 
-            if (response.ok && data.success) {
+            const finished = await this.waitForJob(job);
+            const data = finished.result || {};
+
+            if (finished.status === 'succeeded' && data.success) {
                 this.currentData = data;
                 this.displayResults(data);
                 this.showAlert('Scraping completed successfully!', 'success');
             } else {
-                throw new Error(data.error || 'Scraping failed');
+                throw new Error(finished.error || data.error || 'Scraping failed');
             }
         } catch (error) {
             console.error('Scraping error:', error);
@@ -130,6 +143,54 @@ class WebScraperApp {
         }
     }
 
+    waitForJob(job) {
+        // Subscribe to server-sent events; fall back to polling if they are unavailable
+        if (!window.EventSource) {
+            return this.pollJob(job.status_url);
+        }
+
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(job.events_url);
+
+            source.addEventListener('status', (event) => {
+                this.showJobStatus(JSON.parse(event.data).status);
+            });
+
+            source.addEventListener('done', (event) => {
+                source.close();
+                resolve(JSON.parse(event.data));
+            });
+
+            source.onerror = () => {
+                source.close();
+                this.pollJob(job.status_url).then(resolve, reject);
+            };
+        });
+    }
+
+    async pollJob(statusUrl) {
+        while (true) {
+            const response = await fetch(statusUrl);
+            const job = await response.json();
+
+            if (!response.ok) {
+                throw new Error(job.error || 'Job status unavailable');
+            }
+            if (job.status === 'succeeded' || job.status === 'failed') {
+                return job;
+            }
+
+            this.showJobStatus(job.status);
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
+    showJobStatus(status) {
+        const scrapeBtn = document.getElementById('scrapeBtn');
+        const label = status === 'queued' ? 'Queued...' : 'Scraping...';
+        scrapeBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${label}`;
+    }
+
     displayResults(data) {
         const { structured_data, raw_data } = data;
         
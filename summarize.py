@@ -0,0 +1,118 @@
+"""
+Long-document summarization as a chunked map-reduce
+
+structure_content_with_llm used to summarize only the first 1000 characters
+of a page. summarize_document covers the whole text instead:
+
+- split: the text is tokenized once with the summarizer's own tokenizer and
+  cut into chunks of at most SUMMARY_CHUNK_TOKENS tokens, ending at a
+  sentence boundary where one is close
+- budget: at most SUMMARY_TOKEN_BUDGET tokens go to the model in the map step;
+  longer documents are covered by chunks spread evenly across the text, so
+  the model cost levels off at budget / chunk size calls however long the
+  page is
+- map: all chunks are queued on the inference worker together, so they run
+  as batches (and unchanged chunks come from the LLM cache)
+- reduce (SUMMARY_REDUCE): the chunk summaries are summarized again into one
+  summary, in as many rounds as it takes for them to fit one chunk; without
+  it the chunk summaries are joined in document order
+"""
+
+import bisect
+import math
+import os
+import re
+
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', 900))
+SUMMARY_TOKEN_BUDGET = int(os.getenv('SUMMARY_TOKEN_BUDGET', 8192))
+SUMMARY_REDUCE = os.getenv('SUMMARY_REDUCE', 'true').lower() in ('1', 'true', 'yes')
+
+# End of a sentence: terminal punctuation followed by whitespace
+SENTENCE_END_RE = re.compile(r'[.!?]["\')\]]*\s')
+WORD_RE = re.compile(r'\S+')
+
+
+def token_spans(text, tokenizer=None):
+    """(start, end) character offsets of every token in text
+
+    Needs a fast tokenizer for exact offsets; otherwise whitespace-separated
+    words stand in for tokens.
+    """
+    if tokenizer is not None and getattr(tokenizer, 'is_fast', False):
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        return encoding['offset_mapping']
+    return [match.span() for match in WORD_RE.finditer(text)]
+
+
+def chunk_text(text, tokenizer=None, chunk_tokens=SUMMARY_CHUNK_TOKENS):
+    """Split text into chunks of at most chunk_tokens tokens; returns (chunks, total tokens)"""
+    spans = token_spans(text, tokenizer)
+    starts = [start for start, _ in spans]
+    chunks = []
+    first = 0
+    while first < len(spans):
+        last = min(first + chunk_tokens, len(spans))
+        begin, end = spans[first][0], spans[last - 1][1]
+        if last < len(spans):
+            # Cut after the last sentence end in the final quarter of the chunk, if there is one
+            floor = spans[first + (last - first) * 3 // 4][0]
+            boundary = None
+            for boundary in SENTENCE_END_RE.finditer(text, floor, end + 1):
+                pass
+            if boundary is not None:
+                end = boundary.end()
+                last = max(first + 1, bisect.bisect_left(starts, end, first, last))
+        chunks.append(text[begin:end].strip())
+        first = last
+    return [chunk for chunk in chunks if chunk], len(spans)
+
+
+def select_chunks(chunks, max_chunks):
+    """At most max_chunks chunks, spread evenly from the first to the last"""
+    if len(chunks) <= max_chunks:
+        return chunks
+    if max_chunks == 1:
+        return chunks[:1]
+    step = (len(chunks) - 1) / (max_chunks - 1)
+    return [chunks[round(i * step)] for i in range(max_chunks)]
+
+
+def summarize_document(inference, text, tokenizer=None, name='summarizer', chunk_tokens=SUMMARY_CHUNK_TOKENS,
+                       token_budget=SUMMARY_TOKEN_BUDGET, reduce=SUMMARY_REDUCE, **params):
+    """Summary of the whole of text, plus how it was produced
+
+    inference is an InferenceServer with the summarizer registered under name;
+    params are passed to every summarizer call (max_length, min_length, ...).
+    """
+    chunks, tokens = chunk_text(text, tokenizer, chunk_tokens)
+    if not chunks:
+        return {'summary': '', 'tokens': 0, 'chunks': 0, 'chunks_summarized': 0, 'coverage': 1.0, 'reduce_rounds': 0}
+    selected = select_chunks(chunks, max(1, token_budget // chunk_tokens))
+
+    # Map: every chunk in one round of batches
+    summaries = [result[0]['summary_text'] for result in inference.run_many(name, selected, **params)]
+
+    # Reduce: summarize the summaries until they fit in a single chunk, then once more
+    rounds = 0
+    if reduce and len(summaries) > 1:
+        combined = ' '.join(summaries)
+        parts, _ = chunk_text(combined, tokenizer, chunk_tokens)
+        # Each round must shrink the text (it does unless max_length is close to chunk_tokens)
+        previous = math.inf
+        while 1 < len(parts) < previous:
+            previous = len(parts)
+            combined = ' '.join(result[0]['summary_text'] for result in inference.run_many(name, parts, **params))
+            parts, _ = chunk_text(combined, tokenizer, chunk_tokens)
+            rounds += 1
+        summaries = [inference.run(name, combined, **params)[0]['summary_text']]
+        rounds += 1
+
+    return {
+        'summary': ' '.join(summaries),
+        'tokens': tokens,
+        'chunks': len(chunks),
+        'chunks_summarized': len(selected),
+        'coverage': round(min(1.0, len(selected) / len(chunks)), 3),
+        'reduce_rounds': rounds
+    }
+
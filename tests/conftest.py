@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The modules live at the top of the repository, next to app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests that go through the Flask apps must not write into ./cache
+os.environ.setdefault('RESULT_STORE_PATH', '')
+os.environ.setdefault('HTTP_CACHE_ENABLED', 'false')
@@ -0,0 +1,148 @@
+"""
+POST /api/scrape/batch against a local aiohttp server: NDJSON results in
+completion order then a summary line, the global and per-host concurrency
+caps, one failing URL not affecting the others, and the 400 paths.
+"""
+
+import asyncio
+import json
+import threading
+from collections import Counter
+
+import pytest
+from aiohttp import web
+
+from crawl4ai_app import app
+
+
+class StubServer:
+    """aiohttp server on its own thread; /page?delay=s waits s seconds and counts requests in flight"""
+
+    def __init__(self):
+        self.in_flight = Counter()
+        self.peak = Counter()
+        self.lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self.started = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self.started.wait(10)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/page', self.page)
+        app.router.add_get('/error', self.error)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = self.runner.addresses[0][1]
+        self.started.set()
+        self.loop.run_forever()
+
+    def _count(self, host, change):
+        with self.lock:
+            for key in (host, 'all'):
+                self.in_flight[key] += change
+                self.peak[key] = max(self.peak[key], self.in_flight[key])
+
+    async def page(self, request):
+        self._count(request.host, 1)
+        try:
+            await asyncio.sleep(float(request.query.get('delay', 0)))
+        finally:
+            self._count(request.host, -1)
+        return web.Response(text=f'<html><head><title>{request.query.get("delay")}</title></head>'
+                                 f'<body><p>Page</p></body></html>', content_type='text/html')
+
+    async def error(self, request):
+        raise web.HTTPInternalServerError()
+
+    def url(self, path, host='127.0.0.1'):
+        return f'http://{host}:{self.port}{path}'
+
+    def reset(self):
+        with self.lock:
+            self.in_flight.clear()
+            self.peak.clear()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture(scope='module')
+def server():
+    stub = StubServer()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def post_batch(client, body):
+    response = client.post('/api/scrape/batch', json=body)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_results_stream_in_completion_order_then_summary(server, client):
+    urls = [server.url('/page?delay=0.6'), server.url('/page?delay=0'), server.url('/page?delay=0.3')]
+    lines = post_batch(client, {'urls': urls})
+    summary = lines.pop()
+    assert [line['index'] for line in lines] == [1, 2, 0]
+    assert [line['url'] for line in lines] == [urls[1], urls[2], urls[0]]
+    assert all(line['success'] for line in lines)
+    assert lines[0]['raw_data']['metadata']['title'] == '0'
+    assert summary['done'] and summary['total'] == 3 and summary['succeeded'] == 3
+
+
+def test_global_and_per_host_caps(server, client):
+    server.reset()
+    # Two hosts as far as the client is concerned, the same server behind them
+    urls = [server.url(f'/page?delay=0.2&n={n}', host) for host in ('127.0.0.1', 'localhost') for n in range(6)]
+    lines = post_batch(client, {'urls': urls, 'concurrency': 3, 'per_host': 2})
+    assert lines[-1]['succeeded'] == 12
+    assert server.peak['all'] == 3
+    assert server.peak[f'127.0.0.1:{server.port}'] == 2
+    assert server.peak[f'localhost:{server.port}'] == 2
+
+
+def test_a_failing_url_does_not_affect_the_others(server, client):
+    urls = [server.url('/page?delay=0'), server.url('/error'), 'http://127.0.0.1:1/refused', server.url('/page?delay=0.1')]
+    lines = post_batch(client, {'urls': urls})
+    summary = lines.pop()
+    by_index = {line['index']: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[0]['success'] and by_index[3]['success']
+    assert '500' in by_index[1]['error'] and 'success' not in by_index[1]
+    assert by_index[2]['error'] and 'success' not in by_index[2]
+    assert summary['total'] == 4 and summary['succeeded'] == 2
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'data': 'not json', 'content_type': 'text/plain'},
+    {'data': '{broken', 'content_type': 'application/json'},
+    {},
+    {'json': {}},
+    {'json': {'urls': []}},
+    {'json': {'urls': 'http://example.com/'}},
+    {'json': {'urls': ['http://example.com/'], 'concurrency': 'many'}},
+    {'json': {'urls': ['http://example.com/'], 'per_host': None}},
+    {'json': {'urls': ['http://example.com/'], 'parser': 'no-such-parser'}},
+])
+def test_bad_requests_get_400(client, kwargs):
+    response = client.post('/api/scrape/batch', **kwargs)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('kwargs', [{'data': 'not json', 'content_type': 'text/plain'}, {}, {'json': {}}])
+def test_crawl_without_a_url_gets_400(client, kwargs):
+    response = client.post('/api/crawl', **kwargs)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'URL is required'}
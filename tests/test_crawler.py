@@ -0,0 +1,60 @@
+"""
+Crawler against a local aiohttp server: a seed that redirects to another
+host still has its internal links followed.
+"""
+
+import asyncio
+
+from aiohttp import web
+
+from crawl4ai_app import Crawl4AIScraper
+from crawler import Crawler, normalize_url, site_host
+
+PAGES = {
+    '/home': '<a href="/a">a</a> <a href="/b">b</a> <a href="https://elsewhere.example/">out</a>',
+    '/a': '<a href="/b">b</a> <a href="/c">c</a>',
+    '/b': '<p>b</p>',
+    '/c': '<p>c</p>',
+}
+
+
+async def crawl_redirected_seed():
+    async def page(request):
+        if request.path == '/':
+            # The seed is asked for on localhost and sent to 127.0.0.1
+            raise web.HTTPFound(f'http://127.0.0.1:{request.url.port}/home')
+        if request.path not in PAGES:
+            raise web.HTTPNotFound()
+        return web.Response(text=f'<html><body>{PAGES[request.path]}</body></html>', content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        crawler = Crawler(Crawl4AIScraper().build_page, max_pages=10, delay=0, respect_robots=False)
+        return port, [result async for result in crawler.crawl(f'http://localhost:{port}/')]
+    finally:
+        await runner.cleanup()
+
+
+def test_redirected_seed_keeps_internal_links():
+    port, results = asyncio.run(crawl_redirected_seed())
+    summary = results.pop()
+    assert summary['done'] and summary['crawled'] == 4 and summary['succeeded'] == 4
+    crawled = sorted(result['url'] for result in results if result['depth'] > 0)
+    assert crawled == [f'http://127.0.0.1:{port}/{name}' for name in ('a', 'b', 'c')]
+
+
+def test_site_host_ignores_www():
+    assert site_host('www.example.com') == site_host('example.com') == 'example.com'
+    assert site_host('www.example.com:8443') == 'example.com:8443'
+    assert site_host('wwwexample.com') == 'wwwexample.com'
+
+
+def test_normalize_url():
+    assert normalize_url('HTTP://Example.COM:80/a/./b/../c?utm_source=x&b=2&a=1#top') == 'http://example.com/a/c?a=1&b=2'
+    assert normalize_url('ftp://example.com/') is None
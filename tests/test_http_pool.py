@@ -0,0 +1,64 @@
+"""
+ConnectionPool.stream time limit on bodies that trickle in or stall, over
+httpx (HTTP/1.1 to a local server) and requests
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_pool import ConnectionPool, FetchLimitExceeded
+
+BODY_BYTES = 5000
+PIECE = b'x' * 100
+
+
+class SlowBodyHandler(BaseHTTPRequestHandler):
+    """/trickle sends 100 bytes every 0.2 s; /stall sends 100 bytes and then nothing"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(BODY_BYTES))
+        self.end_headers()
+        try:
+            for _ in range(BODY_BYTES // len(PIECE)):
+                self.wfile.write(PIECE)
+                self.wfile.flush()
+                time.sleep(0.2 if self.path == '/trickle' else 10)
+        except OSError:
+            pass  # the client gave up
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SlowBodyHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+
+
+@pytest.fixture(params=['httpx', 'requests'])
+def pool(request):
+    pool = ConnectionPool(http2=request.param == 'httpx')
+    if request.param == 'httpx' and not pool.http2:
+        pytest.skip('httpx with HTTP/2 support is not installed')
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize('path', ['/trickle', '/stall'])
+def test_slow_body_stops_at_the_time_limit(server, pool, path):
+    start = time.monotonic()
+    with pytest.raises(FetchLimitExceeded, match='too long'):
+        pool.stream(server + path, max_seconds=1, timeout=15)
+    # The read timeout is capped at max_seconds, so a stall overruns by at most about that much
+    assert time.monotonic() - start < 2.5
@@ -0,0 +1,64 @@
+"""
+LazyModel: a failed load is not retried until its retry interval has passed,
+and InferenceServer.available() is false meanwhile
+"""
+
+import pytest
+
+from inference import InferenceServer
+from models import LazyModel
+
+
+class FlakyLoader:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise OSError('weights not found')
+        return lambda texts, **params: [{'label': 'positive'} for _ in texts]
+
+
+def test_failed_load_waits_for_the_retry_interval():
+    loader = FlakyLoader(failures=1)
+    model = LazyModel('classifier', loader, retry_interval=60)
+    with pytest.raises(OSError):
+        model.get()
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match='weights not found'):
+            model.get()
+    assert loader.calls == 1
+    assert model.failed and model.status() == 'failed: weights not found'
+
+    model.reload()
+    assert model(['text']) == [{'label': 'positive'}]
+    assert loader.calls == 2 and not model.failed and model.status() == 'loaded'
+
+
+def test_failed_load_is_retried_after_the_interval():
+    loader = FlakyLoader(failures=1)
+    model = LazyModel('classifier', loader, retry_interval=0)
+    with pytest.raises(OSError):
+        model.get()
+    assert not model.failed
+    assert model.get() is not None and loader.calls == 2
+
+
+def test_unavailable_while_failed():
+    model = LazyModel('classifier', FlakyLoader(failures=1), retry_interval=60)
+    server = InferenceServer()
+    try:
+        server.register('classifier', model)
+        assert server.available('classifier')
+        with pytest.raises(OSError):
+            server.run('classifier', 'text', timeout=10)
+        assert not server.available('classifier')
+        assert not server.available('summarizer')
+
+        model.reload()
+        assert server.available('classifier')
+        assert server.run('classifier', 'text', timeout=10) == [{'label': 'positive'}]
+    finally:
+        server.close()
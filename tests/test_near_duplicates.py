@@ -0,0 +1,61 @@
+"""
+NearDuplicateIndex: a match always comes with the page it stood for, and
+entries whose stored result is gone are dropped instead of matched
+"""
+
+import random
+
+from near_duplicates import NearDuplicateIndex
+
+WORDS = ['harbor', 'budget', 'council', 'market', 'station', 'winter', 'garden', 'ticket', 'parser', 'village']
+
+
+def page_text(seed, words=2000):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(words))
+
+
+def variant(text):
+    """The same page with one word changed (a near-duplicate)"""
+    words = text.split()
+    words[len(words) // 2] = 'changed'
+    return ' '.join(words)
+
+
+def test_reuses_a_stored_result():
+    index = NearDuplicateIndex(path='', max_results=10, mode='reuse')
+    text = page_text(1)
+    fingerprint, match = index.check(text)
+    assert match is None
+    index.add(fingerprint, 'https://example.com/a', {'summary': 'A'})
+
+    _, match = index.check(variant(text))
+    assert match['url'] == 'https://example.com/a'
+    assert match['result'] == {'summary': 'A'}
+
+
+def test_evicted_result_leaves_the_index():
+    index = NearDuplicateIndex(path='', max_results=1, mode='reuse')
+    first, second = page_text(1), page_text(2)
+    index.add(index.check(first)[0], 'https://example.com/a', {'summary': 'A'})
+    index.add(index.check(second)[0], 'https://example.com/b', {'summary': 'B'})
+
+    _, match = index.check(variant(first))
+    assert match is None
+    assert index.stats()['entries'] == 1
+    assert index.check(variant(second))[1]['url'] == 'https://example.com/b'
+
+
+def test_missing_row_is_dropped(tmp_path):
+    index = NearDuplicateIndex(path=str(tmp_path / 'near.sqlite3'), mode='reuse')
+    text = page_text(1)
+    index.add(index.check(text)[0], 'https://example.com/a', {'summary': 'A'})
+    index.connection.execute('DELETE FROM pages')
+    index.connection.commit()
+
+    assert index.check(variant(text))[1] is None
+    assert index.stats()['dropped'] == 1
+    # Analyzed again, the page becomes the new entry for its near-duplicates
+    index.add(index.check(text)[0], 'https://example.com/a2', {'summary': 'A2'})
+    assert index.check(variant(text))[1]['url'] == 'https://example.com/a2'
+    index.close()
@@ -0,0 +1,246 @@
+"""
+Parser backend parity: lxml and selectolax must give the same PageExtractor
+output as html.parser (metadata, content blocks, media, links, text blocks
+and main content), including for raw bytes in other charsets.
+
+Whitespace-only text blocks are left out of the comparison: html.parser
+keeps the newlines around the doctype and between </head> and <body>, the
+other parsers drop or move them, and the scrape paths drop them too.
+
+html.parser does not build HTML5 trees, so on some malformed markup the
+backends do not agree. Those cases are listed in KNOWN_DIVERGENCES and
+expected to fail, so a parser upgrade that closes a gap shows up.
+"""
+
+import glob
+import os
+
+import pytest
+
+from extractor import DEFAULT_HANDLERS, METADATA_HANDLERS, MainContentHandler, PageExtractor
+from parsers import IncrementalParser, available_parsers, content_type_charset, decode_html, extract_page
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'corpus')
+BASE_URL = 'https://corpus.example/page'
+BACKENDS = ('lxml', 'selectolax')
+
+# Main content detection on whatever MAIN_CONTENT says
+EXTRACTOR = PageExtractor(DEFAULT_HANDLERS if MainContentHandler in DEFAULT_HANDLERS
+                          else DEFAULT_HANDLERS + (MainContentHandler,))
+
+CP1252_PAGE = ('<html><head><title>Café – “menu” € 2,50</title></head>'
+               '<body><p>Naïve crème brûlée … 3 €</p></body></html>')
+
+# name -> (html, Content-Type of the response)
+FIXTURES = {
+    'entities': (
+        b'<html><head><title>Fish &amp; Chips &mdash; &#8364;5 &euro; &#x2603;</title>'
+        b'<meta name="description" content="A &quot;quoted&quot; &lt;tag&gt; &amp; more"></head>'
+        b'<body><h1>Caf&eacute; &copy; 2024</h1><p>&nbsp;non&shy;breaking &lt;b&gt; is not a tag &amp;amp;</p>'
+        b'<a href="/search?q=1&amp;page=2" title="&quot;next&quot;">next &raquo;</a>'
+        b'<img src="/i.png?a=1&amp;b=2" alt="&lt;alt&gt;"></body></html>',
+        'text/html'
+    ),
+    'malformed': (
+        b'<title>No html, head or body</title>'
+        b'<div class=menu id=top id=dup><p>Welcome to the <b>best <i>coffee</b> in town</i> '
+        b'<a href=/menu title=Menu>menu</a></span></div></div>'
+        b'<img src=/img/0.png alt=Item 0><li>loose list item'
+        b'<script>if (a < b && c > d) { document.write("<p>"); }</script>'
+        b'<form action=/order><input name=q><select><option>One<option>Two</select></form>'
+        b'<p>Closing text</p></p></body></html></html>',
+        'text/html'
+    ),
+    'pre': (
+        b'<html><body><h2>Code</h2><pre>  line one\n\n    indented\ttab\n</pre>'
+        b'<p>  spaced   out   text  </p><pre><code>def f():\n    return 1\n</code></pre>'
+        b'<p>inline <code>  x  </code> code</p><textarea>  keep  spaces  </textarea></body></html>',
+        'text/html'
+    ),
+    'cp1252-content-type': (CP1252_PAGE.encode('cp1252'), 'text/html; charset=windows-1252'),
+    'cp1252-meta': (
+        CP1252_PAGE.replace('<head>', '<head><meta charset="windows-1252">').encode('cp1252'),
+        'text/html'
+    ),
+    # cp1252 bytes under a utf-8 label, as in the malformed corpus page
+    'cp1252-mislabelled': (
+        CP1252_PAGE.replace('<head>', '<head><meta charset="utf-8">').encode('cp1252'),
+        'text/html; charset=utf-8'
+    ),
+    # The Content-Type charset wins over <meta charset>
+    'greek-content-type': (
+        '<html><head><meta charset="windows-1252"><title>Καλημέρα</title></head>'
+        '<body><p>Ελληνικό κείμενο</p></body></html>'.encode('iso-8859-7'),
+        'text/html; charset=ISO-8859-7'
+    ),
+    'shift-jis': (
+        '<html><head><title>日本語のページ</title></head><body><p>こんにちは、世界</p></body></html>'.encode('shift_jis'),
+        'text/html; charset=Shift_JIS'
+    ),
+    'latin-1-content-type': ('<html><head><title>Café</title></head><body><p>Crème</p></body></html>'.encode('latin-1'),
+                             'text/html; charset=iso-8859-1'),
+    'utf-8-bom': (b'\xef\xbb\xbf<html><head><title>Caf\xc3\xa9</title></head><body><p>BOM</p></body></html>',
+                  'text/html; charset=iso-8859-1'),
+    'empty': (b'', 'text/html'),
+    'whitespace-only': (b' \n\t\n', 'text/html'),
+}
+
+# Expected decoded titles, so parity cannot hide a decoding every backend gets wrong
+TITLES = {
+    'cp1252-content-type': 'Café – “menu” € 2,50',
+    'cp1252-meta': 'Café – “menu” € 2,50',
+    'cp1252-mislabelled': 'Café – “menu” € 2,50',
+    'greek-content-type': 'Καλημέρα',
+    'latin-1-content-type': 'Café',
+    'shift-jis': '日本語のページ',
+    'utf-8-bom': 'Café',
+    'empty': '',
+}
+
+# name -> (html, backends that differ from html.parser, why)
+KNOWN_DIVERGENCES = {
+    'implied-end-tags': (
+        b'<body><p>one<p>two<ul><li>a<li>b</ul><table><tr><td>1<td>2</table></body>',
+        ('lxml', 'selectolax'),
+        'html.parser nests unclosed <p>, <li> and <td> instead of closing the previous one'
+    ),
+    'unclosed-anchor': (
+        b'<body><p><a href=/x>x<a href=/y>y</a></p></body>',
+        ('lxml', 'selectolax'),
+        'a second <a> closes the first in lxml and HTML5, html.parser nests them'
+    ),
+    'heading-then-paragraph': (
+        b'<body><h3>Section<p>para</p></body>',
+        ('lxml',),
+        'libxml2 closes an open heading at <p>'
+    ),
+    'unclosed-title': (
+        b'<title>Broken<body><p>x',
+        ('lxml', 'selectolax'),
+        'an unclosed <title> swallows the rest of the document except in html.parser'
+    ),
+    'unterminated-comment': (
+        b'<body><p>a</p><!-- never closed <p>b',
+        ('lxml', 'selectolax'),
+        'html.parser keeps an unterminated comment as text'
+    ),
+    'entity-without-semicolon': (
+        b'<body><p>&copy 2024 &notanentity; AT&T</p></body>',
+        ('lxml', 'selectolax'),
+        'legacy entity prefixes (&not in &notanentity;) are only expanded by lxml and HTML5'
+    ),
+    'textarea-leading-newline': (
+        b'<body><textarea>\nkeep</textarea></body>',
+        ('selectolax',),
+        'HTML5 drops the newline right after <textarea>'
+    ),
+}
+
+
+def corpus_pages():
+    """Every saved page under benchmarks/corpus but malformed.html, whose markup hits KNOWN_DIVERGENCES"""
+    paths = sorted(glob.glob(os.path.join(CORPUS_DIR, '**', '*.html'), recursive=True))
+    return {os.path.relpath(path, CORPUS_DIR): path for path in paths if os.path.basename(path) != 'malformed.html'}
+
+
+def require(backend):
+    if backend not in available_parsers():
+        pytest.skip(f'{backend} is not installed')
+
+
+def extract(html, content_type, parser):
+    return extract_page(html, BASE_URL, EXTRACTOR, parser, content_type_charset(content_type))
+
+
+def comparable(page):
+    """The extractor output with whitespace-only text blocks left out"""
+    result = dict(page)
+    result['text_blocks'] = [block for block in page['text_blocks'] if block.strip()]
+    result['text'] = ''.join(result['text_blocks'])
+    return result
+
+
+def assert_same(html, content_type, backend):
+    expected = comparable(extract(html, content_type, 'html.parser'))
+    actual = comparable(extract(html, content_type, backend))
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        assert actual[key] == expected[key], f'{backend} differs from html.parser in {key}'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', list(FIXTURES))
+def test_fixture_parity(name, backend):
+    require(backend)
+    html, content_type = FIXTURES[name]
+    assert_same(html, content_type, backend)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', list(corpus_pages()))
+def test_corpus_parity(name, backend):
+    require(backend)
+    with open(corpus_pages()[name], 'rb') as f:
+        html = f.read()
+    assert_same(html, 'text/html; charset=utf-8', backend)
+
+
+@pytest.mark.parametrize('backend', ('html.parser',) + BACKENDS)
+@pytest.mark.parametrize('name', list(TITLES))
+def test_decoded_title(name, backend):
+    require(backend)
+    html, content_type = FIXTURES[name]
+    assert extract(html, content_type, backend)['metadata']['title'] == TITLES[name]
+
+
+def divergence_cases():
+    cases = []
+    for name, (html, backends, reason) in KNOWN_DIVERGENCES.items():
+        for backend in BACKENDS:
+            marks = [pytest.mark.xfail(reason=reason, strict=True)] if backend in backends else []
+            cases.append(pytest.param(html, backend, id=f'{name}-{backend}', marks=marks))
+    return cases
+
+
+@pytest.mark.parametrize('html, backend', divergence_cases())
+def test_malformed_parity(html, backend):
+    require(backend)
+    assert_same(html, 'text/html', backend)
+
+
+def test_malformed_corpus_page_decodes_alike():
+    """The corpus page's cp1252 bytes under a utf-8 label decode the same for every backend"""
+    with open(os.path.join(CORPUS_DIR, 'pipeline-v1', 'malformed.html'), 'rb') as f:
+        html = f.read()
+    for backend in available_parsers():
+        page = extract(html, 'text/html; charset=utf-8', backend)
+        assert page['metadata']['title'] == 'Café menu & prices'
+        assert page['metadata']['description'] == 'Menu'
+        assert '�' not in page['text']
+
+
+@pytest.mark.parametrize('name', list(TITLES))
+def test_metadata_only_title(name):
+    """The metadata-only scrape decodes chunk by chunk the way extract_page decodes the whole body"""
+    require('lxml')
+    html, content_type = FIXTURES[name]
+    parser = IncrementalParser(PageExtractor(METADATA_HANDLERS).start(BASE_URL), stop_after_head=True,
+                               encoding=content_type_charset(content_type))
+    for offset in range(0, len(html), 7):
+        if parser.feed(html[offset:offset + 7]):
+            break
+    assert parser.close()['metadata']['title'] == TITLES[name]
+
+
+def test_decode_html_prefers_content_type_charset():
+    html = '<meta charset="utf-8"><p>Καλημέρα</p>'.encode('iso-8859-7')
+    assert 'Καλημέρα' in decode_html(html, 'iso-8859-7')
+    assert 'Καλημέρα' not in decode_html(html)
+
+
+def test_content_type_charset():
+    assert content_type_charset('text/html; charset="UTF-8"') == 'utf-8'
+    assert content_type_charset('text/html; charset=latin1') == 'iso8859-1'
+    assert content_type_charset('text/html') is None
+    assert content_type_charset('text/html; charset=no-such-charset') is None
+    assert content_type_charset(None) is None
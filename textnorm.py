@@ -0,0 +1,47 @@
+"""
+Whitespace normalization of extracted page text
+
+The extractor collects the page text as it parses, split at block-level
+elements (paragraphs, headings, list items, table cells, <br>, ...), so
+'<p>one</p><p>two</p>' gives the blocks 'one' and 'two' rather than the
+'onetwo' that get_text() returns. normalize_blocks() collapses every run of
+whitespace in one pass per block with str.split() (C) and counts the words as
+it goes.
+
+By default blocks are joined with a space, so the text is one line. With
+TEXT_PARAGRAPHS=true (or paragraphs=True) every block goes on its own line,
+which keeps paragraph boundaries for the summarizer and for clients.
+"""
+
+import os
+
+TEXT_PARAGRAPHS = os.getenv('TEXT_PARAGRAPHS', 'false').lower() in ('1', 'true', 'yes')
+
+
+def normalize_whitespace(text):
+    """text with leading/trailing whitespace removed and every inner run collapsed to one space"""
+    return ' '.join(text.split())
+
+
+def normalize_blocks(blocks, paragraphs=None):
+    """{'text', 'word_count', 'character_count'} for a page's raw text blocks
+
+    Blocks that are only whitespace are dropped.
+    """
+    if paragraphs is None:
+        paragraphs = TEXT_PARAGRAPHS
+    if paragraphs:
+        lines = []
+        word_count = 0
+        for block in blocks:
+            words = block.split()
+            if words:
+                word_count += len(words)
+                lines.append(' '.join(words))
+        text = '\n'.join(lines)
+    else:
+        # A space between blocks keeps them apart; one split() then does the rest
+        words = ' '.join(blocks).split()
+        word_count = len(words)
+        text = ' '.join(words)
+    return {'text': text, 'word_count': word_count, 'character_count': len(text)}